@@ -0,0 +1,169 @@
+"""Persistent cache of fitted clustering pipelines.
+
+A fit is identified by the SHA-256 of the feature matrix plus the fit
+parameters (k, n_init, random_state, backend, ...) and the scikit-learn
+version, and is stored as one joblib file per key. Entries are written to a
+temporary file and renamed into place, so readers never see a partial
+file and need no lock. Writers take an exclusive lock on ``.lock`` in the
+cache directory while they insert and evict. Eviction is least-recently-used
+(a hit refreshes the file's mtime) down to ``max_bytes`` in total. Two
+processes missing on the same key at once may both fit; the entries are
+identical and the last rename wins.
+
+Configure with ``FIT_CACHE_DIR`` (default ``.fit_cache`` next to this file),
+``FIT_CACHE_MAX_MB`` (default 64) and ``FIT_CACHE_ENABLED=0`` to bypass it.
+Only point the cache at a directory you trust: entries are unpickled.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, Tuple
+
+import joblib
+import numpy as np
+import sklearn
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+ENABLED = os.environ.get("FIT_CACHE_ENABLED", "1").strip().lower() not in ("0", "false", "no", "off")
+SUFFIX = ".joblib"
+
+
+def fit_key(X: np.ndarray, **params) -> str:
+    """Hash of the feature matrix, the fit parameters and the scikit-learn version."""
+    X = np.ascontiguousarray(X, dtype=float)
+    digest = hashlib.sha256()
+    digest.update(json.dumps({"shape": X.shape, "sklearn": sklearn.__version__, **params}, sort_keys=True, default=str).encode())
+    digest.update(X.tobytes())
+    return digest.hexdigest()
+
+
+class FitCache:
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._counter_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "FitCache":
+        directory = os.environ.get("FIT_CACHE_DIR") or Path(__file__).parent / ".fit_cache"
+        return cls(Path(directory), int(float(os.environ.get("FIT_CACHE_MAX_MB", "64")) * 1024 * 1024))
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{SUFFIX}"
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / ".lock", "a+b") as fh:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+            else:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fh, fcntl.LOCK_UN)
+                else:
+                    fh.seek(0)
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _count(self, field: str) -> None:
+        with self._counter_lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            value = joblib.load(path)
+        except FileNotFoundError:
+            self._count("misses")
+            return None
+        except Exception as exc:  # noqa: BLE001 - truncated or foreign file: drop it
+            print(f"[FitCache] Dropping unreadable entry {path.name}: {exc}")
+            with self._locked():
+                path.unlink(missing_ok=True)
+            self._count("misses")
+            return None
+        try:
+            os.utime(path)  # LRU recency
+        except OSError:
+            pass
+        self._count("hits")
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        with self._locked():
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            joblib.dump(value, tmp)
+            os.replace(tmp, path)
+            self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for path in self.directory.glob(f"*{SUFFIX}"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime_ns, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        # Oldest first; always keep the newest entry even if it alone exceeds the budget.
+        for _, size, path in sorted(entries)[:-1]:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            self._count("evictions")
+
+    def get_or_fit(self, X: np.ndarray, params: dict, fit_fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return ``(value, hit)``; on a miss ``fit_fn()`` is called and its result stored."""
+        if not ENABLED:
+            return fit_fn(), False
+        key = fit_key(X, **params)
+        value = self.get(key)
+        if value is not None:
+            return value, True
+        value = fit_fn()
+        try:
+            self.put(key, value)
+        except OSError as exc:
+            print(f"[FitCache] Could not store fit in {self.directory}: {exc}")
+        return value, False
+
+    def clear(self) -> None:
+        with self._locked():
+            for path in self.directory.glob(f"*{SUFFIX}"):
+                path.unlink(missing_ok=True)
+
+    def stats(self) -> dict:
+        entries = list(self.directory.glob(f"*{SUFFIX}")) if self.directory.exists() else []
+        return {
+            "enabled": ENABLED,
+            "directory": str(self.directory),
+            "entries": len(entries),
+            "bytes": sum(p.stat().st_size for p in entries if p.exists()),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+FIT_CACHE = FitCache.from_env()
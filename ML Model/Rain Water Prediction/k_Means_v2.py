@@ -16,6 +16,7 @@ Assumptions:
 """
 
 from __future__ import annotations
+import hashlib
 import sys
 from time import time
 import argparse
@@ -32,6 +33,7 @@ from sklearn.pipeline import Pipeline
 # Add feature_format utilities path (per request)
 sys.path.append("E:/Downloads/ud120-projects-master/ud120-projects-master/tools/")
 from feature_format import featureFormat  # noqa: E402
+from model_artifact import save_artifact  # noqa: E402
 
 DATA_PATH = Path(__file__).parent.parent / "Datasets" / "Bengaluru Rainfall Data.csv"
 
@@ -124,8 +126,8 @@ def main():
     parser.add_argument("--no-plot", action="store_true", help="Skip cluster plot generation")
     parser.add_argument("--emit-model-code", action="store_true", help="Print reusable Python snippet to recreate trained clustering pipeline")
     parser.add_argument("--model-code-file", type=str, default=None, help="If set, also write the generated model code to this file")
-    parser.add_argument("--export-model-module", action="store_true", help="Export standalone reusable Python module with model class")
-    parser.add_argument("--model-module-path", type=str, default="rainfall_clustering_model.py", help="Output path for exported model module")
+    parser.add_argument("--export-model-artifact", "--export-model-module", dest="export_model_artifact", action="store_true", help="Export the fitted model as a binary artifact loaded by rainfall_clustering_model.RainfallClusterModel")
+    parser.add_argument("--model-artifact-path", type=str, default="rainfall_clustering_model.npz", help="Output path for exported model artifact")
     args = parser.parse_args()
 
     # Load and stats
@@ -231,72 +233,30 @@ def main():
             except Exception as e:
                 print(f"Failed to write model code file: {e}")
 
-    # Export module for Streamlit integration --------------------------------
-    if args.export_model_module:
+    # Export binary model artifact for Streamlit / service integration ------
+    if args.export_model_artifact:
         kmeans_model = pipeline.named_steps['kmeans']
         scaler_model = pipeline.named_steps['scaler']
         imputer_model = pipeline.named_steps['imputer']
-        centers = kmeans_model.cluster_centers_.tolist()
-        scaler_mean = scaler_model.mean_.tolist()
-        scaler_scale = scaler_model.scale_.tolist()
-        imputer_stats = imputer_model.statistics_.tolist()
-        module_code = f"""# Auto-generated Rainfall Clustering Model Module
-#
-# Exported from k_Means_v2.py
-# Clusters: {args.clusters}
-# Inertia: {inertia:.2f}
-# Month feature order: {month_cols}
-
-import numpy as np
-from dataclasses import dataclass
-from typing import Sequence, List
-
-MONTH_FEATURES: List[str] = {month_cols!r}
-IMPUTER_STATISTICS = np.array({imputer_stats})
-SCALER_MEAN = np.array({scaler_mean})
-SCALER_SCALE = np.array({scaler_scale})
-CLUSTER_CENTERS = np.array({centers})
-
-@dataclass
-class RainfallClusterModel:
-    month_features: Sequence[str] = tuple(MONTH_FEATURES)
-
-    def preprocess(self, X_raw: np.ndarray) -> np.ndarray:
-        X_raw = np.asarray(X_raw, dtype=float)
-        if X_raw.ndim == 1:
-            X_raw = X_raw.reshape(1, -1)
-        if X_raw.shape[1] != len(self.month_features):
-            raise ValueError(f"Expected {{len(self.month_features)}} features, got {{X_raw.shape[1]}}")
-        X_imp = np.where(np.isnan(X_raw), IMPUTER_STATISTICS, X_raw)
-        X_scaled = (X_imp - SCALER_MEAN) / SCALER_SCALE
-        return X_scaled
-
-    def predict(self, X_raw: np.ndarray) -> np.ndarray:
-        Xs = self.preprocess(X_raw)
-        d2 = ((Xs[:, None, :] - CLUSTER_CENTERS)**2).sum(axis=2)
-        return d2.argmin(axis=1)
-
-    def distances(self, X_raw: np.ndarray) -> np.ndarray:
-        Xs = self.preprocess(X_raw)
-        return ((Xs[:, None, :] - CLUSTER_CENTERS)**2).sum(axis=2) ** 0.5
-
-    @property
-    def n_clusters(self) -> int:
-        return CLUSTER_CENTERS.shape[0]
-
-MODEL = RainfallClusterModel()
-
-if __name__ == '__main__':
-    demo = np.random.rand(2, len(MONTH_FEATURES)) * 100
-    print('Demo input shape:', demo.shape)
-    print('Predicted clusters:', MODEL.predict(demo))
-"""
         try:
-            Path(args.model_module_path).write_text(module_code, encoding='utf-8')
-            print(f"Model module exported to {args.model_module_path}")
+            save_artifact(
+                args.model_artifact_path,
+                {
+                    'imputer_statistics': imputer_model.statistics_,
+                    'scaler_mean': scaler_model.mean_,
+                    'scaler_scale': scaler_model.scale_,
+                    'cluster_centers': kmeans_model.cluster_centers_,
+                },
+                {
+                    'month_features': list(month_cols),
+                    'k': args.clusters,
+                    'inertia': float(inertia),
+                    'data_hash': hashlib.sha256(DATA_PATH.read_bytes()).hexdigest(),
+                },
+            )
+            print(f"Model artifact exported to {args.model_artifact_path}")
         except Exception as e:
-            print(f"Failed to write model module: {e}")
-
+            print(f"Failed to write model artifact: {e}")
 
 if __name__ == '__main__':
     main()
@@ -21,10 +21,8 @@ from time import time
 import argparse
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 from pathlib import Path
 from sklearn.cluster import KMeans
-from sklearn.decomposition import PCA
 from sklearn.preprocessing import StandardScaler
 from sklearn.impute import SimpleImputer
 from sklearn.pipeline import Pipeline
@@ -32,13 +30,22 @@ from sklearn.pipeline import Pipeline
 # Add feature_format utilities path (per request)
 sys.path.append("E:/Downloads/ud120-projects-master/ud120-projects-master/tools/")
 from feature_format import featureFormat  # noqa: E402
+from plot_render import render_cluster_png  # noqa: E402
+from rainfall_cache import load_cached  # noqa: E402
 
 DATA_PATH = Path(__file__).parent.parent / "Datasets" / "Bengaluru Rainfall Data.csv"
 
 MONTH_ORDER = ["Jan", "Feb", "March", "April", "May", "June", "July", "Aug", "Sept", "Oct", "Nov", "Dec"]
 
 
-def load_and_clean(path: Path) -> pd.DataFrame:
+def load_and_clean(path: Path, use_cache: bool = True) -> pd.DataFrame:
+    """Cleaned rainfall table; reuses the Arrow cache while the CSV is unchanged."""
+    if use_cache:
+        return load_cached(path, _clean_csv, variant="k_means_v3")
+    return _clean_csv(path)
+
+
+def _clean_csv(path: Path) -> pd.DataFrame:
     df = pd.read_csv(path)
     # Drop empty / unnamed columns
     empty_cols = [c for c in df.columns if c.strip() == '' or c.lower().startswith('unnamed')]
@@ -99,17 +106,7 @@ def run_kmeans(X: np.ndarray, k: int = 3, random_state: int = 42):
 
 
 def plot_clusters(X: np.ndarray, labels: np.ndarray, outfile: str = 'rainfall_clusters.png') -> None:
-    pca = PCA(n_components=2, random_state=42)
-    X2 = pca.fit_transform(X)
-    plt.figure(figsize=(8, 6))
-    scatter = plt.scatter(X2[:, 0], X2[:, 1], c=labels, cmap='viridis', s=30, alpha=0.85)
-    plt.title('KMeans Clusters of Yearly Rainfall Profiles (PCA 2D)')
-    plt.xlabel('PC1')
-    plt.ylabel('PC2')
-    plt.colorbar(scatter, label='Cluster')
-    plt.tight_layout()
-    plt.savefig(outfile, dpi=150)
-    plt.close()
+    Path(outfile).write_bytes(render_cluster_png(X, labels))
 
 
 def main():
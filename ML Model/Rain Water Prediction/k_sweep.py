@@ -0,0 +1,138 @@
+"""Parallel k-sweep: fit KMeans for a range of k concurrently.
+
+The feature matrix is imputed and scaled once in the parent, copied into a
+``multiprocessing.shared_memory`` block, and each worker process attaches
+to that block by name, so workers get a zero-copy view instead of a pickled
+copy of the data. Each k reports inertia (for the elbow), a silhouette score
+on a seeded sample of at most ``silhouette_sample`` rows, and fit time. The
+recommended k is the one with the best silhouette score; the elbow of the
+inertia curve is reported alongside.
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from time import perf_counter
+from typing import Iterable, List, Optional
+
+import numpy as np
+from sklearn.cluster import KMeans
+from sklearn.impute import SimpleImputer
+from sklearn.metrics import silhouette_score
+from sklearn.preprocessing import StandardScaler
+from threadpoolctl import threadpool_limits
+
+DEFAULT_K_RANGE = range(2, 9)
+DEFAULT_SILHOUETTE_SAMPLE = 2000
+
+
+def _fit_k(Xs: np.ndarray, k: int, random_state: int, n_init: int, silhouette_sample: int) -> dict:
+    t0 = perf_counter()
+    kmeans = KMeans(n_clusters=k, n_init=n_init, max_iter=300, random_state=random_state)
+    labels = kmeans.fit_predict(Xs)
+    fit_seconds = perf_counter() - t0
+    silhouette = None
+    try:
+        sample_size = min(silhouette_sample, len(Xs))
+        silhouette = float(silhouette_score(Xs, labels, sample_size=sample_size, random_state=random_state))
+    except ValueError:
+        # Fewer than two distinct labels (in the sample), or one label per row.
+        pass
+    return {
+        "k": k,
+        "inertia": float(kmeans.inertia_),
+        "silhouette": silhouette,
+        "fit_seconds": fit_seconds,
+    }
+
+
+def _fit_k_shared(shm_name: str, shape: tuple, dtype: str, k: int, random_state: int, n_init: int, silhouette_sample: int, threads: int) -> dict:
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        # Split the cores between workers instead of each one claiming all of them.
+        with threadpool_limits(limits=threads):
+            return _fit_k(np.ndarray(shape, dtype=dtype, buffer=shm.buf), k, random_state, n_init, silhouette_sample)
+    finally:
+        shm.close()
+
+
+def elbow_k(results: List[dict]) -> Optional[int]:
+    """k at the point of the inertia curve farthest from the first-last chord."""
+    if len(results) < 3:
+        return None
+    ks = np.array([r["k"] for r in results], dtype=float)
+    inertia = np.array([r["inertia"] for r in results], dtype=float)
+    # Normalise both axes so the distance is scale-free.
+    x = (ks - ks[0]) / (ks[-1] - ks[0])
+    span = inertia[0] - inertia[-1]
+    if span <= 0:
+        return None
+    y = (inertia - inertia[-1]) / span
+    # Chord from (0, 1) to (1, 0): distance is proportional to |x + y - 1|.
+    return int(ks[np.argmax(np.abs(x + y - 1.0))])
+
+
+def sweep_k(
+    X: np.ndarray,
+    k_values: Iterable[int] = DEFAULT_K_RANGE,
+    random_state: int = 42,
+    workers: Optional[int] = None,
+    n_init: int = 10,
+    silhouette_sample: int = DEFAULT_SILHOUETTE_SAMPLE,
+) -> dict:
+    """Fit every k in ``k_values`` on imputed, scaled ``X`` and recommend one.
+
+    Returns ``{"results": [{k, inertia, silhouette, fit_seconds}, ...],
+    "recommended_k", "elbow_k", "workers", "seconds"}``. With ``workers=1``
+    (or a single k) everything runs in-process.
+    """
+    k_values = sorted(set(int(k) for k in k_values))
+    if not k_values or k_values[0] < 2:
+        raise ValueError("k values must be >= 2")
+    X = np.asarray(X, dtype=float)
+    if k_values[-1] > len(X):
+        raise ValueError(f"Cannot form {k_values[-1]} clusters from {len(X)} rows")
+    t0 = perf_counter()
+    Xs = np.ascontiguousarray(StandardScaler().fit_transform(SimpleImputer(strategy="mean").fit_transform(X)))
+    workers = max(1, min(workers or os.cpu_count() or 1, len(k_values)))
+
+    if workers == 1:
+        results = [_fit_k(Xs, k, random_state, n_init, silhouette_sample) for k in k_values]
+    else:
+        shm = shared_memory.SharedMemory(create=True, size=max(Xs.nbytes, 1))
+        try:
+            shared = np.ndarray(Xs.shape, dtype=Xs.dtype, buffer=shm.buf)
+            shared[...] = Xs
+            del shared
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(_fit_k_shared, shm.name, Xs.shape, Xs.dtype.str, k, random_state, n_init, silhouette_sample, threads)
+                    for k in k_values
+                ]
+                results = [f.result() for f in futures]
+        finally:
+            shm.close()
+            shm.unlink()
+
+    scored = [r for r in results if r["silhouette"] is not None]
+    recommended = max(scored, key=lambda r: r["silhouette"])["k"] if scored else None
+    return {
+        "results": results,
+        "recommended_k": recommended,
+        "elbow_k": elbow_k(results),
+        "workers": workers,
+        "seconds": perf_counter() - t0,
+    }
+
+
+def format_sweep(sweep: dict) -> str:
+    lines = [f"{'k':>3}  {'inertia':>12}  {'silhouette':>10}  {'fit (s)':>8}"]
+    for r in sweep["results"]:
+        silhouette = "n/a" if r["silhouette"] is None else f"{r['silhouette']:.4f}"
+        marker = "  <- recommended" if r["k"] == sweep["recommended_k"] else ""
+        lines.append(f"{r['k']:>3}  {r['inertia']:>12.2f}  {silhouette:>10}  {r['fit_seconds']:>8.3f}{marker}")
+    lines.append(f"Elbow at k={sweep['elbow_k']}; {len(sweep['results'])} fits on {sweep['workers']} worker(s) in {sweep['seconds']:.2f}s")
+    return "\n".join(lines)
@@ -0,0 +1,122 @@
+"""Versioned binary artifact for fitted rainfall clustering models.
+
+An artifact is an uncompressed ``.npz`` (a ZIP of ``.npy`` members) with an
+extra ``header.json`` member carrying the format version, feature order,
+``k``, inertia and the hash of the data the model was fitted on. Because the
+members are stored uncompressed, each array can be memory-mapped straight
+from the file instead of being read and copied; ``np.load`` still opens the
+file as a regular npz.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+import zipfile
+from pathlib import Path
+from typing import IO, Dict, Tuple, Union
+
+import numpy as np
+
+FORMAT_NAME = "rainfall-cluster-model"
+FORMAT_VERSION = 1
+HEADER_MEMBER = "header.json"
+# Fixed member timestamps: the same model always serializes to the same bytes,
+# so regenerating the committed artifact does not dirty the tree.
+MEMBER_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+PathOrFile = Union[str, Path, IO[bytes]]
+
+
+class ArtifactError(ValueError):
+    pass
+
+
+def save_artifact(target: PathOrFile, arrays: Dict[str, np.ndarray], header: dict) -> None:
+    """Write ``arrays`` and ``header`` to ``target`` (a path, written atomically, or a binary file object)."""
+    header = {"format": FORMAT_NAME, "format_version": FORMAT_VERSION, **header}
+    if not isinstance(target, (str, Path)):
+        _write(target, arrays, header)
+        return
+    path = Path(target)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as fh:
+        _write(fh, arrays, header)
+    os.replace(tmp, path)
+
+
+def _write(fh: IO[bytes], arrays: Dict[str, np.ndarray], header: dict) -> None:
+    with zipfile.ZipFile(fh, "w", compression=zipfile.ZIP_STORED) as zf:
+        zf.writestr(_member_info(HEADER_MEMBER), json.dumps(header, indent=2, sort_keys=True))
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            if array.dtype.hasobject:
+                raise ArtifactError(f"Array {name!r} has object dtype; artifacts hold plain numeric data only")
+            with zf.open(_member_info(f"{name}.npy"), "w") as member:
+                np.lib.format.write_array(member, array, allow_pickle=False)
+
+
+def _member_info(name: str) -> zipfile.ZipInfo:
+    info = zipfile.ZipInfo(name, date_time=MEMBER_DATE_TIME)
+    info.compress_type = zipfile.ZIP_STORED
+    info.external_attr = 0o644 << 16
+    return info
+
+
+def read_header(path: PathOrFile) -> dict:
+    with zipfile.ZipFile(path) as zf:
+        return _parse_header(zf)
+
+
+def _parse_header(zf: zipfile.ZipFile) -> dict:
+    try:
+        header = json.loads(zf.read(HEADER_MEMBER))
+    except KeyError:
+        raise ArtifactError(f"Missing {HEADER_MEMBER}; not a {FORMAT_NAME} artifact") from None
+    if header.get("format") != FORMAT_NAME:
+        raise ArtifactError(f"Unexpected artifact format {header.get('format')!r}")
+    if header.get("format_version") != FORMAT_VERSION:
+        raise ArtifactError(f"Unsupported format_version {header.get('format_version')!r}; expected {FORMAT_VERSION}")
+    return header
+
+
+def load_artifact(path: PathOrFile, mmap: bool = True) -> Tuple[dict, Dict[str, np.ndarray]]:
+    """Return ``(header, arrays)``; with ``mmap`` arrays are read-only memory maps of the file."""
+    arrays: Dict[str, np.ndarray] = {}
+    can_mmap = mmap and isinstance(path, (str, Path))
+    with zipfile.ZipFile(path) as zf:
+        header = _parse_header(zf)
+        for info in zf.infolist():
+            if not info.filename.endswith(".npy"):
+                continue
+            name = info.filename[:-4]
+            if can_mmap and info.compress_type == zipfile.ZIP_STORED:
+                arrays[name] = _mmap_member(Path(path), info)
+            else:
+                with zf.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member, allow_pickle=False)
+    return header, arrays
+
+
+def _mmap_member(path: Path, info: zipfile.ZipInfo) -> np.ndarray:
+    with open(path, "rb") as fh:
+        # Local file header: fixed 30 bytes, then file name and extra field.
+        fh.seek(info.header_offset)
+        local = fh.read(30)
+        if local[:4] != b"PK\x03\x04":
+            raise ArtifactError(f"Corrupt local header for {info.filename}")
+        name_len, extra_len = struct.unpack("<HH", local[26:30])
+        fh.seek(info.header_offset + 30 + name_len + extra_len)
+        version = np.lib.format.read_magic(fh)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(fh)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(fh)
+        offset = fh.tell()
+    if not shape or 0 in shape:
+        # np.memmap cannot map zero-sized or 0-d arrays; these are tiny anyway.
+        with zipfile.ZipFile(path) as zf, zf.open(info) as member:
+            return np.lib.format.read_array(member, allow_pickle=False)
+    return np.memmap(path, dtype=dtype, mode="r", shape=shape, order="F" if fortran_order else "C", offset=offset)
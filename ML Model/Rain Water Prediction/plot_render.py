@@ -0,0 +1,46 @@
+"""Render the cluster scatter plot to PNG bytes with the headless Agg backend.
+
+Uses ``matplotlib.figure.Figure`` with an Agg canvas instead of pyplot, so
+there is no global figure state, no GUI backend and nothing written to the
+working directory; it is safe to call from a worker thread. The 2-D
+projection is PCA computed with NumPy, using the same centring and sign
+convention as scikit-learn's ``PCA``, so callers need not import sklearn.
+"""
+
+from __future__ import annotations
+
+import io
+
+import numpy as np
+
+
+def pca_2d(X: np.ndarray) -> np.ndarray:
+    """First two principal-component scores of ``X`` (rows = samples)."""
+    X = np.asarray(X, dtype=float)
+    centred = X - X.mean(axis=0)
+    _, _, vt = np.linalg.svd(centred, full_matrices=False)
+    # sklearn's svd_flip: make the largest-magnitude loading of each component positive.
+    signs = np.sign(vt[np.arange(vt.shape[0]), np.abs(vt).argmax(axis=1)])
+    signs[signs == 0] = 1.0
+    components = vt[:2] * signs[:2, None]
+    return centred @ components.T
+
+
+def render_cluster_png(X: np.ndarray, labels: np.ndarray, dpi: int = 150) -> bytes:
+    """PNG of the yearly profiles in PCA space, coloured by cluster label."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    X2 = pca_2d(X)
+    fig = Figure(figsize=(8, 6))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    scatter = ax.scatter(X2[:, 0], X2[:, 1], c=labels, cmap='viridis', s=30, alpha=0.85)
+    ax.set_title('KMeans Clusters of Yearly Rainfall Profiles (PCA 2D)')
+    ax.set_xlabel('PC1')
+    ax.set_ylabel('PC2')
+    fig.colorbar(scatter, ax=ax, label='Cluster')
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=dpi)
+    return buffer.getvalue()
@@ -0,0 +1,120 @@
+"""On-disk Arrow cache of the cleaned rainfall table.
+
+Cleaning the raw CSV (dropping unnamed columns, coercing to numeric and
+imputing) is repeated by every script that loads the dataset. ``load_cached``
+stores the cleaned frame as an uncompressed Arrow IPC file named after the
+source CSV's SHA-256, so later loads memory-map it and skip parsing. When
+the CSV changes its hash changes, the old cache file is removed and a fresh
+one is written. Without pyarrow installed the cache is bypassed.
+
+The cache lives in ``RAINFALL_CACHE_DIR`` or, by default, in a
+``.rainfall_cache`` directory next to the CSV.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+CACHE_FORMAT_VERSION = 1
+HASH_METADATA_KEY = b"source_sha256"
+VARIANT_METADATA_KEY = b"cleaner"
+
+# (resolved path, mtime_ns, size) -> sha256, so unchanged files are hashed once per process.
+_hash_memo: Dict[Tuple[str, int, int], str] = {}
+
+
+def _sha256(path: Path) -> str:
+    stat = path.stat()
+    memo_key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+    digest = _hash_memo.get(memo_key)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                h.update(block)
+        digest = _hash_memo[memo_key] = h.hexdigest()
+    return digest
+
+
+def cache_dir_for(path: Path) -> Path:
+    configured = os.environ.get("RAINFALL_CACHE_DIR")
+    return Path(configured) if configured else Path(path).parent / ".rainfall_cache"
+
+
+def cache_path_for(path: Path, variant: str, digest: str) -> Path:
+    stem = Path(path).stem.replace(" ", "_")
+    return cache_dir_for(path) / f"{stem}.{variant}.v{CACHE_FORMAT_VERSION}.{digest[:16]}.arrow"
+
+
+def _read(cache_path: Path, digest: str) -> Optional[pd.DataFrame]:
+    import pyarrow as pa
+
+    try:
+        with pa.memory_map(str(cache_path), "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+    except (OSError, pa.ArrowInvalid) as exc:
+        print(f"[Cache] Ignoring unreadable rainfall cache {cache_path}: {exc}")
+        return None
+    metadata = table.schema.metadata or {}
+    if metadata.get(HASH_METADATA_KEY, b"").decode() != digest:
+        return None
+    return table.to_pandas()
+
+
+def _write(cache_path: Path, df: pd.DataFrame, digest: str, variant: str) -> None:
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        HASH_METADATA_KEY: digest.encode(),
+        VARIANT_METADATA_KEY: variant.encode(),
+    })
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cache_path.with_name(cache_path.name + f".{os.getpid()}.tmp")
+    with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, cache_path)
+
+
+def _remove_stale(path: Path, variant: str, keep: Path) -> None:
+    stem = Path(path).stem.replace(" ", "_")
+    for old in cache_dir_for(path).glob(f"{stem}.{variant}.v*.arrow"):
+        if old != keep:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+
+def load_cached(path: Path, clean_fn: Callable[[Path], pd.DataFrame], variant: str) -> pd.DataFrame:
+    """Return ``clean_fn(path)``, served from (and stored in) the Arrow cache when possible.
+
+    ``variant`` names the cleaning function so scripts whose cleaning differs
+    (e.g. sorted by year) never share a cache file.
+    """
+    path = Path(path)
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return clean_fn(path)
+
+    digest = _sha256(path)
+    cache_path = cache_path_for(path, variant, digest)
+    if cache_path.exists():
+        df = _read(cache_path, digest)
+        if df is not None:
+            return df
+
+    df = clean_fn(path)
+    try:
+        _write(cache_path, df, digest, variant)
+        _remove_stale(path, variant, keep=cache_path)
+    except OSError as exc:
+        print(f"[Cache] Could not write rainfall cache {cache_path}: {exc}")
+    return df
@@ -6,7 +6,8 @@ Features:
 - User inputs: roof area, roof type, soil type, roof slope, annual rainfall override, efficiency override, cluster count
 - Calculates potential annual harvest and recommended tank size
 - Performs KMeans clustering on yearly rainfall profiles with PCA visualization
-- Provides downloadable reconstructed model snippet and module
+- Optional parallel k-sweep (2-8) with inertia and silhouette per k
+- Provides downloadable reconstructed model snippet and binary model artifact
 
 Run:
     streamlit run streamlit_app.py
@@ -22,9 +23,15 @@ from sklearn.decomposition import PCA
 from sklearn.preprocessing import StandardScaler
 from sklearn.impute import SimpleImputer
 from sklearn.pipeline import Pipeline
+import hashlib
 import io
 import textwrap
 
+from fit_cache import FIT_CACHE
+from k_sweep import sweep_k
+from model_artifact import save_artifact
+from rainfall_cache import load_cached
+
 # Optional: Add tools path if feature_format needed (we'll avoid dependency by using DataFrame directly)
 # sys.path.append("E:/Downloads/ud120-projects-master/ud120-projects-master/tools/")
 
@@ -63,7 +70,12 @@ def load_rainfall() -> pd.DataFrame:
             f"Rainfall dataset not found at: {DATA_PATH}\n"
             "Please ensure the file exists or update the path in streamlit_app.py."
         )
-    df = pd.read_csv(DATA_PATH)
+    # Cleaned table is cached as Arrow next to the CSV and rebuilt when the CSV changes.
+    return load_cached(DATA_PATH, clean_rainfall, variant="streamlit")
+
+
+def clean_rainfall(path: Path) -> pd.DataFrame:
+    df = pd.read_csv(path)
     empty_cols = [c for c in df.columns if c.strip() == '' or c.lower().startswith('unnamed')]
     if empty_cols:
         df.drop(columns=empty_cols, inplace=True)
@@ -125,13 +137,19 @@ def harvest_calculations(annual_rainfall_mm: float, roof_area_m2: float, efficie
 def run_clustering(df: pd.DataFrame, k: int, random_state: int = 42):
     month_cols = [c for c in df.columns if c != 'Year']
     X = df[month_cols].values
-    pipeline = Pipeline([
-        ("imputer", SimpleImputer(strategy="mean")),
-        ("scaler", StandardScaler()),
-        ("kmeans", KMeans(n_clusters=k, n_init=10, max_iter=300, random_state=random_state))
-    ])
-    labels = pipeline.fit_predict(X)
-    inertia = pipeline.named_steps['kmeans'].inertia_
+
+    def fit():
+        pipeline = Pipeline([
+            ("imputer", SimpleImputer(strategy="mean")),
+            ("scaler", StandardScaler()),
+            ("kmeans", KMeans(n_clusters=k, n_init=10, max_iter=300, random_state=random_state))
+        ])
+        labels = pipeline.fit_predict(X)
+        return {"pipeline": pipeline, "labels": labels, "inertia": pipeline.named_steps['kmeans'].inertia_}
+
+    # Same data + parameters -> reuse the fit stored on disk (shared with other sessions).
+    fitted, _hit = FIT_CACHE.get_or_fit(X, dict(backend="kmeans", k=k, random_state=random_state, n_init=10, max_iter=300), fit)
+    pipeline, labels, inertia = fitted["pipeline"], fitted["labels"], fitted["inertia"]
     # PCA for visualization
     pca = PCA(n_components=2, random_state=random_state)
     X2 = pca.fit_transform(X)
@@ -144,6 +162,13 @@ def run_clustering(df: pd.DataFrame, k: int, random_state: int = 42):
     }
 
 
+@st.cache_data(show_spinner="Sweeping k = 2-8...")
+def run_k_sweep(df: pd.DataFrame) -> dict:
+    month_cols = [c for c in df.columns if c != 'Year']
+    # Fits run concurrently in worker processes sharing one scaled matrix.
+    return sweep_k(df[month_cols].values, range(2, 9))
+
+
 def generate_model_snippet(pipeline, month_cols, inertia, k):
     kmeans_model = pipeline.named_steps['kmeans']
     scaler_model = pipeline.named_steps['scaler']
@@ -156,16 +181,28 @@ def generate_model_snippet(pipeline, month_cols, inertia, k):
     return snippet
 
 
-def generate_module_code(pipeline, month_cols, inertia, k):
+def generate_model_artifact(pipeline, month_cols, inertia, k) -> bytes:
+    """Serialize the fitted pipeline as a binary model artifact (loaded by RainfallClusterModel)."""
     kmeans_model = pipeline.named_steps['kmeans']
     scaler_model = pipeline.named_steps['scaler']
     imputer_model = pipeline.named_steps['imputer']
-    centers = kmeans_model.cluster_centers_.tolist()
-    scaler_mean = scaler_model.mean_.tolist()
-    scaler_scale = scaler_model.scale_.tolist()
-    imputer_stats = imputer_model.statistics_.tolist()
-    module_code = f"""# Auto-generated Rainfall Clustering Model Module\n# Clusters: {k}  Inertia: {inertia:.2f}\nimport numpy as np\nfrom dataclasses import dataclass\nfrom typing import Sequence, List\nMONTH_FEATURES: List[str] = {month_cols!r}\nIMPUTER_STATISTICS = np.array({imputer_stats})\nSCALER_MEAN = np.array({scaler_mean})\nSCALER_SCALE = np.array({scaler_scale})\nCLUSTER_CENTERS = np.array({centers})\n@dataclass\nclass RainfallClusterModel:\n    month_features: Sequence[str] = tuple(MONTH_FEATURES)\n    def preprocess(self, X_raw: np.ndarray) -> np.ndarray:\n        X_raw = np.asarray(X_raw, dtype=float)\n        if X_raw.ndim == 1: X_raw = X_raw.reshape(1, -1)\n        if X_raw.shape[1] != len(self.month_features):\n            raise ValueError(f'Expected {{len(self.month_features)}} features, got {{X_raw.shape[1]}}')\n        X_imp = np.where(np.isnan(X_raw), IMPUTER_STATISTICS, X_raw)\n        X_scaled = (X_imp - SCALER_MEAN) / SCALER_SCALE\n        return X_scaled\n    def predict(self, X_raw: np.ndarray) -> np.ndarray:\n        Xs = self.preprocess(X_raw)\n        d2 = ((Xs[:, None, :] - CLUSTER_CENTERS)**2).sum(axis=2)\n        return d2.argmin(axis=1)\n    def distances(self, X_raw: np.ndarray) -> np.ndarray:\n        Xs = self.preprocess(X_raw)\n        return ((Xs[:, None, :] - CLUSTER_CENTERS)**2).sum(axis=2) ** 0.5\nMODEL = RainfallClusterModel()\n"""
-    return module_code
+    buffer = io.BytesIO()
+    save_artifact(
+        buffer,
+        {
+            'imputer_statistics': imputer_model.statistics_,
+            'scaler_mean': scaler_model.mean_,
+            'scaler_scale': scaler_model.scale_,
+            'cluster_centers': kmeans_model.cluster_centers_,
+        },
+        {
+            'month_features': list(month_cols),
+            'k': k,
+            'inertia': float(inertia),
+            'data_hash': hashlib.sha256(DATA_PATH.read_bytes()).hexdigest(),
+        },
+    )
+    return buffer.getvalue()
 
 
 def main():
@@ -184,6 +221,7 @@ def main():
         annual_override = st.number_input("Override annual rainfall (mm) (optional)", min_value=0.0, value=0.0, help="Set >0 to override dataset mean")
         eff_override = st.number_input("Override efficiency (0-1) (optional)", min_value=0.0, max_value=1.0, value=0.0, step=0.01)
         clusters = st.slider("Clusters (k)", min_value=2, max_value=8, value=3)
+        sweep = st.checkbox("Sweep k = 2-8 (parallel)", help="Fit every k at once and show inertia / silhouette per k")
         show_raw = st.checkbox("Show raw dataset")
         run_button = st.button("Run Analysis", type="primary")
 
@@ -220,6 +258,16 @@ def main():
         fig = px.scatter(x=X2[:,0], y=X2[:,1], color=labels.astype(str), labels={"x":"PC1","y":"PC2","color":"Cluster"}, title="Yearly Rainfall Profile Clusters (PCA)")
         st.plotly_chart(fig, use_container_width=True)
 
+        if sweep:
+            st.subheader("k Sweep (2-8)")
+            sweep_res = run_k_sweep(df)
+            sweep_df = pd.DataFrame(sweep_res['results']).set_index('k')
+            s1, s2 = st.columns(2)
+            s1.line_chart(sweep_df['inertia'])
+            s2.line_chart(sweep_df['silhouette'])
+            st.dataframe(sweep_df, use_container_width=True)
+            st.info(f"Recommended k (best silhouette): {sweep_res['recommended_k']} · elbow at k={sweep_res['elbow_k']} · {sweep_res['seconds']:.2f}s on {sweep_res['workers']} worker(s)")
+
         # Distribution
         unique, counts = np.unique(labels, return_counts=True)
         dist_df = pd.DataFrame({"Cluster": unique, "Count": counts})
@@ -233,11 +281,11 @@ def main():
         # Model export section
         st.subheader("Model Export")
         snippet = generate_model_snippet(cluster_res['pipeline'], month_cols, inertia, clusters)
-        module_code = generate_module_code(cluster_res['pipeline'], month_cols, inertia, clusters)
+        artifact = generate_model_artifact(cluster_res['pipeline'], month_cols, inertia, clusters)
         with st.expander("Show reconstruction snippet"):
             st.code(snippet, language="python")
         st.download_button("Download Model Snippet", data=snippet, file_name="model_snippet.py", mime="text/x-python")
-        st.download_button("Download Model Module", data=module_code, file_name="rainfall_clustering_model.py", mime="text/x-python")
+        st.download_button("Download Model Artifact", data=artifact, file_name="rainfall_clustering_model.npz", mime="application/octet-stream")
 
         st.markdown("---")
         st.caption("Generated by streamlit_app.py · All computations local.")
@@ -3,6 +3,9 @@ from skimage.feature import peak_local_max
 from skimage.segmentation import watershed
 from scipy import ndimage
 import numpy as np
+import matplotlib
+# Headless backend: figures are only saved to disk, never shown from the server.
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 from flask import Flask, render_template, url_for, redirect, request, flash, request
 from scipy.spatial import distance as dist
@@ -94,6 +97,8 @@ def Watershed(location_det):
 	plt.imshow(image, cmap='gray')
 	plt.axis('off')
 	plt.savefig('fig1.png')
+	# Release both figures (the threshold preview and this one) so requests don't leak them.
+	plt.close('all')
 	imag = Image.open('fig1.png')
 	imag.show()
 	
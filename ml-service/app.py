@@ -1,16 +1,31 @@
 import asyncio
+import json
 import os
 from contextlib import suppress
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Any, List, Literal, Optional
+
+from typing_extensions import Annotated
 
 import httpx
-from fastapi import FastAPI
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Request, Response
+from pydantic import BaseModel, Field, ValidationError, field_validator, model_validator
+from starlette.concurrency import run_in_threadpool
 import uvicorn
-import k_means_v3
+import serving
+import metrics
+import profiling
+import region_store
+import scenarios
+import water_balance
+import bulk_stream
+import cluster_plots
+from execution import PredictionExecutor, Saturated
+from response_cache import TTLCache
 
 app = FastAPI()
+app.add_middleware(profiling.ProfilingMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
 
 SELF_PING_URL = (os.environ.get("SELF_PING_URL") or os.environ.get("RENDER_EXTERNAL_URL") or "").rstrip("/")
 
@@ -25,43 +40,590 @@ def _resolve_keep_alive_seconds() -> int:
 
 
 KEEP_ALIVE_SECONDS = _resolve_keep_alive_seconds()
+MAX_BATCH_ITEMS = int(os.environ.get("MAX_BATCH_ITEMS", "10000"))
+STREAM_CHUNK_ROWS = int(os.environ.get("STREAM_CHUNK_ROWS", "5000"))
+# Sites x tank sizes per /tank/simulate request; each cell steps through every month.
+MAX_TANK_CELLS = int(os.environ.get("MAX_TANK_CELLS", "200000"))
+# Sites x scenarios per /scenarios request; one summary number per cell and metric is kept.
+MAX_SCENARIO_CELLS = int(os.environ.get("MAX_SCENARIO_CELLS", "1000000"))
 _keep_alive_task: Optional[asyncio.Task] = None
 
+# Results are keyed on the inputs and the dataset hash and reused until they
+# expire; a refit in this process also drops them.
+RESULT_CACHE = TTLCache(
+    maxsize=int(os.environ.get("RESULT_CACHE_SIZE", "4096")),
+    ttl=float(os.environ.get("RESULT_CACHE_TTL_SECONDS", "300")),
+)
+serving.MODEL_REGISTRY.add_refit_listener(lambda _model: RESULT_CACHE.clear())
+
+# Runs prediction work on the threadpool or a pre-warmed process pool
+# (PREDICTION_EXECUTION_MODE=thread|process) with a bounded queue.
+EXECUTOR = PredictionExecutor.from_env()
+
+
+def _canonical_region(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return None
+    store = region_store.get_store()
+    return store.regions[store.code(value)]
+
+
 class AssessmentInput(BaseModel):
     roof_area: float
     roof_type: str
     soil_type: str
-    annual_rainfall: float
+    # Either give the annual rainfall (mm) or an IMD subdivision whose mean is used.
+    annual_rainfall: Optional[float] = None
+    region: Optional[str] = None
+    # "reliability" replaces the 1.5-month tank_volume heuristic with the smallest
+    # tank that meets target_reliability in a monthly simulation (needs dwellers).
+    tank_sizing: Literal["heuristic", "reliability"] = "heuristic"
+    dwellers: Optional[int] = Field(default=None, ge=0)
+    per_capita_lpd: float = Field(default=water_balance.DEFAULT_PER_CAPITA_LPD, ge=0)
+    target_reliability: float = Field(default=water_balance.DEFAULT_TARGET_RELIABILITY, ge=0, le=1)
+
+    @field_validator("region")
+    @classmethod
+    def _known_region(cls, value: Optional[str]) -> Optional[str]:
+        return _canonical_region(value)
+
+    @model_validator(mode="after")
+    def _rainfall_or_region(self):
+        if self.annual_rainfall is None and self.region is None:
+            raise ValueError("Provide annual_rainfall or region")
+        if self.tank_sizing == "reliability" and self.dwellers is None:
+            raise ValueError("tank_sizing 'reliability' needs dwellers")
+        return self
+
+
+def _reliability_tanks(inputs: List[AssessmentInput], efficiency_pct) -> List[dict]:
+    """Simulated tank sizing for each input, in order.
+
+    The monthly record of the input's region (Bengaluru without one) is
+    simulated; a given annual_rainfall rescales it to that annual total,
+    which is the same as scaling the roof's inflow.
+    """
+    scale = [
+        1.0 if d.annual_rainfall is None else d.annual_rainfall / water_balance.record_mean_annual(d.region)
+        for d in inputs
+    ]
+    result = water_balance.optimize_sites(
+        roof_area=[d.roof_area * f for d, f in zip(inputs, scale)],
+        efficiency=[e / 100.0 for e in efficiency_pct],
+        daily_demand=[d.dwellers * d.per_capita_lpd for d in inputs],
+        regions=[d.region for d in inputs],
+        target=[d.target_reliability for d in inputs],
+    )
+    return [
+        {
+            "tank_volume": float(volume) if feasible else None,
+            "tank_sizing": "reliability",
+            "tank_reliability": float(achieved),
+        }
+        for volume, achieved, feasible in zip(result["tank_volume"], result["achieved"], result["feasible"])
+    ]
+
 
 def _run_prediction(data: AssessmentInput):
-    result = k_means_v3.predict_harvest(
+    """Return ``(data hash of the model used, result)``; the hash is None if a refit raced the call."""
+    before = serving.MODEL_REGISTRY.get().data_hash
+    result = serving.predict_harvest(
         roof_area=data.roof_area,
         roof_type=data.roof_type,
         soil_type=data.soil_type,
-        rainfall=data.annual_rainfall
+        rainfall=data.annual_rainfall,
+        region=data.region
     )
-    return {
+    output = {
         "potential_harvest": result["potential_harvest"],
         "tank_volume": result["tank_volume"],
         "efficiency": result["efficiency"],
         "inertia": result["inertia"]
     }
+    if "region" in result:
+        output["region"] = result["region"]
+        output["annual_rainfall"] = result["annual_rainfall"]
+    if data.tank_sizing == "reliability":
+        output.update(_reliability_tanks([data], [result["efficiency"]])[0])
+    after = serving.MODEL_REGISTRY.get().data_hash
+    return (before if before == after else None), output
+
+
+def _cache_key(data: AssessmentInput) -> tuple:
+    key = (
+        data.roof_type.strip().lower(),
+        data.soil_type.strip().lower(),
+        round(data.roof_area, 4),
+        None if data.annual_rainfall is None else round(data.annual_rainfall, 4),
+        # The region only matters when it supplies the rainfall.
+        data.region if data.annual_rainfall is None else None,
+    )
+    if data.tank_sizing == "reliability":
+        # The simulated tank depends on the region's monthly record in any case.
+        key += (data.region, data.dwellers, round(data.per_capita_lpd, 4), round(data.target_reliability, 6))
+    return key
+
+
+async def _dispatch(fn, *args):
+    if EXECUTOR.mode == "thread":
+        # Profiles the call in its worker thread when this request is being profiled.
+        fn = profiling.wrap(fn)
+    try:
+        return await EXECUTOR.run(fn, *args)
+    except Saturated as exc:
+        raise HTTPException(
+            status_code=503,
+            detail="Prediction service is busy, retry later",
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
+
+
+async def _cached_prediction(data: AssessmentInput):
+    # Only stat (and after a change, re-hash) the dataset here; any refit
+    # happens in the executor, so process mode never fits in this process.
+    data_hash = serving.MODEL_REGISTRY.known_data_hash()
+    if data_hash is None:
+        data_hash = await run_in_threadpool(serving.MODEL_REGISTRY.current_data_hash)
+    key = (data_hash,) + _cache_key(data)
+    result = RESULT_CACHE.get(key)
+    if result is None:
+        model_hash, result = await _dispatch(_run_prediction, data)
+        # Process workers keep their own registries: only cache a result the
+        # worker computed on the same data as the key.
+        if model_hash == data_hash:
+            RESULT_CACHE.put(key, result)
+    return dict(result)
+
+
+class BatchAssessmentInput(BaseModel):
+    # Items are validated one by one so a bad row does not fail the batch.
+    items: List[Any]
+
+
+def _run_batch_prediction(batch: BatchAssessmentInput):
+    results: List[dict] = [None] * len(batch.items)
+    valid_indices: List[int] = []
+    valid_inputs: List[AssessmentInput] = []
+    for index, item in enumerate(batch.items):
+        try:
+            valid_inputs.append(AssessmentInput.model_validate(item))
+            valid_indices.append(index)
+        except ValidationError as exc:
+            results[index] = {"index": index, "ok": False, "errors": exc.errors(include_url=False, include_context=False)}
+
+    if valid_inputs:
+        computed = serving.predict_harvest_batch(
+            roof_areas=[d.roof_area for d in valid_inputs],
+            roof_types=[d.roof_type for d in valid_inputs],
+            rainfalls=[d.annual_rainfall for d in valid_inputs],
+            regions=[d.region for d in valid_inputs],
+        )
+        rainfall = computed["rainfall"].tolist()
+        harvest = computed["potential_harvest"].tolist()
+        tank = computed["tank_volume"].tolist()
+        efficiency = computed["efficiency"].tolist()
+        simulated = [pos for pos, d in enumerate(valid_inputs) if d.tank_sizing == "reliability"]
+        sized = {}
+        if simulated:
+            tanks = _reliability_tanks([valid_inputs[pos] for pos in simulated], [efficiency[pos] for pos in simulated])
+            sized = dict(zip(simulated, tanks))
+        for pos, index in enumerate(valid_indices):
+            results[index] = {
+                "index": index,
+                "ok": True,
+                "potential_harvest": harvest[pos],
+                "tank_volume": tank[pos],
+                "efficiency": efficiency[pos],
+                "inertia": computed["inertia"],
+            }
+            if valid_inputs[pos].annual_rainfall is None:
+                results[index]["region"] = valid_inputs[pos].region
+                results[index]["annual_rainfall"] = rainfall[pos]
+            if pos in sized:
+                results[index].update(sized[pos])
+
+    return {
+        "count": len(results),
+        "failed": len(results) - len(valid_inputs),
+        "results": results,
+    }
+
+
+MonthlyProfile = Annotated[List[Optional[float]], Field(min_length=12, max_length=12)]
+
+
+class ClusterInput(BaseModel):
+    # Jan..Dec rainfall (mm); null marks a missing month, imputed like in training.
+    profiles: List[MonthlyProfile] = Field(min_length=1)
+
+
+class TankSite(BaseModel):
+    roof_area: float = Field(gt=0)
+    roof_type: str
+    roof_slope: float = 5.0
+    catchment_eff: Optional[float] = Field(default=None, ge=0, le=1)
+    dwellers: int = Field(ge=0)
+    per_capita_lpd: float = Field(default=water_balance.DEFAULT_PER_CAPITA_LPD, ge=0)
+    # IMD subdivision whose monthly record is simulated; omitted means Bengaluru.
+    region: Optional[str] = None
+
+    @field_validator("region")
+    @classmethod
+    def _known_region(cls, value: Optional[str]) -> Optional[str]:
+        return _canonical_region(value)
+
+
+class TankSimulationInput(BaseModel):
+    sites: List[TankSite] = Field(min_length=1)
+    tank_volumes: List[Annotated[float, Field(gt=0)]] = Field(min_length=1, max_length=64)
+    initial_fill: float = Field(default=0.0, ge=0, le=1)
+    rule: str = Field(default="ybs", pattern="^(ybs|yas)$")
+
+
+class TankOptimizationInput(BaseModel):
+    sites: List[TankSite] = Field(min_length=1)
+    target: float = Field(default=water_balance.DEFAULT_TARGET_RELIABILITY, ge=0, le=1)
+    metric: Literal["reliability", "volumetric_reliability"] = "reliability"
+    initial_fill: float = Field(default=0.0, ge=0, le=1)
+    rule: str = Field(default="ybs", pattern="^(ybs|yas)$")
+
+
+class ScenarioSite(TankSite):
+    # Litres; defaults to the 1.5-month heuristic on the record's mean rainfall.
+    tank_volume: Optional[float] = Field(default=None, gt=0)
+
+
+class ScenarioInput(BaseModel):
+    sites: List[ScenarioSite] = Field(min_length=1)
+    n_scenarios: int = Field(default=scenarios.DEFAULT_SCENARIOS, ge=1, le=100000)
+    horizon_years: int = Field(default=scenarios.DEFAULT_HORIZON_YEARS, ge=1, le=100)
+    block_years: int = Field(default=scenarios.DEFAULT_BLOCK_YEARS, ge=1, le=30)
+    seed: int = Field(default=0, ge=0)
+    initial_fill: float = Field(default=0.0, ge=0, le=1)
+    rule: str = Field(default="ybs", pattern="^(ybs|yas)$")
+
+
+def _site_efficiency(sites: List[TankSite]):
+    return water_balance.site_efficiency(
+        [s.roof_type for s in sites], [s.roof_slope for s in sites], [s.catchment_eff for s in sites]
+    )
+
+
+def _run_tank_optimization(data: TankOptimizationInput):
+    sites = data.sites
+    efficiency = _site_efficiency(sites)
+    result = water_balance.optimize_sites(
+        roof_area=[s.roof_area for s in sites],
+        efficiency=efficiency,
+        daily_demand=[s.dwellers * s.per_capita_lpd for s in sites],
+        regions=[s.region for s in sites],
+        target=data.target,
+        metric=data.metric,
+        initial_fill=data.initial_fill,
+        rule=data.rule,
+    )
+    efficiency = efficiency.tolist()
+    return {
+        "target": data.target,
+        "metric": data.metric,
+        "rule": data.rule,
+        "results": [
+            {
+                "index": i,
+                "region": site.region,
+                "first_year": int(result["first_year"][i]),
+                "last_year": int(result["last_year"][i]),
+                "efficiency": efficiency[i] * 100,
+                "daily_demand_l": site.dwellers * site.per_capita_lpd,
+                # None when even a tank holding the whole record's inflow misses the target.
+                "tank_volume": float(result["tank_volume"][i]) if result["feasible"][i] else None,
+                "achieved": float(result["achieved"][i]),
+            }
+            for i, site in enumerate(sites)
+        ],
+    }
+
+
+def _run_scenarios(data: ScenarioInput):
+    sites = data.sites
+    efficiency = _site_efficiency(sites)
+    tank_volume = [
+        s.tank_volume if s.tank_volume is not None
+        else s.roof_area * e * water_balance.record_mean_annual(s.region) / 12.0 * 1.5
+        for s, e in zip(sites, efficiency)
+    ]
+    result = scenarios.simulate_scenario_sites(
+        roof_area=[s.roof_area for s in sites],
+        efficiency=efficiency,
+        daily_demand=[s.dwellers * s.per_capita_lpd for s in sites],
+        tank_volume=tank_volume,
+        regions=[s.region for s in sites],
+        n_scenarios=data.n_scenarios,
+        horizon_years=data.horizon_years,
+        block_years=data.block_years,
+        seed=data.seed,
+        initial_fill=data.initial_fill,
+        rule=data.rule,
+    )
+    metric_names = ("annual_rainfall", "potential_harvest") + scenarios.TANK_METRICS
+    columns = {name: {label: values.tolist() for label, values in result[name].items()} for name in metric_names}
+    return {
+        "n_scenarios": data.n_scenarios,
+        "horizon_years": data.horizon_years,
+        "block_years": data.block_years,
+        "seed": data.seed,
+        "rule": data.rule,
+        "results": [
+            {
+                "index": i,
+                "region": site.region,
+                "first_year": int(result["first_year"][i]),
+                "last_year": int(result["last_year"][i]),
+                "efficiency": float(efficiency[i]) * 100,
+                "daily_demand_l": site.dwellers * site.per_capita_lpd,
+                "tank_volume": float(tank_volume[i]),
+                **{name: {label: values[i] for label, values in points.items()} for name, points in columns.items()},
+            }
+            for i, site in enumerate(sites)
+        ],
+    }
+
+
+def _run_tank_simulation(data: TankSimulationInput):
+    sites = data.sites
+    efficiency = _site_efficiency(sites)
+    result = water_balance.simulate_sites(
+        roof_area=[s.roof_area for s in sites],
+        efficiency=efficiency,
+        daily_demand=[s.dwellers * s.per_capita_lpd for s in sites],
+        tank_volumes=data.tank_volumes,
+        regions=[s.region for s in sites],
+        initial_fill=data.initial_fill,
+        rule=data.rule,
+    )
+    columns = {name: result[name].tolist() for name in
+               ("reliability", "volumetric_reliability", "supplied_l", "overflow_l", "deficit_l")}
+    efficiency = efficiency.tolist()
+    return {
+        "tank_volumes": data.tank_volumes,
+        "rule": data.rule,
+        "results": [
+            {
+                "index": i,
+                "region": site.region,
+                "first_year": int(result["first_year"][i]),
+                "last_year": int(result["last_year"][i]),
+                "efficiency": efficiency[i] * 100,
+                "daily_demand_l": site.dwellers * site.per_capita_lpd,
+                **{name: values[i] for name, values in columns.items()},
+            }
+            for i, site in enumerate(sites)
+        ],
+    }
 
 
 @app.post("/predict")
-def predict(data: AssessmentInput):
-    return _run_prediction(data)
+async def predict(data: AssessmentInput):
+    return await _cached_prediction(data)
 
 
 @app.post("/calculate")
-def calculate(data: AssessmentInput):
-    return _run_prediction(data)
+async def calculate(data: AssessmentInput):
+    return await _cached_prediction(data)
+
+
+@app.post("/predict/batch")
+async def predict_batch(batch: BatchAssessmentInput):
+    if len(batch.items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {MAX_BATCH_ITEMS} items")
+    return await _dispatch(_run_batch_prediction, batch)
+
+
+@app.post("/calculate/batch")
+async def calculate_batch(batch: BatchAssessmentInput):
+    return await predict_batch(batch)
+
+
+@app.post("/cluster")
+async def cluster(data: ClusterInput):
+    if len(data.profiles) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {MAX_BATCH_ITEMS} profiles")
+    return await _dispatch(serving.assign_clusters, data.profiles)
+
+
+@app.post("/tank/simulate")
+async def tank_simulate(data: TankSimulationInput):
+    """Monthly storage simulation of each site against each tank size."""
+    if len(data.sites) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {MAX_BATCH_ITEMS} sites")
+    if len(data.sites) * len(data.tank_volumes) > MAX_TANK_CELLS:
+        raise HTTPException(status_code=413, detail=f"Sites x tank sizes exceeds {MAX_TANK_CELLS}")
+    return await _dispatch(_run_tank_simulation, data)
+
+
+@app.post("/tank/optimize")
+async def tank_optimize(data: TankOptimizationInput):
+    """Smallest tank per site that meets the target reliability."""
+    if len(data.sites) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {MAX_BATCH_ITEMS} sites")
+    return await _dispatch(_run_tank_optimization, data)
+
+
+@app.post("/scenarios")
+async def scenario_outcomes(data: ScenarioInput):
+    """P10/P50/P90 harvest and tank outcomes over seeded block-bootstrap rainfall scenarios."""
+    if len(data.sites) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {MAX_BATCH_ITEMS} sites")
+    if len(data.sites) * data.n_scenarios > MAX_SCENARIO_CELLS:
+        raise HTTPException(status_code=413, detail=f"Sites x scenarios exceeds {MAX_SCENARIO_CELLS}")
+    return await _dispatch(_run_scenarios, data)
+
+
+@app.post("/predict/stream")
+async def predict_stream(request: Request, format: Optional[str] = None):
+    """Score a streamed CSV/NDJSON upload; results stream back as NDJSON."""
+    try:
+        fmt = bulk_stream.detect_format(request.headers.get("content-type"), format)
+    except bulk_stream.StreamFormatError as exc:
+        raise HTTPException(status_code=415, detail=str(exc)) from exc
+
+    if not serving.MODEL_REGISTRY.is_current():
+        await run_in_threadpool(serving.MODEL_REGISTRY.get)
+    inertia = serving.MODEL_REGISTRY.get().inertia
+
+    async def results():
+        rows = failed = 0
+        records = bulk_stream.iter_records(bulk_stream.iter_lines(request.stream()), fmt)
+        try:
+            async for chunk in bulk_stream.iter_chunks(records, STREAM_CHUNK_ROWS):
+                lines, chunk_failed = await run_in_threadpool(bulk_stream.score_chunk, chunk)
+                rows += len(chunk)
+                failed += chunk_failed
+                yield bulk_stream.ndjson(lines)
+        except bulk_stream.StreamFormatError as exc:
+            # Headers are already sent, so report the error in-band and stop.
+            yield bulk_stream.ndjson([json.dumps({"done": False, "error": str(exc), "rows": rows})])
+            return
+        yield bulk_stream.ndjson([json.dumps({"done": True, "rows": rows, "failed": failed, "inertia": inertia})])
+
+    return bulk_stream.DuplexStreamingResponse(results(), media_type="application/x-ndjson")
+
+
+@app.get("/regions")
+def regions():
+    store = region_store.get_store()
+    return {"regions": list(store.regions), "first_year": store.first_year, "last_year": store.last_year}
+
+
+@app.get("/regions/{region}")
+def region_summary(region: str, year: Optional[int] = None):
+    store = region_store.get_store()
+    try:
+        summary = store.summary(region)
+        if year is not None:
+            summary["record"] = store.record(region, year)
+    except region_store.UnknownRegion as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    return summary
+
 
 @app.get("/health")
 def health():
     return {"ok": True}
 
 
+@app.get("/cache/stats")
+def cache_stats():
+    return RESULT_CACHE.stats()
+
+
+@app.get("/executor/stats")
+def executor_stats():
+    return EXECUTOR.stats()
+
+
+def _require_admin(request: Request) -> None:
+    if profiling.ADMIN_TOKEN is None:
+        # Profiles leak stacks, paths and allocation sites; never serve them unauthenticated.
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled (set ADMIN_TOKEN)")
+    supplied = request.headers.get("x-admin-token")
+    authorization = request.headers.get("authorization", "")
+    if supplied is None and authorization.lower().startswith("bearer "):
+        supplied = authorization[7:].strip()
+    if not profiling.token_matches(supplied):
+        raise HTTPException(status_code=401, detail="Admin token required", headers={"WWW-Authenticate": "Bearer"})
+
+
+def _stored_profile(profile_id: str) -> dict:
+    record = profiling.STORE.get(profile_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"No profile {profile_id!r} (only the last {profiling.STORE.size} are kept)")
+    return record
+
+
+@app.get("/admin/profiles")
+def list_profiles(request: Request):
+    _require_admin(request)
+    return {**profiling.stats(), "profiles": profiling.STORE.list()}
+
+
+@app.get("/admin/profiles/{profile_id}.pstats")
+def download_pstats(profile_id: str, request: Request):
+    _require_admin(request)
+    return Response(
+        content=_stored_profile(profile_id)["pstats"],
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.pstats"'},
+    )
+
+
+@app.get("/admin/profiles/{profile_id}.collapsed")
+def download_collapsed(profile_id: str, request: Request):
+    _require_admin(request)
+    return Response(
+        content=_stored_profile(profile_id)["collapsed"],
+        media_type="text/plain; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.collapsed.txt"'},
+    )
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+@app.get("/clusters/plot.png")
+async def cluster_plot(request: Request):
+    """PCA scatter of the training years coloured by cluster, rendered off the request path."""
+    fitted = await run_in_threadpool(serving.MODEL_REGISTRY.get)
+    target = await run_in_threadpool(cluster_plots.target_for, fitted)
+    headers = {"ETag": target.etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), target.etag):
+        return Response(status_code=304, headers=headers)
+    png = cluster_plots.PLOTS.get(target.key)
+    if png is None:
+        future = asyncio.wrap_future(cluster_plots.PLOTS.submit(target))
+        try:
+            png = await asyncio.wait_for(asyncio.shield(future), cluster_plots.WAIT_SECONDS)
+        except asyncio.TimeoutError:
+            return Response(status_code=202, content="Cluster plot is rendering, retry shortly", headers={"Retry-After": "1"})
+    return Response(content=png, media_type="image/png", headers=headers)
+
+
+@app.get("/clusters/plot/stats")
+def cluster_plot_stats():
+    return cluster_plots.PLOTS.stats()
+
+
+@app.get("/metrics")
+def metrics_endpoint():
+    if not metrics.ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (METRICS_ENABLED=0)")
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 async def _keep_awake_loop():
     if not SELF_PING_URL:
         return
@@ -78,6 +640,26 @@ async def _keep_awake_loop():
             await asyncio.sleep(KEEP_ALIVE_SECONDS)
 
 
+@app.on_event("startup")
+async def _warm_model():
+    # Registered here, not at import, so spawned prediction workers never render plots.
+    cluster_plots.listen()
+    model = await asyncio.to_thread(serving.MODEL_REGISTRY.warm)
+    await asyncio.to_thread(region_store.get_store)
+    print(f"[Model] Ready from {model.source} in {model.fit_seconds:.3f}s (inertia={model.inertia:.2f}, data={model.data_hash[:12]})")
+
+
+@app.on_event("startup")
+async def _start_executor():
+    await asyncio.to_thread(EXECUTOR.start)
+    print(f"[Executor] mode={EXECUTOR.mode} workers={EXECUTOR.workers} max_queue={EXECUTOR.max_queue}")
+
+
+@app.on_event("shutdown")
+async def _stop_executor():
+    await asyncio.to_thread(EXECUTOR.shutdown)
+
+
 @app.on_event("startup")
 async def _start_keep_awake():
     global _keep_alive_task
@@ -0,0 +1,96 @@
+"""Columnar featureFormatFrame vs. the dictionary-based featureFormat.
+
+Checks that both produce bit-identical matrices (on the real dataset and on
+a synthetic sample) and times each on a large synthetic rainfall table.
+
+Run from the ml-service directory:
+    python benchmarks/bench_feature_format.py --rows 1000000
+"""
+
+from __future__ import annotations
+import argparse
+import sys
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import k_means_v3  # noqa: E402
+from feature_format import featureFormat, featureFormatFrame  # noqa: E402
+
+FLAG_SETS = (
+    dict(remove_NaN=True, remove_all_zeroes=False),
+    dict(remove_NaN=True, remove_all_zeroes=True),
+    dict(remove_NaN=True, remove_any_zeroes=True),
+    dict(remove_NaN=False, remove_all_zeroes=True, sort_keys=True),
+)
+
+
+def make_table(n: int, seed: int = 0) -> pd.DataFrame:
+    """Synthetic cleaned table: unique years, some NaN and some all-zero rows."""
+    rng = np.random.default_rng(seed)
+    values = rng.gamma(2.0, 40.0, (n, len(k_means_v3.MONTH_ORDER)))
+    values[rng.random(values.shape) < 0.02] = np.nan
+    values[rng.random(values.shape) < 0.05] = 0.0
+    values[rng.random(n) < 0.01] = 0.0
+    df = pd.DataFrame(values, columns=k_means_v3.MONTH_ORDER)
+    df.insert(0, "Year", np.arange(n) + 1000)
+    return df
+
+
+def check_identical(df: pd.DataFrame, label: str) -> None:
+    data_dict, month_cols = k_means_v3.dataframe_to_feature_dict(df)
+    frame, _ = k_means_v3.dataframe_to_feature_frame(df)
+    for flags in FLAG_SETS:
+        expected = featureFormat(data_dict, month_cols, **flags)
+        actual = featureFormatFrame(frame, month_cols, **flags)
+        if expected.shape != actual.shape or expected.tobytes() != actual.tobytes():
+            raise SystemExit(f"Mismatch on {label} with {flags}: {expected.shape} vs {actual.shape}")
+    print(f"Identical output on {label} ({len(df):,} rows, {len(FLAG_SETS)} flag sets)")
+
+
+def time_call(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = perf_counter()
+        fn()
+        best = min(best, perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark featureFormatFrame against featureFormat")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--legacy-rows", type=int, default=100_000, help="Rows timed through the dictionary path")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    check_identical(k_means_v3.load_and_clean(k_means_v3.DATA_PATH), "Bengaluru dataset")
+    df = make_table(args.rows)
+    n_legacy = min(args.legacy_rows, args.rows)
+    check_identical(df.iloc[:n_legacy], "synthetic sample")
+
+    month_cols = list(k_means_v3.MONTH_ORDER)
+    flags = FLAG_SETS[0]
+
+    def columnar():
+        frame, _ = k_means_v3.dataframe_to_feature_frame(df)
+        return featureFormatFrame(frame, month_cols, **flags)
+
+    sample = df.iloc[:n_legacy]
+
+    def legacy():
+        data_dict, _ = k_means_v3.dataframe_to_feature_dict(sample)
+        return featureFormat(data_dict, month_cols, **flags)
+
+    columnar_s = time_call(columnar, args.repeat)
+    legacy_s = time_call(legacy, 1)
+    print(f"Columnar path, {args.rows:,} rows (best of {args.repeat}): {columnar_s:.3f} s -> {args.rows / columnar_s:,.0f} rows/s")
+    print(f"Dictionary path, {n_legacy:,} rows: {legacy_s:.3f} s -> {n_legacy / legacy_s:,.0f} rows/s")
+    print(f"Speed-up (per row): {(legacy_s / n_legacy) / (columnar_s / args.rows):,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
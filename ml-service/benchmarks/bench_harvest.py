@@ -0,0 +1,65 @@
+"""Throughput of the vectorized harvest engine vs. the scalar loop.
+
+Run from the ml-service directory:
+    python benchmarks/bench_harvest.py --sites 1000000
+"""
+
+from __future__ import annotations
+import argparse
+import sys
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import k_means_v3  # noqa: E402
+
+
+def make_sites(n: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    names = np.array(list(k_means_v3.ROOF_TYPES) + ["Other"], dtype=object)
+    return {
+        "roof_area": rng.uniform(20, 500, n),
+        "roof_type": names[rng.integers(0, len(names), n)],
+        "rainfall": rng.uniform(400, 2500, n),
+        "roof_slope": rng.uniform(0, 40, n),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark predict_harvest_array")
+    parser.add_argument("--sites", type=int, default=1_000_000)
+    parser.add_argument("--scalar-sample", type=int, default=20_000, help="Sites timed through the scalar wrapper")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sites = make_sites(args.sites)
+    k_means_v3.MODEL_REGISTRY.warm()
+
+    t0 = perf_counter()
+    codes = k_means_v3.encode_roof_types(sites["roof_type"])
+    encode_s = perf_counter() - t0
+
+    best = float("inf")
+    for _ in range(args.repeat):
+        t0 = perf_counter()
+        k_means_v3.predict_harvest_array(sites["roof_area"], codes, sites["rainfall"], sites["roof_slope"])
+        best = min(best, perf_counter() - t0)
+
+    n_scalar = min(args.scalar_sample, args.sites)
+    t0 = perf_counter()
+    for i in range(n_scalar):
+        k_means_v3.predict_harvest(
+            sites["roof_area"][i], sites["roof_type"][i], "loam", sites["rainfall"][i], sites["roof_slope"][i]
+        )
+    scalar_s = perf_counter() - t0
+
+    print(f"Sites: {args.sites:,}")
+    print(f"Encode roof types: {encode_s:.3f} s")
+    print(f"Vectorized engine (best of {args.repeat}): {best:.3f} s -> {args.sites / best:,.0f} sites/s")
+    print(f"Scalar wrapper ({n_scalar:,} sites): {scalar_s:.3f} s -> {n_scalar / scalar_s:,.0f} sites/s")
+
+
+if __name__ == "__main__":
+    main()
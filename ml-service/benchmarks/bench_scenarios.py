@@ -0,0 +1,87 @@
+"""Monte Carlo rainfall scenarios: throughput, memory bound and reproducibility.
+
+Runs scenarios.simulate_scenarios for a batch of sites under two chunk
+sizes. It checks that the percentiles are identical, so chunking does not
+change results, and that two runs with the same seed agree. It reports
+scenario throughput and the peak traced allocation of the default,
+memory-bounded chunking.
+
+Run from the ml-service directory:
+    python benchmarks/bench_scenarios.py --sites 100 --scenarios 5000
+"""
+
+from __future__ import annotations
+import argparse
+import sys
+import tracemalloc
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import scenarios  # noqa: E402
+import water_balance  # noqa: E402
+
+
+def make_sites(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    roof_area = rng.uniform(30.0, 400.0, n)
+    efficiency = rng.uniform(0.6, 0.9, n)
+    daily_demand = rng.integers(1, 9, n) * water_balance.DEFAULT_PER_CAPITA_LPD
+    tank_volume = rng.uniform(1_000.0, 40_000.0, n)
+    return roof_area, efficiency, daily_demand, tank_volume
+
+
+def same(a: dict, b: dict) -> bool:
+    return all(
+        np.array_equal(a[name][label], b[name][label])
+        for name in ("potential_harvest",) + scenarios.TANK_METRICS
+        for label in a[name]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the seeded rainfall scenario engine")
+    parser.add_argument("--sites", type=int, default=100)
+    parser.add_argument("--scenarios", type=int, default=5000)
+    parser.add_argument("--horizon-years", type=int, default=scenarios.DEFAULT_HORIZON_YEARS)
+    parser.add_argument("--max-chunk-mb", type=float, default=16.0)
+    args = parser.parse_args()
+
+    _, rain = water_balance.monthly_series()
+    sites = make_sites(args.sites)
+    options = dict(n_scenarios=args.scenarios, horizon_years=args.horizon_years, seed=11)
+
+    tracemalloc.start()
+    t0 = perf_counter()
+    bounded = scenarios.simulate_scenarios(*sites, rain, max_chunk_bytes=int(args.max_chunk_mb * 1024 * 1024), **options)
+    elapsed = perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    small = scenarios.simulate_scenarios(*sites, rain, chunk_scenarios=7, **options)
+    again = scenarios.simulate_scenarios(*sites, rain, max_chunk_bytes=int(args.max_chunk_mb * 1024 * 1024), **options)
+    if not same(bounded, small):
+        raise SystemExit("Chunk size changed the results")
+    if not same(bounded, again):
+        raise SystemExit("Same seed gave different results")
+    print("Identical percentiles across chunk sizes and repeated runs with the same seed")
+
+    cells = args.sites * args.scenarios
+    months = cells * args.horizon_years * 12
+    kept_mb = cells * len(scenarios.TANK_METRICS) * 8 / 1e6
+    print(
+        f"{args.sites:,} sites x {args.scenarios:,} scenarios x {args.horizon_years} years: {elapsed:.3f} s "
+        f"({cells / elapsed:,.0f} site-scenarios/s, {months / elapsed:,.0f} site-months/s)"
+    )
+    print(
+        f"{bounded['chunk_scenarios']:,} scenarios per chunk under {args.max_chunk_mb:g} MB; "
+        f"peak traced memory {peak / 1e6:.1f} MB (of which {kept_mb:.1f} MB per-scenario results)"
+    )
+    p50 = bounded["reliability"]["p50"]
+    print(f"Median site P50 reliability {np.median(p50):.1%}; P10-P90 spread {np.median(bounded['reliability']['p90'] - bounded['reliability']['p10']):.1%}")
+
+
+if __name__ == "__main__":
+    main()
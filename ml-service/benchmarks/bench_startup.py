@@ -0,0 +1,85 @@
+"""Cold-start budget for the serving path.
+
+Each measurement runs in a fresh interpreter: import the module, warm the
+model (loaded from the persisted artifact when present) and report wall
+time, peak RSS and whether any training/plotting dependencies were pulled
+in. Exits non-zero when a budget is exceeded, so it can gate CI.
+
+Run from the ml-service directory:
+    python benchmarks/bench_startup.py --max-import-seconds 1.0 --max-rss-mb 150
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ("pandas", "sklearn", "matplotlib", "scipy")
+
+PROBE = """
+import json, resource, sys
+from time import perf_counter
+t0 = perf_counter()
+import {module}
+import_s = perf_counter() - t0
+t0 = perf_counter()
+model = serving.MODEL_REGISTRY.warm() if {warm} else None
+warm_s = perf_counter() - t0
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    rss /= 1024
+print(json.dumps({{
+    "import_seconds": import_s,
+    "warm_seconds": warm_s,
+    "model_source": model.source if model else None,
+    "max_rss_mb": rss / 1024,
+    "heavy_modules": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def measure(module: str, warm: bool, runs: int) -> dict:
+    samples = []
+    for _ in range(runs):
+        code = PROBE.format(module=module if module == "serving" else f"{module}, serving", warm=warm, heavy=HEAVY_MODULES)
+        out = subprocess.run(
+            [sys.executable, "-c", code], cwd=SERVICE_DIR, capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+    best = min(samples, key=lambda s: s["import_seconds"])
+    best["max_rss_mb"] = max(s["max_rss_mb"] for s in samples)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold import time / RSS budget for the serving module")
+    parser.add_argument("--module", action="append", default=None, help="Module(s) to import (default: serving and app)")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per module; best import time is kept")
+    parser.add_argument("--max-import-seconds", type=float, default=1.0)
+    parser.add_argument("--max-rss-mb", type=float, default=150.0)
+    parser.add_argument("--no-warm", action="store_true", help="Only import; do not load the model")
+    args = parser.parse_args()
+
+    failures = []
+    for module in args.module or ["serving", "app"]:
+        result = measure(module, not args.no_warm, args.runs)
+        print(f"{module}: import {result['import_seconds']:.3f}s, warm {result['warm_seconds']:.3f}s "
+              f"(model from {result['model_source']}), peak RSS {result['max_rss_mb']:.1f} MB, "
+              f"heavy modules: {result['heavy_modules'] or 'none'}")
+        if result["import_seconds"] > args.max_import_seconds:
+            failures.append(f"{module}: import {result['import_seconds']:.3f}s > {args.max_import_seconds}s")
+        if result["max_rss_mb"] > args.max_rss_mb:
+            failures.append(f"{module}: RSS {result['max_rss_mb']:.1f} MB > {args.max_rss_mb} MB")
+        if result["heavy_modules"]:
+            failures.append(f"{module}: imported {', '.join(result['heavy_modules'])}")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Vectorized monthly tank simulation vs. a per-site, per-tank Python loop.
+
+Checks that water_balance.simulate_storage matches a straightforward scalar
+reference on a sample of sites (both operating rules), then times the full
+sites x tank sizes grid over the Bengaluru record and the reliability
+optimizer on the same sites.
+
+Run from the ml-service directory:
+    python benchmarks/bench_water_balance.py --sites 10000 --tanks 20
+"""
+
+from __future__ import annotations
+import argparse
+import sys
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import water_balance  # noqa: E402
+
+
+def make_sites(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    roof_area = rng.uniform(30.0, 400.0, n)
+    efficiency = rng.uniform(0.6, 0.9, n)
+    daily_demand = rng.integers(1, 9, n) * water_balance.DEFAULT_PER_CAPITA_LPD
+    return roof_area, efficiency, daily_demand
+
+
+def reference(roof_area, efficiency, daily_demand, volume, rain, rule):
+    storage = supplied = overflow = 0.0
+    met = 0
+    months = rain.reshape(-1)
+    for t, mm in enumerate(months):
+        demand = daily_demand * water_balance.DAYS_IN_MONTH[t % 12]
+        storage += mm * roof_area * efficiency
+        if rule == "yas":
+            spill = max(storage - volume, 0.0)
+            storage -= spill
+            overflow += spill
+        draw = min(storage, demand)
+        storage -= draw
+        supplied += draw
+        if rule == "ybs":
+            spill = max(storage - volume, 0.0)
+            storage -= spill
+            overflow += spill
+        met += demand - draw <= water_balance.DEFICIT_TOLERANCE_L
+    years = len(months) / 12
+    return met / len(months), supplied / years, overflow / years
+
+
+def check_reference(rain, n: int) -> None:
+    sites = make_sites(n, seed=1)
+    volumes = np.array([500.0, 5_000.0, 20_000.0, 80_000.0])
+    for rule in water_balance.OPERATING_RULES:
+        result = water_balance.simulate_storage(*sites, volumes, rain, rule=rule)
+        for i in range(n):
+            for j, volume in enumerate(volumes):
+                expected = reference(sites[0][i], sites[1][i], sites[2][i], volume, rain, rule)
+                actual = (result["reliability"][i, j], result["supplied_l"][i, j], result["overflow_l"][i, j])
+                if not np.allclose(expected, actual, rtol=1e-9, atol=1e-6):
+                    raise SystemExit(f"Mismatch ({rule}) at site {i}, tank {volume}: {expected} vs {actual}")
+    print(f"Matches the scalar reference on {n} sites x {len(volumes)} tanks ({', '.join(water_balance.OPERATING_RULES)})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized tank water-balance simulation")
+    parser.add_argument("--sites", type=int, default=10_000)
+    parser.add_argument("--tanks", type=int, default=20)
+    parser.add_argument("--check-sites", type=int, default=25, help="Sites checked against the scalar loop")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--optimize-sites", type=int, default=10_000, help="Sites sized by the reliability optimizer (0 to skip)")
+    parser.add_argument("--target", type=float, default=water_balance.DEFAULT_TARGET_RELIABILITY)
+    args = parser.parse_args()
+
+    years, rain = water_balance.monthly_series()
+    check_reference(rain, args.check_sites)
+
+    sites = make_sites(args.sites)
+    volumes = np.geomspace(500.0, 100_000.0, args.tanks)
+    best = float("inf")
+    for _ in range(args.repeat):
+        t0 = perf_counter()
+        result = water_balance.simulate_storage(*sites, volumes, rain)
+        best = min(best, perf_counter() - t0)
+    cells = args.sites * args.tanks
+    steps = cells * rain.size
+    print(f"{args.sites:,} sites x {args.tanks} tanks x {rain.size:,} months ({years[0]}-{years[-1]}), best of {args.repeat}: {best:.3f} s")
+    print(f"{steps / best:,.0f} site-tank-months/s; mean reliability {result['reliability'].mean():.1%}")
+
+    t0 = perf_counter()
+    for i in range(min(args.check_sites, args.sites)):
+        reference(sites[0][i], sites[1][i], sites[2][i], volumes[0], rain, "ybs")
+    per_cell = (perf_counter() - t0) / min(args.check_sites, args.sites)
+    print(f"Scalar loop: {per_cell * 1e3:.2f} ms per cell -> ~{per_cell * cells:,.0f} s for the grid ({per_cell * cells / best:,.0f}x slower)")
+
+    if args.optimize_sites:
+        opt_sites = tuple(a[:args.optimize_sites] for a in sites)
+        t0 = perf_counter()
+        sized = water_balance.optimize_tank_volume(*opt_sites, rain, target=args.target)
+        elapsed = perf_counter() - t0
+        feasible = sized["feasible"]
+        volumes = sized["tank_volume"][feasible]
+        below = water_balance.simulate_storage(
+            *(a[feasible] for a in opt_sites),
+            np.maximum(volumes - water_balance.DEFAULT_VOLUME_TOLERANCE_L, 0.0)[:, None], rain,
+        )["reliability"][:, 0]
+        if ((below >= args.target) & (volumes > 0)).any():
+            raise SystemExit("Optimizer returned a tank larger than needed")
+        print(
+            f"Optimizer, {args.optimize_sites:,} sites at {args.target:.0%} reliability: {elapsed:.3f} s in {sized['rounds']} rounds; "
+            f"{feasible.mean():.1%} feasible, median tank {np.median(volumes):,.0f} L"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""Async load generator for the ml-service API.
+
+By default the app is driven in-process through httpx's ASGI transport, with
+its startup and shutdown hooks run as under uvicorn. No server or network is
+needed, so the effect of PREDICTION_EXECUTION_MODE, worker counts or the
+result cache can be compared directly. With ``--url`` it targets a running
+server instead (e.g. ``uvicorn app:app --workers 2``).
+
+``--concurrency`` clients send requests back-to-back for ``--duration``
+seconds. Each request picks an endpoint from the weighted ``--mix``.
+``--distinct`` controls how many different payloads are sent: a small
+number mostly hits the result cache, and 0 makes every payload unique. A
+``--warmup`` period is run first and not counted. The report gives
+throughput, p50/p95/p99/max latency overall and per endpoint, error rates
+by status, and the service's executor and cache counters.
+
+Run from the ml-service directory:
+    python benchmarks/loadgen.py --concurrency 32 --duration 10
+    python benchmarks/loadgen.py --execution-mode process --workers 2 --distinct 0
+    python benchmarks/loadgen.py --url http://127.0.0.1:8000 --mix predict=1
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+from pathlib import Path
+from time import perf_counter
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+ENDPOINTS = {
+    "predict": ("POST", "/predict"),
+    "calculate": ("POST", "/calculate"),
+    "health": ("GET", "/health"),
+}
+ROOF_TYPES = ("RCC", "Tile", "Corrugated", "Metal", "Thatch")
+SOIL_TYPES = ("loam", "sandy", "clay", "rocky")
+
+
+def parse_mix(text: str) -> Tuple[List[str], List[float]]:
+    names, weights = [], []
+    for part in text.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint {name!r}; expected one of {', '.join(ENDPOINTS)}")
+        names.append(name)
+        weights.append(float(weight or 1))
+    if sum(weights) <= 0:
+        raise argparse.ArgumentTypeError("The mix needs a positive weight")
+    return names, weights
+
+
+def payload(rng: random.Random, distinct: int, serial: int) -> dict:
+    # Payloads are drawn from ``distinct`` fixed variants, or made unique when distinct is 0.
+    variant = serial if distinct <= 0 else rng.randrange(distinct)
+    return {
+        "roof_area": 50.0 + (variant % 997) + variant // 997 * 1e-3,
+        "roof_type": ROOF_TYPES[variant % len(ROOF_TYPES)],
+        "soil_type": SOIL_TYPES[variant % len(SOIL_TYPES)],
+        "annual_rainfall": 935.8,
+    }
+
+
+@asynccontextmanager
+async def open_client(url: Optional[str], timeout: float) -> AsyncIterator[httpx.AsyncClient]:
+    if url:
+        async with httpx.AsyncClient(base_url=url.rstrip("/"), timeout=timeout) as client:
+            yield client
+        return
+    sys.path.insert(0, str(SERVICE_DIR))
+    import app as service
+
+    # ASGITransport does not send lifespan events, so run the startup/shutdown hooks here.
+    async with service.app.router.lifespan_context(service.app):
+        transport = httpx.ASGITransport(app=service.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadgen", timeout=timeout) as client:
+            yield client
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+
+    def add(self, endpoint: str, seconds: float, status: str) -> None:
+        self.latencies[endpoint].append(seconds)
+        self.statuses[endpoint][status] += 1
+
+
+async def _client_loop(client, names, weights, args, deadline: float, recorder: Optional[Recorder], seed: int, serials) -> None:
+    rng = random.Random(seed)
+    while perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        method, path = ENDPOINTS[name]
+        body = payload(rng, args.distinct, next(serials)) if method == "POST" else None
+        t0 = perf_counter()
+        try:
+            response = await client.request(method, path, json=body)
+            status = str(response.status_code)
+        except httpx.HTTPError as exc:
+            status = type(exc).__name__
+        if recorder is not None:
+            recorder.add(name, perf_counter() - t0, status)
+
+
+async def _drive(client, names, weights, args, seconds: float, recorder: Optional[Recorder], serials) -> float:
+    t0 = perf_counter()
+    deadline = t0 + seconds
+    await asyncio.gather(*(
+        _client_loop(client, names, weights, args, deadline, recorder, args.seed * 100_003 + i, serials)
+        for i in range(args.concurrency)
+    ))
+    return perf_counter() - t0
+
+
+def summarize(recorder: Recorder, elapsed: float) -> dict:
+    def stats(latencies: List[float], statuses: Counter) -> dict:
+        values = np.array(latencies) * 1e3
+        total = int(sum(statuses.values()))
+        errors = total - sum(n for s, n in statuses.items() if s.isdigit() and 200 <= int(s) < 300)
+        p50, p95, p99 = np.percentile(values, [50, 95, 99]) if len(values) else (float("nan"),) * 3
+        return {
+            "requests": total,
+            "throughput_rps": total / elapsed,
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "max_ms": float(values.max()) if len(values) else float("nan"),
+            "error_rate": errors / total if total else 0.0,
+            "statuses": dict(statuses),
+        }
+
+    every = [x for values in recorder.latencies.values() for x in values]
+    overall = Counter()
+    for counts in recorder.statuses.values():
+        overall.update(counts)
+    return {
+        "elapsed_seconds": elapsed,
+        "overall": stats(every, overall),
+        "endpoints": {name: stats(recorder.latencies[name], recorder.statuses[name]) for name in sorted(recorder.latencies)},
+    }
+
+
+async def service_counters(client) -> dict:
+    counters = {}
+    for name in ("executor", "cache"):
+        try:
+            response = await client.get(f"/{name}/stats")
+            if response.status_code == 200:
+                counters[name] = response.json()
+        except httpx.HTTPError:
+            pass
+    return counters
+
+
+def format_report(report: dict) -> str:
+    lines = [f"{'endpoint':<10}  {'requests':>9}  {'req/s':>9}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}  {'max ms':>8}  {'errors':>7}"]
+    rows = list(report["endpoints"].items()) + [("overall", report["overall"])]
+    for name, s in rows:
+        lines.append(
+            f"{name:<10}  {s['requests']:>9,}  {s['throughput_rps']:>9,.1f}  {s['p50_ms']:>8.2f}  {s['p95_ms']:>8.2f}  "
+            f"{s['p99_ms']:>8.2f}  {s['max_ms']:>8.2f}  {s['error_rate']:>7.2%}"
+        )
+    failures = {s: n for s, n in report["overall"]["statuses"].items() if not (s.isdigit() and 200 <= int(s) < 300)}
+    if failures:
+        lines.append("Non-2xx / failed requests: " + ", ".join(f"{s}: {n}" for s, n in sorted(failures.items())))
+    return "\n".join(lines)
+
+
+async def main_async(args) -> dict:
+    names, weights = args.mix
+    serials = iter(range(10**12))
+    async with open_client(args.url, args.timeout) as client:
+        if args.warmup > 0:
+            await _drive(client, names, weights, args, args.warmup, None, serials)
+        recorder = Recorder()
+        elapsed = await _drive(client, names, weights, args, args.duration, recorder, serials)
+        report = summarize(recorder, elapsed)
+        report["service"] = await service_counters(client)
+    report["config"] = {
+        "target": args.url or "in-process",
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "mix": dict(zip(names, weights)),
+        "distinct": args.distinct,
+        "seed": args.seed,
+        "execution_mode": os.environ.get("PREDICTION_EXECUTION_MODE", "thread") if not args.url else None,
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the ml-service API in-process or against a server")
+    parser.add_argument("--url", default=None, help="Base URL of a running server; omit to drive app.py in-process")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=1.0, help="Unmeasured seconds before the run")
+    parser.add_argument("--mix", type=parse_mix, default="predict=8,calculate=1,health=1", help="Weighted endpoints, e.g. predict=8,calculate=1,health=1")
+    parser.add_argument("--distinct", type=int, default=100, help="Distinct payloads (0 = every payload unique, defeating the result cache)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--execution-mode", choices=("thread", "process"), default=None, help="In-process only: sets PREDICTION_EXECUTION_MODE")
+    parser.add_argument("--workers", type=int, default=None, help="In-process only: sets PREDICTION_WORKERS")
+    parser.add_argument("--no-result-cache", action="store_true", help="In-process only: sets RESULT_CACHE_SIZE=0")
+    parser.add_argument("--json", type=Path, default=None, help="Also write the report to this JSON file")
+    args = parser.parse_args()
+    if args.concurrency < 1 or args.duration <= 0:
+        parser.error("--concurrency and --duration must be positive")
+    if args.url and (args.execution_mode or args.workers or args.no_result_cache):
+        parser.error("--execution-mode, --workers and --no-result-cache only apply in-process")
+    # The app reads these at import time, which happens in open_client.
+    if args.execution_mode:
+        os.environ["PREDICTION_EXECUTION_MODE"] = args.execution_mode
+    if args.workers:
+        os.environ["PREDICTION_WORKERS"] = str(args.workers)
+    if args.no_result_cache:
+        os.environ["RESULT_CACHE_SIZE"] = "0"
+
+    report = asyncio.run(main_async(args))
+    print(f"Target: {report['config']['target']}; {args.concurrency} clients for {report['elapsed_seconds']:.1f}s")
+    print(format_report(report))
+    cache = report["service"].get("cache")
+    if cache:
+        print("Result cache: " + ", ".join(f"{k}={v}" for k, v in cache.items() if not isinstance(v, dict)))
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""Benchmark suite for the ml-service hot paths, with regression gates.
+
+``run`` times, on synthetic rainfall tables scaled from the 111-row
+Bengaluru layout up to millions of rows:
+
+* ``load_and_clean``: the CSV path, plus a warm Arrow cache;
+* ``dataframe_to_feature_dict`` + ``featureFormat``, and the columnar
+  ``featureFormatFrame`` path;
+* ``run_kmeans`` for several k (fit cache bypassed);
+* ``predict_harvest`` (per call) and ``predict_harvest_batch``;
+* end-to-end ``POST /predict`` through FastAPI's in-process TestClient,
+  both result-cache misses and hits.
+
+Each metric keeps the best and median wall time of ``--repeat`` runs. Results
+and environment details are written to JSON. ``compare`` exits non-zero when
+any metric's best time regressed by more than ``--threshold`` against a
+baseline file.
+
+Run from the ml-service directory:
+    python benchmarks/suite.py run --output bench.json
+    python benchmarks/suite.py run --sizes 111,10000,1000000 --output bench-large.json
+    python benchmarks/suite.py compare baseline.json bench.json --threshold 0.25
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from statistics import median
+from time import perf_counter
+from typing import Callable, Dict, List
+
+import numpy as np
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SERVICE_DIR))
+import k_means_v3  # noqa: E402
+from feature_format import featureFormat, featureFormatFrame  # noqa: E402
+
+FORMAT_VERSION = 1
+DEFAULT_SIZES = (111, 10_000, 100_000)
+DEFAULT_KS = (2, 3, 5, 8)
+
+
+def write_rainfall_csv(path: Path, rows: int, seed: int = 0) -> None:
+    """Synthetic table in the Bengaluru CSV layout: the real years resampled with noise."""
+    real = k_means_v3.load_and_clean(k_means_v3.DATA_PATH, use_cache=False)[k_means_v3.MONTH_ORDER].to_numpy()
+    rng = np.random.default_rng(seed)
+    values = real[rng.integers(0, len(real), rows)] * rng.uniform(0.8, 1.2, (rows, 12))
+    values[rng.random(values.shape) < 0.01] = np.nan
+    with open(path, "w", encoding="utf-8", newline="") as fh:
+        fh.write(",".join(f'"{c}"' for c in ["Month /Year"] + k_means_v3.MONTH_ORDER + [""]) + "\n")
+        for i, row in enumerate(values):
+            cells = ["" if np.isnan(v) else f"{v:.1f}" for v in row]
+            fh.write(",".join(f'"{c}"' for c in [str(1000 + i)] + cells + [""]) + "\n")
+
+
+def measure(fn: Callable[[], object], repeat: int, calls: int = 1) -> dict:
+    """Best and median seconds per call over ``repeat`` rounds of ``calls`` calls."""
+    samples = []
+    for _ in range(repeat):
+        t0 = perf_counter()
+        for _ in range(calls):
+            fn()
+        samples.append((perf_counter() - t0) / calls)
+    return {"seconds": min(samples), "median_seconds": median(samples), "repeat": repeat, "calls": calls}
+
+
+def bench_tables(sizes, ks, repeat: int, legacy_max_rows: int, kmeans_max_rows: int, workdir: Path) -> Dict[str, dict]:
+    results: Dict[str, dict] = {}
+    for rows in sizes:
+        path = workdir / f"rainfall_{rows}.csv"
+        write_rainfall_csv(path, rows)
+        results[f"load_and_clean/{rows}"] = {"rows": rows, **measure(lambda: k_means_v3.load_and_clean(path, use_cache=False), repeat)}
+        k_means_v3.load_and_clean(path)  # populate the Arrow cache
+        results[f"load_and_clean_cached/{rows}"] = {"rows": rows, **measure(lambda: k_means_v3.load_and_clean(path), repeat)}
+
+        df = k_means_v3.load_and_clean(path)
+        month_cols = list(k_means_v3.MONTH_ORDER)
+        if rows <= legacy_max_rows:
+            def legacy():
+                data_dict, cols = k_means_v3.dataframe_to_feature_dict(df)
+                return featureFormat(data_dict, cols, remove_NaN=True, remove_all_zeroes=False)
+            results[f"feature_format_dict/{rows}"] = {"rows": rows, **measure(legacy, repeat)}
+
+        def columnar():
+            frame, cols = k_means_v3.dataframe_to_feature_frame(df)
+            return featureFormatFrame(frame, cols, remove_NaN=True, remove_all_zeroes=False)
+        results[f"feature_format_frame/{rows}"] = {"rows": rows, **measure(columnar, repeat)}
+
+        if rows <= kmeans_max_rows:
+            X = columnar()
+            for k in ks:
+                if k <= len(X):
+                    results[f"run_kmeans/k{k}/{rows}"] = {
+                        "rows": rows, **measure(lambda: k_means_v3.run_kmeans(X, k=k, use_cache=False), repeat)
+                    }
+        print(f"[Bench] tables: {rows:,} rows done")
+    return results
+
+
+def bench_harvest(sizes, repeat: int, calls: int) -> Dict[str, dict]:
+    results: Dict[str, dict] = {}
+    k_means_v3.MODEL_REGISTRY.warm()
+    results["predict_harvest"] = {
+        "rows": 1, **measure(lambda: k_means_v3.predict_harvest(111.48, "RCC", "loam", 935.8), repeat, calls)
+    }
+    rng = np.random.default_rng(0)
+    names = list(k_means_v3.ROOF_TYPES)
+    for rows in sizes:
+        areas = rng.uniform(20, 500, rows)
+        roof_types = [names[i] for i in rng.integers(0, len(names), rows)]
+        rainfall = rng.uniform(400, 2500, rows)
+        results[f"predict_harvest_batch/{rows}"] = {
+            "rows": rows, **measure(lambda: k_means_v3.predict_harvest_batch(areas, roof_types, rainfall), repeat)
+        }
+    print("[Bench] harvest done")
+    return results
+
+
+def bench_api(repeat: int, requests: int) -> Dict[str, dict]:
+    from fastapi.testclient import TestClient
+
+    import app as service
+
+    results: Dict[str, dict] = {}
+    with TestClient(service.app) as client:
+        counter = iter(range(10**9))
+
+        def miss():
+            # A roof area never sent before, so the result cache cannot answer.
+            body = {"roof_area": 50 + next(counter) * 1e-3, "roof_type": "RCC", "soil_type": "loam", "annual_rainfall": 935.8}
+            response = client.post("/predict", json=body)
+            response.raise_for_status()
+
+        hit_body = {"roof_area": 111.48, "roof_type": "RCC", "soil_type": "loam", "annual_rainfall": 935.8}
+
+        def hit():
+            client.post("/predict", json=hit_body).raise_for_status()
+
+        hit()
+        results["api_predict"] = {"rows": 1, **measure(miss, repeat, requests)}
+        results["api_predict_cached"] = {"rows": 1, **measure(hit, repeat, requests)}
+    print("[Bench] api done")
+    return results
+
+
+def environment() -> dict:
+    import pandas
+    import sklearn
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SERVICE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pandas.__version__,
+        "sklearn": sklearn.__version__,
+    }
+
+
+def run(args) -> int:
+    sizes = sorted({int(s) for s in args.sizes.split(",") if s.strip()})
+    ks = sorted({int(k) for k in args.ks.split(",") if k.strip()})
+    suites: List[str] = args.only or ["tables", "harvest", "api"]
+    results: Dict[str, dict] = {}
+    t0 = perf_counter()
+    with tempfile.TemporaryDirectory(prefix="rainfall-bench-") as tmp:
+        if "tables" in suites:
+            results.update(bench_tables(sizes, ks, args.repeat, args.legacy_max_rows, args.kmeans_max_rows, Path(tmp)))
+    if "harvest" in suites:
+        results.update(bench_harvest(sizes, args.repeat, args.calls))
+    if "api" in suites:
+        results.update(bench_api(args.repeat, args.calls))
+    report = {"format": FORMAT_VERSION, "environment": environment(), "results": results}
+    args.output.write_text(json.dumps(report, indent=2, sort_keys=True))
+    print(format_results(results))
+    print(f"{len(results)} metrics in {perf_counter() - t0:.1f}s -> {args.output}")
+    return 0
+
+
+def format_results(results: Dict[str, dict]) -> str:
+    lines = [f"{'metric':<34}  {'best':>11}  {'median':>11}  {'rows/s':>14}"]
+    for name in sorted(results):
+        r = results[name]
+        rate = r["rows"] / r["seconds"] if r["seconds"] > 0 else float("inf")
+        lines.append(f"{name:<34}  {r['seconds'] * 1e3:>9.3f}ms  {r['median_seconds'] * 1e3:>9.3f}ms  {rate:>14,.0f}")
+    return "\n".join(lines)
+
+
+def compare(args) -> int:
+    baseline = json.loads(args.baseline.read_text())["results"]
+    current = json.loads(args.current.read_text())["results"]
+    regressions = []
+    lines = [f"{'metric':<34}  {'baseline':>11}  {'current':>11}  {'change':>8}"]
+    for name in sorted(set(baseline) | set(current)):
+        if name not in baseline or name not in current:
+            lines.append(f"{name:<34}  {'only in ' + ('baseline' if name in baseline else 'current'):>33}")
+            continue
+        before, after = baseline[name]["seconds"], current[name]["seconds"]
+        change = after / before - 1.0 if before > 0 else 0.0
+        # Sub-noise differences never fail the gate, however large in relative terms.
+        regressed = change > args.threshold and after - before > args.min_seconds
+        if regressed:
+            regressions.append(name)
+        marker = "  REGRESSED" if regressed else ""
+        lines.append(f"{name:<34}  {before * 1e3:>9.3f}ms  {after * 1e3:>9.3f}ms  {change:>+7.1%}{marker}")
+    print("\n".join(lines))
+    if regressions:
+        print(f"{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    print(f"No metric regressed by more than {args.threshold:.0%}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ml-service benchmark suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmarks and write JSON results")
+    run_parser.add_argument("--output", type=Path, default=Path("bench-results.json"))
+    run_parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="Comma-separated synthetic table sizes (rows)")
+    run_parser.add_argument("--ks", default=",".join(map(str, DEFAULT_KS)), help="Comma-separated k values for run_kmeans")
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--calls", type=int, default=200, help="Calls per round for per-call metrics (predict_harvest, /predict)")
+    run_parser.add_argument("--legacy-max-rows", type=int, default=100_000, help="Largest table timed through the dictionary featureFormat path")
+    run_parser.add_argument("--kmeans-max-rows", type=int, default=100_000, help="Largest table timed through run_kmeans")
+    run_parser.add_argument("--only", action="append", choices=("tables", "harvest", "api"), help="Run only these groups")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare", help="Fail when a metric regressed against a baseline")
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("current", type=Path)
+    compare_parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative slowdown of the best time (0.25 = 25%%)")
+    compare_parser.add_argument("--min-seconds", type=float, default=0.0005, help="Ignore slowdowns smaller than this many seconds")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""Streaming bulk scoring: CSV or NDJSON rows in, NDJSON results out.
+
+Rows are parsed from the request body as it arrives, scored in fixed-size
+chunks with ``serving.predict_harvest_array`` and emitted immediately, so
+memory stays bounded by the chunk size no matter how large the upload is.
+CSV input must have a header row and may not contain quoted newlines.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import math
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
+
+import numpy as np
+from starlette.responses import StreamingResponse
+
+import serving
+
+REQUIRED_FIELDS = ("roof_area", "roof_type", "soil_type")
+# Each row needs one of these: an explicit rainfall, or a region whose mean is used.
+RAINFALL_FIELDS = ("annual_rainfall", "region")
+NUMERIC_FIELDS = ("roof_area", "annual_rainfall")
+OPTIONAL_NUMERIC_FIELDS = ("roof_slope", "catchment_eff")
+DEFAULT_ROOF_SLOPE = 5.0
+MAX_LINE_BYTES = 64 * 1024
+
+CSV_CONTENT_TYPES = ("text/csv", "application/csv")
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/json-lines")
+
+
+class StreamFormatError(ValueError):
+    pass
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """StreamingResponse whose body generator may keep reading the request body.
+
+    The stock response listens for ``http.disconnect`` on ``receive`` while
+    streaming, which steals the request body messages the generator needs.
+    Here a disconnect surfaces through ``request.stream()`` instead.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+def detect_format(content_type: Optional[str], explicit: Optional[str] = None) -> str:
+    if explicit:
+        fmt = explicit.strip().lower()
+        if fmt not in ("csv", "ndjson"):
+            raise StreamFormatError(f"Unsupported format {explicit!r}; use 'csv' or 'ndjson'")
+        return fmt
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in CSV_CONTENT_TYPES:
+        return "csv"
+    if media_type in NDJSON_CONTENT_TYPES:
+        return "ndjson"
+    raise StreamFormatError(f"Unsupported content type {content_type!r}; send text/csv or application/x-ndjson")
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[List[str]]:
+    """Split a byte stream into batches of decoded, non-empty lines (one batch per body chunk)."""
+    buffer = b""
+    first = True
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        if len(buffer) > MAX_LINE_BYTES:
+            raise StreamFormatError(f"Line exceeds {MAX_LINE_BYTES} bytes")
+        if not lines:
+            continue
+        text = b"\n".join(lines).decode("utf-8-sig" if first else "utf-8")
+        first = False
+        batch = [line.rstrip("\r") for line in text.split("\n") if line.strip()]
+        if batch:
+            yield batch
+    if buffer.strip():
+        yield [buffer.decode("utf-8-sig" if first else "utf-8").rstrip("\r")]
+
+
+async def iter_records(batches: AsyncIterator[List[str]], fmt: str) -> AsyncIterator[List[Tuple[Optional[dict], Optional[str]]]]:
+    """Yield batches of ``(record, error)`` per input row; exactly one of the two is set."""
+    header: Optional[List[str]] = None
+    async for lines in batches:
+        parsed: List[Tuple[Optional[dict], Optional[str]]] = []
+        if fmt == "ndjson":
+            for line in lines:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as exc:
+                    parsed.append((None, f"invalid JSON: {exc.msg}"))
+                    continue
+                if not isinstance(record, dict):
+                    parsed.append((None, "row must be a JSON object"))
+                    continue
+                parsed.append((record, None))
+        else:
+            for values in csv.reader(lines):
+                if header is None:
+                    header = [h.strip() for h in values]
+                    missing = [f for f in REQUIRED_FIELDS if f not in header]
+                    if not any(f in header for f in RAINFALL_FIELDS):
+                        missing.append(" or ".join(RAINFALL_FIELDS))
+                    if missing:
+                        raise StreamFormatError(f"CSV header is missing columns: {', '.join(missing)}")
+                    continue
+                if len(values) != len(header):
+                    parsed.append((None, f"expected {len(header)} columns, got {len(values)}"))
+                    continue
+                parsed.append((dict(zip(header, values)), None))
+        if parsed:
+            yield parsed
+
+
+def _parse_number(value, field: str, required: bool) -> float:
+    if value is None or (isinstance(value, str) and not value.strip()):
+        if required:
+            raise ValueError(f"{field} is required")
+        return math.nan
+    if isinstance(value, bool):
+        raise ValueError(f"{field} must be a number")
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be a number") from None
+    # nan/inf (and overflowing literals such as 1e400) parse as floats but are not valid JSON out.
+    if not math.isfinite(number):
+        raise ValueError(f"{field} must be a finite number")
+    return number
+
+
+def score_chunk(rows: List[Tuple[int, Optional[dict], Optional[str]]]) -> Tuple[List[str], int]:
+    """Validate and score one chunk; return NDJSON lines (in input order) and the failure count."""
+    n = len(rows)
+    roof_area = np.full(n, np.nan)
+    rainfall = np.full(n, np.nan)
+    roof_slope = np.full(n, DEFAULT_ROOF_SLOPE)
+    catchment_eff = np.full(n, np.nan)
+    roof_types: List[str] = [""] * n
+    # Canonical region for rows whose rainfall came from it (echoed like /predict/batch).
+    regions: List[Optional[str]] = [None] * n
+    errors: List[Optional[str]] = [None] * n
+    for pos, (_, record, error) in enumerate(rows):
+        if error is not None:
+            errors[pos] = error
+            continue
+        try:
+            for field in ("roof_type", "soil_type"):
+                if not isinstance(record.get(field), str) or not record[field].strip():
+                    raise ValueError(f"{field} is required")
+            roof_area[pos] = _parse_number(record.get("roof_area"), "roof_area", True)
+            region = record.get("region")
+            has_region = isinstance(region, str) and bool(region.strip())
+            rainfall[pos] = _parse_number(record.get("annual_rainfall"), "annual_rainfall", not has_region)
+            if math.isnan(rainfall[pos]):
+                rainfall[pos], regions[pos] = serving.resolve_rainfall(None, region)
+            slope = _parse_number(record.get("roof_slope"), "roof_slope", False)
+            roof_slope[pos] = DEFAULT_ROOF_SLOPE if math.isnan(slope) else slope
+            catchment_eff[pos] = _parse_number(record.get("catchment_eff"), "catchment_eff", False)
+            roof_types[pos] = record["roof_type"]
+        except ValueError as exc:
+            errors[pos] = str(exc)
+
+    result = serving.predict_harvest_array(
+        roof_area, serving.encode_roof_types(roof_types), rainfall, roof_slope, catchment_eff
+    )
+    resolved = rainfall.tolist()
+    harvest = result["potential_harvest"].tolist()
+    tank = result["tank_volume"].tolist()
+    efficiency = result["efficiency"].tolist()
+
+    out: List[str] = []
+    failed = 0
+    for pos, (row_number, record, _) in enumerate(rows):
+        item: dict = {"row": row_number}
+        if record is not None and "id" in record:
+            item["id"] = record["id"]
+        if errors[pos] is not None:
+            failed += 1
+            item.update(ok=False, error=errors[pos])
+        else:
+            item.update(ok=True, potential_harvest=harvest[pos], tank_volume=tank[pos], efficiency=efficiency[pos])
+            if regions[pos] is not None:
+                item.update(region=regions[pos], annual_rainfall=resolved[pos])
+        try:
+            line = json.dumps(item, allow_nan=False)
+        except ValueError:
+            # Never emit NaN/Infinity (in a result or an echoed id): standard NDJSON clients cannot parse them.
+            failed += item["ok"]
+            line = json.dumps({"row": row_number, "ok": False, "error": "row contains a non-finite number"})
+        out.append(line)
+    return out, failed
+
+
+async def iter_chunks(batches: AsyncIterator[List[Tuple[Optional[dict], Optional[str]]]], chunk_size: int):
+    """Regroup parsed batches into numbered chunks of exactly ``chunk_size`` rows (last may be short)."""
+    chunk: List[Tuple[int, Optional[dict], Optional[str]]] = []
+    row_number = 0
+    async for batch in batches:
+        for record, error in batch:
+            chunk.append((row_number, record, error))
+            row_number += 1
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def ndjson(lines: Iterable[str]) -> bytes:
+    return ("\n".join(lines) + "\n").encode("utf-8")
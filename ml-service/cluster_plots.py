@@ -0,0 +1,162 @@
+"""Background-rendered, cached cluster plot for the API.
+
+The plot depends only on the dataset, k and the cluster labels, so it is
+keyed by the SHA-256 of ``(data hash, k, labels)`` and the key doubles as
+the HTTP ETag. Renders run on a single dedicated worker thread, never the
+request thread or the prediction executor. Concurrent requests for the same
+key share one render, and finished PNGs stay in a small LRU
+(``CLUSTER_PLOT_CACHE_SIZE``, default 4). Once ``listen`` has been called
+from the serving process's startup hook, a plot is scheduled whenever the
+model is warmed or refit, so dashboards usually find it ready.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+import plot_render
+import serving
+import water_balance
+
+CACHE_SIZE = int(os.environ.get("CLUSTER_PLOT_CACHE_SIZE", "4"))
+# Seconds a request waits for a render in progress before getting 202 + Retry-After.
+WAIT_SECONDS = float(os.environ.get("CLUSTER_PLOT_WAIT_SECONDS", "10"))
+# CLUSTER_PLOT_PRERENDER=0 renders on first request instead of after each (re)fit.
+PRERENDER = os.environ.get("CLUSTER_PLOT_PRERENDER", "1").strip().lower() not in ("0", "false", "no", "off")
+_listening = False
+_listening_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class PlotTarget:
+    key: str
+    X: np.ndarray
+    labels: np.ndarray
+    k: int
+    data_hash: str
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.key[:32]}"'
+
+
+def plot_key(data_hash: str, k: int, labels: np.ndarray) -> str:
+    digest = hashlib.sha256(f"{data_hash}:{k}:".encode())
+    digest.update(np.ascontiguousarray(labels, dtype=np.int64).tobytes())
+    return digest.hexdigest()
+
+
+_targets: Dict[Tuple[str, int], PlotTarget] = {}
+_targets_lock = threading.Lock()
+
+
+def target_for(fitted) -> PlotTarget:
+    """Features, labels and key for a registry model, memoized per data hash and model version."""
+    memo_key = (fitted.data_hash, fitted.version)
+    target = _targets.get(memo_key)
+    if target is None:
+        with _targets_lock:
+            target = _targets.get(memo_key)
+            if target is None:
+                # The imputed monthly matrix is the feature matrix the model was fitted on.
+                _, X = water_balance.load_monthly_rainfall(serving.DATA_PATH)
+                model = fitted.model
+                labels = model.predict(X)
+                target = PlotTarget(plot_key(fitted.data_hash, model.n_clusters, labels), X, labels, model.n_clusters, fitted.data_hash)
+                _targets.clear()
+                _targets[memo_key] = target
+    return target
+
+
+class PlotCache:
+    def __init__(self, maxsize: int = CACHE_SIZE):
+        self.maxsize = max(1, maxsize)
+        self._images: "OrderedDict[str, bytes]" = OrderedDict()
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cluster-plot")
+        self.hits = 0
+        self.renders = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            png = self._images.get(key)
+            if png is not None:
+                self._images.move_to_end(key)
+                self.hits += 1
+            return png
+
+    def submit(self, target: PlotTarget) -> Future:
+        """Future for the PNG of ``target``: already done if cached, shared if rendering."""
+        with self._lock:
+            png = self._images.get(target.key)
+            if png is not None:
+                done: Future = Future()
+                done.set_result(png)
+                return done
+            future = self._pending.get(target.key)
+            if future is None:
+                future = self._pending[target.key] = self._executor.submit(self._render, target)
+            return future
+
+    def _render(self, target: PlotTarget) -> bytes:
+        try:
+            png = plot_render.render_cluster_png(target.X, target.labels)
+        except BaseException:
+            with self._lock:
+                self._pending.pop(target.key, None)
+            raise
+        with self._lock:
+            # Publish and clear pending together so no caller sees neither.
+            self._pending.pop(target.key, None)
+            self._images[target.key] = png
+            self._images.move_to_end(target.key)
+            while len(self._images) > self.maxsize:
+                self._images.popitem(last=False)
+            self.renders += 1
+        return png
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._images),
+                "maxsize": self.maxsize,
+                "rendering": len(self._pending),
+                "hits": self.hits,
+                "renders": self.renders,
+            }
+
+
+PLOTS = PlotCache()
+
+
+def prerender(fitted) -> None:
+    """Schedule the plot for ``fitted`` (e.g. from a refit listener); does not wait."""
+    if not PRERENDER:
+        return
+    try:
+        PLOTS.submit(target_for(fitted))
+    except Exception as exc:  # noqa: BLE001 - never let plotting break a refit
+        print(f"[Plot] Could not schedule cluster plot: {exc}")
+
+
+def listen() -> None:
+    """Prerender on every model (re)fit; idempotent.
+
+    Called from the app's startup hook rather than at import, so prediction
+    worker processes, which import ``app`` under spawn/forkserver but never
+    run its startup hooks, do not render.
+    """
+    global _listening
+    with _listening_lock:
+        if not _listening:
+            serving.MODEL_REGISTRY.add_refit_listener(prerender)
+            _listening = True
@@ -0,0 +1,106 @@
+"""Execution back-ends for CPU-bound prediction work.
+
+``thread`` mode keeps the previous behaviour (FastAPI's threadpool), while
+``process`` mode runs work in a bounded ``ProcessPoolExecutor`` whose workers
+warm the clustering model when they start, so the GIL-heavy fit never
+competes with the event loop. Both modes apply admission control: once
+``workers + max_queue`` calls are pending, new calls are rejected with
+``Saturated`` instead of queueing without bound.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+EXECUTION_MODES = ("thread", "process")
+
+
+class Saturated(Exception):
+    """Raised when the executor already has its maximum number of pending calls."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Prediction executor saturated; retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+def _warm_worker() -> None:
+    import serving
+
+    serving.MODEL_REGISTRY.warm()
+
+
+def _noop() -> int:
+    return os.getpid()
+
+
+class PredictionExecutor:
+    def __init__(self, mode: str = "thread", workers: Optional[int] = None, max_queue: int = 64, retry_after: int = 1):
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode {mode!r}; expected one of {EXECUTION_MODES}")
+        self.mode = mode
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.max_queue = max(0, max_queue)
+        self.retry_after = retry_after
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+
+    @classmethod
+    def from_env(cls) -> "PredictionExecutor":
+        workers = os.environ.get("PREDICTION_WORKERS")
+        return cls(
+            mode=os.environ.get("PREDICTION_EXECUTION_MODE", "thread").strip().lower(),
+            workers=int(workers) if workers else None,
+            max_queue=int(os.environ.get("PREDICTION_MAX_QUEUE", "64")),
+            retry_after=int(os.environ.get("PREDICTION_RETRY_AFTER_SECONDS", "1")),
+        )
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.max_queue
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def start(self) -> None:
+        """Create the process pool and block until every worker is warm."""
+        if self.mode != "process" or self._pool is not None:
+            return
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker)
+        # Workers are spawned lazily; submitting one task per worker forces
+        # them all to start (and run the initializer) before traffic arrives.
+        for future in [self._pool.submit(_noop) for _ in range(self.workers)]:
+            future.result()
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn(*args)`` off the event loop, or raise ``Saturated``."""
+        # Only the event loop thread touches the counter, so no lock is needed.
+        if self._pending >= self.capacity:
+            raise Saturated(self.retry_after)
+        self._pending += 1
+        try:
+            if self._pool is not None:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._pool, fn, *args)
+            return await run_in_threadpool(fn, *args)
+        finally:
+            self._pending -= 1
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "pending": self._pending,
+            "capacity": self.capacity,
+        }
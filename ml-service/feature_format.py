@@ -102,6 +102,75 @@ def featureFormat( dictionary, features, remove_NaN=True, remove_all_zeroes=True
     return np.array(return_list)
 
 
+def featureFormatFrame( data, features, remove_NaN=True, remove_all_zeroes=True, remove_any_zeroes=False, sort_keys = False):
+    """ columnar featureFormat: same flags and bit-identical output, but
+        takes a pandas DataFrame (rows = data points, index = keys) or a
+        2-D array (columns already in `features` order, keys = row numbers)
+        and filters rows with boolean masks instead of a Python loop.
+        A DataFrame column holding the string 'NaN' is handled exactly like
+        the dictionary version (0.0 with remove_NaN, otherwise nan).
+    """
+
+    if isinstance(data, np.ndarray):
+        if data.ndim != 2 or data.shape[1] != len(features):
+            raise ValueError("expected a 2-D array with one column per feature")
+        keys = np.arange(data.shape[0])
+        if isinstance(sort_keys, str):
+            import joblib
+            keys = np.asarray(joblib.load(open(sort_keys, "rb")))
+        if data.dtype == object or data.dtype.kind in "US":
+            columns = [_column_to_float(data[keys, i], remove_NaN) for i in range(len(features))]
+            matrix = np.column_stack(columns) if columns else np.empty((len(keys), 0))
+        else:
+            matrix = np.asarray(data[keys], dtype=float)
+    else:
+        frame = data
+        if isinstance(sort_keys, str):
+            import joblib
+            frame = frame.loc[joblib.load(open(sort_keys, "rb"))]
+        elif sort_keys:
+            frame = frame.sort_index()
+        if len(frame) == 0:
+            return np.array([])
+        for feature in features:
+            if feature not in frame.columns:
+                print("Error: Key ", feature, " Not Present")
+                return
+        matrix = np.empty((len(frame), len(features)))
+        for i, feature in enumerate(features):
+            column = frame[feature].to_numpy()
+            if column.dtype == object:
+                matrix[:, i] = _column_to_float(column, remove_NaN)
+            else:
+                matrix[:, i] = column
+
+    if matrix.shape[0] == 0:
+        return np.array([])
+
+    # exclude 'poi' class as criteria.
+    test = matrix[:, 1:] if features[0] == 'poi' else matrix
+    keep = np.ones(matrix.shape[0], dtype=bool)
+    if remove_all_zeroes:
+        # NaN counts as non-zero, as in the dictionary version.
+        keep &= (test != 0).any(axis=1)
+    if remove_any_zeroes:
+        keep &= ~(test == 0).any(axis=1)
+    if not keep.any():
+        return np.array([])
+    return matrix[keep]
+
+
+def _column_to_float( column, remove_NaN ):
+    """ per-element float() for object columns, mapping the 'NaN' string
+        to 0 when remove_NaN is set """
+    out = np.empty(len(column))
+    for i, value in enumerate(column):
+        if remove_NaN and isinstance(value, str) and value == 'NaN':
+            value = 0
+        out[i] = float(value)
+    return out
+
+
 def targetFeatureSplit( data ):
     """ 
         given a numpy array like the one returned from
@@ -0,0 +1,197 @@
+"""Append new years to the rainfall dataset without refitting from scratch.
+
+``append_years`` folds the new rows into the persisted model instead of
+re-running the whole ``k_means_v3`` fit:
+
+* per-month running statistics (observed count, mean, M2; see
+  ``rainfall_stats.RunningMoments``) give the new imputer statistics and
+  monthly means directly. Because missing months are imputed with the
+  column mean, the scaler mean equals the imputer mean and its variance is
+  ``M2 / rows``, so the scaler needs no pass over the old rows either;
+* KMeans is warm-started once from the previous centers, mapped into the new
+  scaled space, instead of ``n_init=10`` fresh initialisations. It can land
+  in a different local optimum than a full refit would.
+
+The CSV is appended first and the artifact (keyed on the new CSV hash, with
+the running statistics stored alongside) is written second, so a restarted
+service loads it rather than refitting. A crash between the two writes only
+costs a full refit.
+
+Run from the ml-service directory:
+    python incremental.py new_years.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+from pathlib import Path
+from time import perf_counter
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans
+
+import k_means_v3
+import serving
+from feature_format import featureFormatFrame
+from model_registry import file_sha256
+from rainfall_stats import RunningMoments, stream_monthly_moments
+from serving import ClusterModel
+
+
+def _moments_from_model(model: ClusterModel) -> Optional[RunningMoments]:
+    if model.feature_counts is None or model.feature_m2 is None:
+        return None
+    return RunningMoments(
+        count=np.array(model.feature_counts, dtype=np.int64),
+        mean=np.array(model.imputer_statistics, dtype=float),
+        m2=np.array(model.feature_m2, dtype=float),
+    )
+
+
+def _current_model(path: Path, model_path: Path, k: int) -> ClusterModel:
+    """The persisted model for the dataset as it is now, fitting it if needed."""
+    data_hash = file_sha256(path)
+    model = None
+    if model_path.exists():
+        model = ClusterModel.load(model_path, mmap=False)
+        if model.data_hash != data_hash or model.n_clusters != k:
+            model = None
+    if model is None:
+        pipeline, _labels, inertia, _elapsed = k_means_v3.fit_rainfall_model(path, k=k)
+        model = ClusterModel.from_pipeline(pipeline, k_means_v3.MONTH_ORDER, inertia, data_hash)
+    return model
+
+
+def _normalize_rows(rows) -> pd.DataFrame:
+    new = pd.DataFrame(rows).copy()
+    if "Year" not in new.columns:
+        raise ValueError("New rows need a 'Year' column")
+    unknown = [c for c in new.columns if c != "Year" and c not in k_means_v3.MONTH_ORDER]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(map(str, unknown))}")
+    new["Year"] = pd.to_numeric(new["Year"], errors="coerce")
+    if new["Year"].isna().any():
+        raise ValueError("Every new row needs a numeric Year")
+    new = new.reindex(columns=["Year"] + k_means_v3.MONTH_ORDER)
+    new[k_means_v3.MONTH_ORDER] = new[k_means_v3.MONTH_ORDER].apply(pd.to_numeric, errors="coerce")
+    if new["Year"].astype(int).duplicated().any():
+        raise ValueError("New rows repeat a year")
+    return new
+
+
+def _append_csv(path: Path, new: pd.DataFrame) -> None:
+    with open(path, newline="", encoding="utf-8-sig") as fh:
+        header = next(csv.reader(fh))
+    year_col = next(c for c in header if c.strip() and not c.lower().startswith("unnamed"))
+    with open(path, "rb") as fh:
+        needs_newline = False
+        if fh.seek(0, 2) > 0:
+            fh.seek(-1, 2)
+            needs_newline = fh.read(1) not in (b"\n", b"\r")
+    with open(path, "a", newline="", encoding="utf-8") as fh:
+        if needs_newline:
+            fh.write("\n")
+        writer = csv.writer(fh, quoting=csv.QUOTE_ALL, lineterminator="\n")
+        for record in new.to_dict("records"):
+            values = {year_col: str(int(record["Year"]))}
+            for month in k_means_v3.MONTH_ORDER:
+                value = record[month]
+                values[month] = "" if pd.isna(value) else repr(float(value))
+            writer.writerow([values.get(c, "") for c in header])
+
+
+def append_years(
+    rows,
+    path: Path = serving.DATA_PATH,
+    model_path: Path = serving.MODEL_PATH,
+    k: int = serving.DEFAULT_CLUSTERS,
+    random_state: int = 42,
+) -> dict:
+    """Append ``rows`` (Year plus month columns) to the CSV and update the persisted model.
+
+    Returns the updated ClusterModel, the labels of every year (in dataset
+    order), the updated rainfall statistics and timings.
+    """
+    path, model_path = Path(path), Path(model_path)
+    if model_path.resolve() == serving.MODEL_PATH.resolve() and path.resolve() != serving.DATA_PATH.resolve():
+        raise ValueError("Refusing to overwrite the service model with one fitted on another dataset")
+    new = _normalize_rows(rows)
+    t0 = perf_counter()
+
+    model = _current_model(path, model_path, k)
+    moments = _moments_from_model(model)
+    if moments is None:
+        month_cols, moments, n_samples = stream_monthly_moments(path, k_means_v3.MONTH_ORDER)
+        if month_cols != k_means_v3.MONTH_ORDER:
+            raise ValueError(f"{path} does not have all twelve month columns")
+    else:
+        n_samples = model.n_samples
+
+    existing = set(k_means_v3.load_and_clean(path)["Year"].astype(int))
+    repeated = sorted(existing & set(new["Year"].astype(int)))
+    if repeated:
+        raise ValueError(f"Years already in the dataset: {repeated}")
+
+    old_centers = model.cluster_centers * model.scaler_scale + model.scaler_mean
+    moments.update(new[k_means_v3.MONTH_ORDER].to_numpy(dtype=float))
+    n_samples += len(new)
+    if (moments.count == 0).any():
+        raise ValueError("A month has no observed values")
+    means = moments.mean
+    scale = np.sqrt(moments.m2 / n_samples)
+    scale[scale == 0.0] = 1.0  # as StandardScaler does for constant features
+    update_s = perf_counter() - t0
+
+    _append_csv(path, new)
+
+    t1 = perf_counter()
+    frame, month_cols = k_means_v3.dataframe_to_feature_frame(k_means_v3.load_and_clean(path))
+    X = featureFormatFrame(frame, month_cols, remove_NaN=True, remove_all_zeroes=False)
+    Xs = (np.where(np.isnan(X), means, X) - means) / scale
+    kmeans = KMeans(n_clusters=k, init=(old_centers - means) / scale, n_init=1, max_iter=300, random_state=random_state)
+    labels = kmeans.fit_predict(Xs)
+    cluster_s = perf_counter() - t1
+
+    updated = ClusterModel(
+        month_features=tuple(k_means_v3.MONTH_ORDER),
+        imputer_statistics=means,
+        scaler_mean=means,
+        scaler_scale=scale,
+        cluster_centers=kmeans.cluster_centers_,
+        inertia=float(kmeans.inertia_),
+        data_hash=file_sha256(path),
+        feature_counts=moments.count,
+        feature_m2=moments.m2,
+        n_samples=n_samples,
+    )
+    updated.save(model_path)
+    return {
+        "model": updated,
+        "labels": labels,
+        "statistics": k_means_v3.summarize_monthly_means(pd.Series(means, index=k_means_v3.MONTH_ORDER)),
+        "rows_added": len(new),
+        "update_seconds": update_s,
+        "cluster_seconds": cluster_s,
+        "kmeans_iterations": int(kmeans.n_iter_),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Append new years to the rainfall dataset and update the model")
+    parser.add_argument("rows_csv", type=Path, help="CSV with a Year column and month columns (Jan..Dec)")
+    parser.add_argument("--data", type=Path, default=serving.DATA_PATH, help="Rainfall dataset to append to")
+    parser.add_argument("--model", type=Path, default=serving.MODEL_PATH, help="Model artifact to update")
+    args = parser.parse_args()
+
+    result = append_years(pd.read_csv(args.rows_csv), path=args.data, model_path=args.model)
+    print(f"Appended {result['rows_added']} year(s) to {args.data}")
+    print(f"Statistics/scaler update: {result['update_seconds']:.4f}s; warm-started KMeans: {result['cluster_seconds']:.4f}s ({result['kmeans_iterations']} iterations)")
+    print(f"Inertia: {result['model'].inertia:.4f}")
+    print(f"Total predicted annual rainfall: {result['statistics']['total_predicted_mm']:.2f} mm")
+
+
+if __name__ == "__main__":
+    main()
@@ -21,24 +21,48 @@ from time import time
 import argparse
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 from pathlib import Path
-from sklearn.cluster import KMeans
-from sklearn.decomposition import PCA
+from sklearn.cluster import KMeans, MiniBatchKMeans
 from sklearn.preprocessing import StandardScaler
 from sklearn.impute import SimpleImputer
 from sklearn.pipeline import Pipeline
 
 # Add feature_format utilities path (per request)
 sys.path.append("E:/Downloads/ud120-projects-master/ud120-projects-master/tools/")
-from feature_format import featureFormat  # noqa: E402
+from feature_format import featureFormatFrame  # noqa: E402
+import fit_cache  # noqa: E402
+import metrics  # noqa: E402
+import rainfall_cache  # noqa: E402
+from rainfall_stats import RunningMoments, stream_monthly_moments  # noqa: E402
+# Harvest arithmetic and the warm model live in the lean serving module.
+from serving import (  # noqa: E402,F401
+    DEFAULT_ROOF_COEFFICIENT,
+    MODEL_REGISTRY,
+    ROOF_COEFFICIENTS,
+    ROOF_TYPES,
+    encode_roof_types,
+    predict_harvest,
+    predict_harvest_array,
+    predict_harvest_batch,
+)
 
 DATA_PATH = Path(__file__).parent.parent / "ml-service" / "Bengaluru Rainfall Data.csv"
 
+CLUSTER_BACKENDS = ("kmeans", "minibatch")
+DEFAULT_BATCH_SIZE = 1024
+DEFAULT_CHUNK_ROWS = 100_000
+
 MONTH_ORDER = ["Jan", "Feb", "March", "April", "May", "June", "July", "Aug", "Sept", "Oct", "Nov", "Dec"]
 
 
-def load_and_clean(path: Path) -> pd.DataFrame:
+def load_and_clean(path: Path, use_cache: bool = True) -> pd.DataFrame:
+    """Cleaned rainfall table; reuses the Arrow cache while the CSV is unchanged."""
+    if use_cache:
+        return rainfall_cache.load_cached(path, _clean_csv, variant="k_means_v3")
+    return _clean_csv(path)
+
+
+def _clean_csv(path: Path) -> pd.DataFrame:
     df = pd.read_csv(path)
     # Drop empty / unnamed columns
     empty_cols = [c for c in df.columns if c.strip() == '' or c.lower().startswith('unnamed')]
@@ -61,7 +85,23 @@ def load_and_clean(path: Path) -> pd.DataFrame:
 
 def rainfall_statistics(df: pd.DataFrame) -> dict:
     month_cols = [c for c in df.columns if c != 'Year']
-    monthly_means = df[month_cols].mean()
+    return summarize_monthly_means(df[month_cols].mean())
+
+
+def stream_rainfall_statistics(path: Path, chunksize: int = 100_000) -> dict:
+    """rainfall_statistics for a CSV too large to load: one chunked pass, bounded memory.
+
+    Adds per-month observation counts and standard deviations of the observed values.
+    """
+    month_cols, moments, rows = stream_monthly_moments(path, MONTH_ORDER, chunksize)
+    stats = summarize_monthly_means(pd.Series(moments.means, index=month_cols))
+    stats['monthly_counts'] = pd.Series(moments.count, index=month_cols)
+    stats['monthly_std'] = pd.Series(np.sqrt(moments.variances()), index=month_cols)
+    stats['rows'] = rows
+    return stats
+
+
+def summarize_monthly_means(monthly_means: pd.Series) -> dict:
     total_predicted = monthly_means.sum()
     roof_area_m2 = 30 * 0.3048 * 40 * 0.3048  # 111.483648 m2
     efficiency = 0.8
@@ -85,92 +125,160 @@ def dataframe_to_feature_dict(df: pd.DataFrame) -> tuple[dict, list[str]]:
     return data_dict, month_cols
 
 
-def run_kmeans(X: np.ndarray, k: int = 3, random_state: int = 42):
-    pipeline = Pipeline([
-        ("imputer", SimpleImputer(strategy="mean")),
-        ("scaler", StandardScaler()),
-        ("kmeans", KMeans(n_clusters=k, n_init=10, max_iter=300, random_state=random_state))
-    ])
+def dataframe_to_feature_frame(df: pd.DataFrame) -> tuple[pd.DataFrame, list[str]]:
+    """Columnar equivalent of dataframe_to_feature_dict, for featureFormatFrame.
+
+    Rows are keyed by int(Year) with dict semantics: a repeated year keeps the
+    position of its first occurrence and the values of its last.
+    """
+    month_cols = [c for c in df.columns if c != 'Year']
+    keys = df['Year'].astype(float).astype(int)
+    frame = df[month_cols].astype(float)
+    frame.index = keys.to_numpy()
+    if frame.index.has_duplicates:
+        frame = frame[~frame.index.duplicated(keep='last')].loc[pd.unique(keys)]
+    return frame, month_cols
+
+
+def run_kmeans(
+    X: np.ndarray,
+    k: int = 3,
+    random_state: int = 42,
+    backend: str = "kmeans",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    use_cache: bool = True,
+):
+    """Fit impute -> scale -> cluster on ``X``; returns (pipeline, labels, inertia, seconds).
+
+    ``backend="minibatch"`` feeds ``X`` through run_minibatch_kmeans in
+    ``chunk_rows`` slices instead of fitting full-batch KMeans. ``X`` is
+    already in memory here, so this only bounds the fit's working set; for a
+    CSV too large to load, call run_minibatch_kmeans with
+    rainfall_stats.iter_month_blocks directly. With
+    ``use_cache`` the result is memoized on disk by fit_cache, keyed on
+    ``X`` and every fit parameter; ``seconds`` then covers the lookup.
+    """
+    if backend not in CLUSTER_BACKENDS:
+        raise ValueError(f"Unknown clustering backend {backend!r}; expected one of {CLUSTER_BACKENDS}")
+
+    if backend == "minibatch":
+        params = dict(backend=backend, k=k, random_state=random_state, batch_size=batch_size, chunk_rows=chunk_rows, epochs=3)
+
+        def fit():
+            def blocks():
+                for start in range(0, len(X), chunk_rows):
+                    yield X[start:start + chunk_rows]
+            pipeline, labels, inertia, _ = run_minibatch_kmeans(blocks, k=k, random_state=random_state, batch_size=batch_size)
+            return {"pipeline": pipeline, "labels": labels, "inertia": inertia}
+    else:
+        params = dict(backend=backend, k=k, random_state=random_state, n_init=10, max_iter=300)
+
+        def fit():
+            pipeline = Pipeline([
+                ("imputer", SimpleImputer(strategy="mean")),
+                ("scaler", StandardScaler()),
+                ("kmeans", KMeans(n_clusters=k, n_init=10, max_iter=300, random_state=random_state))
+            ])
+            labels = pipeline.fit_predict(X)
+            return {"pipeline": pipeline, "labels": labels, "inertia": pipeline.named_steps['kmeans'].inertia_}
+
     t0 = time()
-    labels = pipeline.fit_predict(X)
+    if use_cache:
+        result, _hit = fit_cache.FIT_CACHE.get_or_fit(X, params, fit)
+    else:
+        result = fit()
     elapsed = time() - t0
-    inertia = pipeline.named_steps['kmeans'].inertia_
-    return pipeline, labels, inertia, elapsed
+    return result["pipeline"], result["labels"], result["inertia"], elapsed
 
 
-def plot_clusters(X: np.ndarray, labels: np.ndarray, outfile: str = 'rainfall_clusters.png') -> None:
-    pca = PCA(n_components=2, random_state=42)
-    X2 = pca.fit_transform(X)
-    plt.figure(figsize=(8, 6))
-    scatter = plt.scatter(X2[:, 0], X2[:, 1], c=labels, cmap='viridis', s=30, alpha=0.85)
-    plt.title('KMeans Clusters of Yearly Rainfall Profiles (PCA 2D)')
-    plt.xlabel('PC1')
-    plt.ylabel('PC2')
-    plt.colorbar(scatter, label='Cluster')
-    plt.tight_layout()
-    plt.savefig(outfile, dpi=150)
-    plt.close()
-
-
-def predict_harvest(
-    roof_area,
-    roof_type,
-    soil_type,
-    rainfall,
-    roof_slope=5.0,
-    catchment_eff=None
+def run_minibatch_kmeans(
+    blocks,
+    k: int = 3,
+    random_state: int = 42,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    epochs: int = 3,
 ):
+    """Cluster data that need not fit in memory with MiniBatchKMeans.partial_fit.
+
+    ``blocks`` is a zero-argument callable returning a fresh iterator of 2-D
+    float arrays (NaN = missing), e.g. ``lambda:
+    rainfall_stats.iter_month_blocks(path, MONTH_ORDER, chunk_rows)``. The
+    data is read ``epochs + 3`` times: once for the imputer means, once for
+    the scaler, ``epochs`` times for the mini-batch updates and once for
+    labels and the full-data inertia.
+
+    Memory ceiling: a few copies of one block (raw, imputed, scaled, and a
+    block x k distance matrix) plus the int32 labels, i.e. roughly
+    ``4 * block_rows * (features + k) * 8 + 4 * total_rows`` bytes, whatever
+    the total size. Returns the same tuple as run_kmeans; the pipeline's
+    steps are fitted sklearn objects, so ClusterModel.from_pipeline works.
     """
-    Calculate potential harvestable water (litres/year) and recommended tank volume (litres).
-    """
-    # Normalize roof_type for mapping
-    roof_type = roof_type.strip().lower()
-    # Coefficient mapping
-    base_coeffs = {
-        'rcc': 0.85,
-        'concrete': 0.85,
-        'tile': 0.75,
-        'corrugated': 0.70,
-        'sheet': 0.70,
-        'asbestos': 0.65,
-        'poor': 0.65,
-        'thatch': 0.60,
-        'metal': 0.80,
-    }
-    coeff = base_coeffs.get(roof_type, 0.70)
-    # Adjust for slope: mild bonus up to +5% if slope between 5 and 25 degrees
-    if 5 <= roof_slope <= 25:
-        coeff *= 1.03
-    coeff = min(coeff, 0.9)
+    t0 = time()
+    moments = None
+    for block in blocks():
+        if moments is None:
+            moments = RunningMoments.zeros(block.shape[1])
+        moments.update(block)
+    if moments is None or (moments.count == 0).any():
+        raise ValueError("Every feature needs at least one observed value")
+    # Mean imputation: fitting on two copies of the means reproduces them exactly.
+    imputer = SimpleImputer(strategy="mean").fit(np.vstack([moments.mean, moments.mean]))
+
+    scaler = StandardScaler()
+    for block in blocks():
+        if len(block):
+            scaler.partial_fit(imputer.transform(block))
+
+    # Driven only by partial_fit, so n_init does not apply: the centers are
+    # initialised once (k-means++) from the first batch of at least k rows.
+    kmeans = MiniBatchKMeans(n_clusters=k, batch_size=batch_size, random_state=random_state)
+    for _ in range(epochs):
+        for block in blocks():
+            Xs = scaler.transform(imputer.transform(block))
+            for start in range(0, len(Xs), batch_size):
+                batch = Xs[start:start + batch_size]
+                # The first call initialises the centers and needs at least k rows.
+                if len(batch) >= k or hasattr(kmeans, "cluster_centers_"):
+                    kmeans.partial_fit(batch)
+    if not hasattr(kmeans, "cluster_centers_"):
+        raise ValueError(f"Need at least {k} rows to form {k} clusters")
+
+    labels = []
+    inertia = 0.0
+    for block in blocks():
+        if not len(block):
+            continue
+        Xs = scaler.transform(imputer.transform(block))
+        distances = ((Xs[:, None, :] - kmeans.cluster_centers_) ** 2).sum(axis=2)
+        block_labels = distances.argmin(axis=1)
+        inertia += float(distances[np.arange(len(Xs)), block_labels].sum())
+        labels.append(block_labels.astype(np.int32))
+    elapsed = time() - t0
 
-    # Use provided catchment_eff if given, else use coeff
-    if catchment_eff is not None:
-        catchment_eff = max(0.0, min(1.0, catchment_eff))
-    else:
-        catchment_eff = coeff
+    pipeline = Pipeline([("imputer", imputer), ("scaler", scaler), ("kmeans", kmeans)])
+    return pipeline, np.concatenate(labels), inertia, elapsed
 
-    # Calculate potential harvest
-    potential_water_save_l_per_year = rainfall * roof_area * catchment_eff
-    # Calculate recommended tank volume (e.g., 1.5 months of average collection)
-    avg_monthly_collection = potential_water_save_l_per_year / 12.0
-    tank_volume_l = avg_monthly_collection * 1.5
 
-    # Use the calculated catchment_eff as efficiency
-    efficiency = catchment_eff*100
+def fit_rainfall_model(path: Path, k: int = 3, random_state: int = 42):
+    """Load, clean and cluster the rainfall dataset at ``path``."""
+    with metrics.stage("load_and_clean"):
+        df = load_and_clean(path)
+    with metrics.stage("feature_frame"):
+        frame, month_cols = dataframe_to_feature_frame(df)
+    with metrics.stage("feature_format"):
+        X = featureFormatFrame(frame, month_cols, remove_NaN=True, remove_all_zeroes=False)
+    with metrics.stage("run_kmeans"):
+        fitted = run_kmeans(X, k=k, random_state=random_state)
+    metrics.MODEL_FITS.inc()
+    return fitted
 
 
-    # --- Get inertia from run_kmeans ---
-    df = load_and_clean(DATA_PATH)
-    data_dict, month_cols = dataframe_to_feature_dict(df)
-    X = featureFormat(data_dict, month_cols, remove_NaN=True, remove_all_zeroes=False)
-    pipeline, labels, inertia, elapsed = run_kmeans(X, k=3)
+def plot_clusters(X: np.ndarray, labels: np.ndarray, outfile: str = 'rainfall_clusters.png') -> None:
+    # Plotting deps are only needed by the CLI; keep them off the import path.
+    from plot_render import render_cluster_png
 
-    return {
-        "potential_harvest": potential_water_save_l_per_year,
-        "tank_volume": tank_volume_l,
-        "efficiency": efficiency,
-        "inertia": inertia  # <-- taken from run_kmeans
-    }
+    Path(outfile).write_bytes(render_cluster_png(X, labels))
 
 
 def main():
@@ -182,12 +290,42 @@ def main():
     parser.add_argument("--catchment-eff", type=float, required=False, default=None, help="Override catchment efficiency (0-1). If not set derived from roof type.")
     parser.add_argument("--annual-rainfall", type=float, required=False, default=None, help="Override annual rainfall (mm). If not set uses dataset mean.")
     parser.add_argument("--clusters", type=int, default=3, help="Number of KMeans clusters (default 3)")
+    parser.add_argument("--backend", choices=CLUSTER_BACKENDS, default="kmeans", help="Clustering backend: full-batch KMeans or MiniBatchKMeans.partial_fit over slices of the loaded table")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Mini-batch size for --backend minibatch")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="Rows per partial_fit slice for --backend minibatch (the CSV is still loaded whole)")
+    parser.add_argument("--no-fit-cache", action="store_true", help="Refit instead of reusing a cached fit for the same data and parameters")
+    parser.add_argument("--sweep", type=str, default=None, metavar="MIN-MAX", help="Fit every k in MIN-MAX in parallel (e.g. 2-8), report inertia/silhouette and cluster with the recommended k")
+    parser.add_argument("--sweep-workers", type=int, default=None, help="Worker processes for --sweep (default: CPU count)")
     parser.add_argument("--no-plot", action="store_true", help="Skip cluster plot generation")
+    parser.add_argument("--no-data-cache", action="store_true", help="Re-clean the CSV instead of using the Arrow cache")
+    parser.add_argument("--dwellers", type=int, default=None, help="Household size; simulates monthly tank storage against this demand")
+    parser.add_argument("--per-capita-lpd", type=float, default=None, help="Demand per person in litres/day for --dwellers (default 135)")
+    parser.add_argument("--tank-sizes", type=str, default=None, metavar="L1,L2,...", help="Tank volumes (litres) to simulate with --dwellers (default: multiples of the heuristic volume)")
+    parser.add_argument("--target-reliability", type=float, default=None, help="With --dwellers, also find the smallest tank meeting demand in this share of months (0-1)")
+    parser.add_argument("--scenarios", type=int, default=None, metavar="N", help="Report P10/P50/P90 harvest and tank outcomes over N bootstrapped rainfall scenarios")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for --scenarios")
+    parser.add_argument("--horizon-years", type=int, default=10, help="Years per scenario for --scenarios")
+    parser.add_argument("--block-years", type=int, default=3, help="Consecutive historical years per bootstrap block for --scenarios")
+    parser.add_argument("--stream-stats", type=int, default=None, metavar="CHUNK_ROWS", help="Compute rainfall statistics in one chunked pass of CHUNK_ROWS rows")
     args = parser.parse_args()
-
-    # Load and stats
-    df = load_and_clean(DATA_PATH)
-    stats = rainfall_statistics(df)
+    custom_tank_sizes = None
+    if args.tank_sizes:
+        try:
+            custom_tank_sizes = [float(v) for v in args.tank_sizes.split(",") if v.strip()]
+        except ValueError:
+            parser.error(f"--tank-sizes expects comma-separated litres, got {args.tank_sizes!r}")
+    if args.seed < 0:
+        parser.error("--seed must be non-negative")
+    if args.stream_stats is not None and args.stream_stats < 1:
+        parser.error("--stream-stats needs at least 1 row per chunk")
+
+    # Load and stats; --stream-stats reads the CSV in chunks instead of loading the whole table
+    df = None
+    if args.stream_stats is not None:
+        stats = stream_rainfall_statistics(DATA_PATH, chunksize=args.stream_stats)
+    else:
+        df = load_and_clean(DATA_PATH, use_cache=not args.no_data_cache)
+        stats = rainfall_statistics(df)
     dataset_mean_rainfall = stats['total_predicted_mm']
 
     print('Monthly mean rainfall (mm) [Jan..Dec]:')
@@ -251,13 +389,83 @@ def main():
     print(f"Potential harvestable water (annual): {potential_water_save_l_per_year:,.2f} litres")
     print(f"Recommended tank volume: {tank_volume_l:,.2f} litres (approx 1.5 months storage)")
 
+    if args.dwellers is not None:
+        import water_balance
+
+        tank_sizes = custom_tank_sizes or [tank_volume_l * f for f in (0.25, 0.5, 1.0, 2.0, 4.0)]
+        per_capita = args.per_capita_lpd if args.per_capita_lpd is not None else water_balance.DEFAULT_PER_CAPITA_LPD
+        daily_demand = max(args.dwellers, 0) * per_capita
+        years, monthly = water_balance.monthly_series()
+        sim = water_balance.simulate_storage(roof_area_m2, catchment_eff, daily_demand, tank_sizes, monthly)
+        print(f"\nTank simulation ({years[0]}-{years[-1]}, {daily_demand:,.0f} L/day for {args.dwellers} dweller(s)):")
+        print(f"{'tank (L)':>10}  {'reliability':>11}  {'volumetric':>10}  {'supplied L/yr':>13}  {'overflow L/yr':>13}  {'deficit L/yr':>12}")
+        for j, volume in enumerate(tank_sizes):
+            print(
+                f"{volume:>10,.0f}  {sim['reliability'][0, j]:>11.1%}  {sim['volumetric_reliability'][0, j]:>10.1%}  "
+                f"{sim['supplied_l'][0, j]:>13,.0f}  {sim['overflow_l'][0, j]:>13,.0f}  {sim['deficit_l'][0, j]:>12,.0f}"
+            )
+        if args.target_reliability is not None:
+            if not 0.0 <= args.target_reliability <= 1.0:
+                parser.error("--target-reliability must be between 0 and 1")
+            best = water_balance.optimize_tank_volume(roof_area_m2, catchment_eff, daily_demand, monthly, target=args.target_reliability)
+            if best["feasible"][0]:
+                print(f"Smallest tank meeting demand in {args.target_reliability:.0%} of months: {best['tank_volume'][0]:,.0f} litres (achieves {best['achieved'][0]:.1%})")
+            else:
+                print(f"No tank meets demand in {args.target_reliability:.0%} of months; the best achievable is {best['achieved'][0]:.1%}")
+
+    if args.scenarios:
+        import scenarios
+        import water_balance
+
+        sizes = custom_tank_sizes or [tank_volume_l]
+        per_capita = args.per_capita_lpd if args.per_capita_lpd is not None else water_balance.DEFAULT_PER_CAPITA_LPD
+        daily_demand = max(args.dwellers or 0, 0) * per_capita
+        years, monthly = water_balance.monthly_series()
+        outcome = scenarios.simulate_scenarios(
+            [roof_area_m2] * len(sizes), catchment_eff, daily_demand, sizes, monthly, n_scenarios=args.scenarios,
+            horizon_years=args.horizon_years, block_years=args.block_years, seed=args.seed,
+        )
+        labels = [f"p{p}" for p in scenarios.DEFAULT_PERCENTILES]
+        print(
+            f"\nRainfall scenarios: {args.scenarios:,} x {args.horizon_years} years, {args.block_years}-year blocks "
+            f"from {years[0]}-{years[-1]}, seed {args.seed} ({'/'.join(l.upper() for l in labels)}):"
+        )
+        print("Annual rainfall (mm): " + " / ".join(f"{outcome['annual_rainfall'][l][0]:,.0f}" for l in labels))
+        print("Potential harvest (L/yr): " + " / ".join(f"{outcome['potential_harvest'][l][0]:,.0f}" for l in labels))
+        if daily_demand > 0:
+            for j, volume in enumerate(sizes):
+                reliability = " / ".join(f"{outcome['reliability'][l][j]:.1%}" for l in labels)
+                supplied = " / ".join(f"{outcome['supplied_l'][l][j]:,.0f}" for l in labels)
+                print(f"Tank {volume:,.0f} L: reliability {reliability}; supplied L/yr {supplied}")
+
     # Clustering -----------------------------------------------------------
-    data_dict, month_cols = dataframe_to_feature_dict(df)
-    X = featureFormat(data_dict, month_cols, remove_NaN=True, remove_all_zeroes=False)
+    if df is None:
+        df = load_and_clean(DATA_PATH, use_cache=not args.no_data_cache)
+    frame, month_cols = dataframe_to_feature_frame(df)
+    X = featureFormatFrame(frame, month_cols, remove_NaN=True, remove_all_zeroes=False)
     if np.isnan(X).any():
         print("Warning: NaNs detected after featureFormat; they will be imputed in pipeline.")
-    pipeline, labels, inertia, elapsed = run_kmeans(X, k=args.clusters)
-    print(f"\nKMeans trained in {elapsed:.3f} s; inertia={inertia:.2f}; clusters={args.clusters}")
+    if args.sweep:
+        from k_sweep import format_sweep, sweep_k
+
+        low, _, high = args.sweep.partition("-")
+        try:
+            k_range = range(int(low), int(high or low) + 1)
+        except ValueError:
+            parser.error(f"--sweep expects MIN-MAX, got {args.sweep!r}")
+        sweep = sweep_k(X, k_range, workers=args.sweep_workers)
+        print("\nk-sweep:")
+        print(format_sweep(sweep))
+        if sweep["recommended_k"] is not None:
+            args.clusters = sweep["recommended_k"]
+    cache_hits = fit_cache.FIT_CACHE.hits
+    pipeline, labels, inertia, elapsed = run_kmeans(
+        X, k=args.clusters, backend=args.backend, batch_size=args.batch_size, chunk_rows=args.chunk_rows,
+        use_cache=not args.no_fit_cache,
+    )
+    name = "MiniBatchKMeans" if args.backend == "minibatch" else "KMeans"
+    verb = "loaded from fit cache" if fit_cache.FIT_CACHE.hits > cache_hits else "trained"
+    print(f"\n{name} {verb} in {elapsed:.3f} s; inertia={inertia:.2f}; clusters={args.clusters}")
     unique, counts = np.unique(labels, return_counts=True)
     print('Cluster distribution (cluster: count):', dict(zip(unique, counts)))
     if not args.no_plot:
@@ -0,0 +1,131 @@
+"""In-memory registry for the fitted rainfall clustering model.
+
+The registry loads or fits the model once, keeps it warm for the lifetime of the
+process and only refits when the dataset file actually changes. A cheap
+``os.stat`` check runs on every lookup; the file is re-hashed only when its
+mtime or size moved, and the model is refit only when the content hash
+differs from the one it was fitted on (a ``touch`` does not trigger a refit).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from time import perf_counter, time
+from typing import Any, Callable, List, Optional, Tuple
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class FittedModel:
+    model: Any
+    inertia: float
+    fit_seconds: float
+    source: str
+    data_hash: str
+    version: int
+    fitted_at: float
+
+
+class ModelRegistry:
+    """Holds one fitted model for a dataset file and refits it on change.
+
+    ``fit_fn(path, data_hash)`` receives the dataset path and the hex SHA-256
+    of its contents (as computed by ``file_sha256``; use it to key persisted
+    artifacts instead of re-hashing). It must return ``(model, source)`` where
+    ``model`` has an ``inertia`` attribute and ``source`` says whether it was
+    freshly fitted or loaded from a persisted artifact.
+    """
+
+    def __init__(self, path: Path, fit_fn: Callable[[Path, str], tuple]):
+        self.path = Path(path)
+        self._fit_fn = fit_fn
+        self._lock = threading.Lock()
+        self._model: Optional[FittedModel] = None
+        self._stat_key: Optional[tuple] = None
+        self._version = 0
+        # (stat key, content hash) of the last hash, kept separately from the model.
+        self._hashed: Optional[Tuple[tuple, str]] = None
+        self._refit_listeners: List[Callable[[FittedModel], None]] = []
+
+    def add_refit_listener(self, callback: Callable[[FittedModel], None]) -> None:
+        """Call ``callback(model)`` whenever a new model is fitted."""
+        self._refit_listeners.append(callback)
+
+    def _current_stat_key(self) -> tuple:
+        st = os.stat(self.path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def get(self) -> FittedModel:
+        """Return the warm model, refitting first if the dataset changed."""
+        stat_key = self._current_stat_key()
+        model = self._model
+        if model is not None and stat_key == self._stat_key:
+            return model
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock.
+            stat_key = self._current_stat_key()
+            if self._model is not None and stat_key == self._stat_key:
+                return self._model
+            data_hash = file_sha256(self.path)
+            self._hashed = (stat_key, data_hash)
+            if self._model is None or data_hash != self._model.data_hash:
+                self._model = self._fit(data_hash)
+                for callback in self._refit_listeners:
+                    callback(self._model)
+            self._stat_key = stat_key
+            return self._model
+
+    def is_current(self) -> bool:
+        """True if a model is loaded and the dataset file looks unchanged (stat only)."""
+        return self._model is not None and self._current_stat_key() == self._stat_key
+
+    def known_data_hash(self) -> Optional[str]:
+        """Content hash of the dataset if the file looks unchanged since it was hashed (stat only), else None."""
+        hashed = self._hashed
+        if hashed is not None and hashed[0] == self._current_stat_key():
+            return hashed[1]
+        return None
+
+    def current_data_hash(self) -> str:
+        """Content hash of the dataset as it is now; re-hashes after a stat change but never fits."""
+        data_hash = self.known_data_hash()
+        if data_hash is None:
+            stat_key = self._current_stat_key()
+            data_hash = file_sha256(self.path)
+            self._hashed = (stat_key, data_hash)
+        return data_hash
+
+    def warm(self) -> FittedModel:
+        """Fit eagerly (e.g. at service startup) so the first request is fast."""
+        return self.get()
+
+    def invalidate(self) -> None:
+        """Drop the fitted model; the next ``get`` refits unconditionally."""
+        with self._lock:
+            self._model = None
+            self._stat_key = None
+
+    def _fit(self, data_hash: str) -> FittedModel:
+        t0 = perf_counter()
+        model, source = self._fit_fn(self.path, data_hash)
+        self._version += 1
+        return FittedModel(
+            model=model,
+            inertia=float(model.inertia),
+            fit_seconds=perf_counter() - t0,
+            source=source,
+            data_hash=data_hash,
+            version=self._version,
+            fitted_at=time(),
+        )
@@ -0,0 +1,322 @@
+"""Opt-in per-request profiling with a ring buffer of downloadable profiles.
+
+A request is profiled when profiling is on (``PROFILING_ENABLED=1``) and it
+is drawn at ``PROFILE_SAMPLE_RATE`` (default 0.01). It is also profiled when
+it carries ``X-Profile: 1`` with an ``X-Admin-Token`` matching
+``ADMIN_TOKEN``; without a configured token the header is ignored. For a
+profiled request:
+
+* work sent through ``wrap`` (the app's ``_dispatch``) runs under cProfile
+  in its worker thread. The session reaches that thread through a
+  contextvar, which the threadpool copies. In the process execution mode
+  the work runs in another process and is not profiled there;
+* a sampling thread records the stack of that worker thread every
+  ``PROFILE_SAMPLE_INTERVAL_MS`` (default 5), as collapsed stacks
+  (``frame;frame;frame count``) for flamegraph.pl or speedscope. The
+  event-loop thread is shared by every in-flight request, so it is not
+  sampled; a request that never reaches ``wrap`` has no stacks;
+* tracemalloc runs while any profiled request is in flight, and the peak
+  traced memory and top allocation sites are recorded. tracemalloc is
+  process-wide, so concurrent requests share these figures.
+
+The last ``PROFILE_BUFFER_SIZE`` (default 20) profiles are kept in memory.
+The response carries ``X-Profile-Id``. The admin endpoints in ``app`` list
+profiles and serve them as pstats files (``pstats.Stats(path)``) or
+collapsed stacks. Profiles expose stacks, file paths and allocation sites,
+so those endpoints exist only when ``ADMIN_TOKEN`` is set.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import cProfile
+import hmac
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import tracemalloc
+import uuid
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional
+
+ENABLED = os.environ.get("PROFILING_ENABLED", "0").strip().lower() in ("1", "true", "yes", "on")
+SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0.01"))
+SAMPLE_INTERVAL = float(os.environ.get("PROFILE_SAMPLE_INTERVAL_MS", "5")) / 1000.0
+BUFFER_SIZE = int(os.environ.get("PROFILE_BUFFER_SIZE", "20"))
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN") or None
+TOP_ALLOCATIONS = 10
+# Admin and scrape endpoints are never profiled.
+SKIP_PREFIXES = ("/admin/", "/metrics")
+
+_current: contextvars.ContextVar[Optional["ProfileSession"]] = contextvars.ContextVar("profile_session", default=None)
+
+
+def token_matches(supplied: Optional[str]) -> bool:
+    return ADMIN_TOKEN is not None and supplied is not None and hmac.compare_digest(supplied.encode(), ADMIN_TOKEN.encode())
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class ProfileSession:
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex[:16]
+        self.method = method
+        self.path = path
+        self.started = datetime.now(timezone.utc)
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        # Only threads running this request's wrapped work; see wrap.
+        self._threads: Dict[int, str] = {}
+        self._profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def add_thread(self, ident: int, name: str) -> None:
+        with self._lock:
+            self._threads[ident] = name
+
+    def remove_thread(self, ident: int) -> None:
+        with self._lock:
+            self._threads.pop(ident, None)
+
+    def add_profile(self, profile: cProfile.Profile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    def sample(self, frames: dict) -> None:
+        with self._lock:
+            threads = list(self._threads.items())
+        for ident, name in threads:
+            frame = frames.get(ident)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(name)
+            self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def pstats_bytes(self) -> bytes:
+        # Same bytes pstats.Stats.dump_stats writes; load with pstats.Stats(path).
+        with self._lock:
+            profiles = list(self._profiles)
+        if not profiles:
+            return marshal.dumps({})
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return marshal.dumps(stats.stats)
+
+
+def top_functions(pstats_data: bytes, limit: int = 10) -> List[dict]:
+    """The ``limit`` functions with the most cumulative time in a pstats dump."""
+    rows = sorted(marshal.loads(pstats_data).items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [
+        {"function": f"{func} ({os.path.basename(file)}:{line})", "calls": nc, "tottime": tt, "cumtime": ct}
+        for (file, line, func), (_cc, nc, tt, ct, _callers) in rows
+    ]
+
+
+class _Sampler:
+    """One daemon thread sampling every active session's threads."""
+
+    def __init__(self):
+        self._sessions: Dict[str, ProfileSession] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, session: ProfileSession) -> None:
+        with self._lock:
+            self._sessions[session.id] = session
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+
+    def remove(self, session: ProfileSession) -> None:
+        with self._lock:
+            self._sessions.pop(session.id, None)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                sessions = list(self._sessions.values())
+                if not sessions:
+                    self._thread = None
+                    return
+            frames = sys._current_frames()
+            for session in sessions:
+                session.sample(frames)
+            del frames
+            self._wake.wait(SAMPLE_INTERVAL)
+
+
+class ProfileStore:
+    """Ring buffer of finished profiles."""
+
+    def __init__(self, size: int):
+        self.size = max(1, size)
+        self._records: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, record: dict) -> None:
+        with self._lock:
+            self._records[record["id"]] = record
+            while len(self._records) > self.size:
+                self._records.popitem(last=False)
+
+    def list(self) -> List[dict]:
+        with self._lock:
+            records = list(self._records.values())
+        return [{k: v for k, v in r.items() if k not in ("pstats", "collapsed")} for r in reversed(records)]
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        with self._lock:
+            return self._records.get(profile_id)
+
+
+STORE = ProfileStore(BUFFER_SIZE)
+_SAMPLER = _Sampler()
+_tracing = 0
+_tracing_owned = False  # False when tracemalloc was already on (e.g. PYTHONTRACEMALLOC)
+_tracing_lock = threading.Lock()
+
+
+def _start_tracing() -> None:
+    global _tracing, _tracing_owned
+    with _tracing_lock:
+        if _tracing == 0:
+            _tracing_owned = not tracemalloc.is_tracing()
+            if _tracing_owned:
+                tracemalloc.start()
+        tracemalloc.reset_peak()
+        _tracing += 1
+
+
+def _stop_tracing() -> dict:
+    global _tracing
+    with _tracing_lock:
+        _current_bytes, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+        _tracing -= 1
+        if _tracing == 0 and _tracing_owned:
+            tracemalloc.stop()
+        concurrent = _tracing > 0
+    top = [
+        {"site": f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}", "bytes": stat.size, "blocks": stat.count}
+        for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]
+    ]
+    return {"peak_bytes": peak, "top_allocations": top, "concurrent": concurrent}
+
+
+def should_profile(headers: dict) -> bool:
+    if headers.get("x-profile", "").strip().lower() in ("1", "true", "yes", "on"):
+        # Only admins may force a profile; token_matches is False when no token is configured.
+        return token_matches(headers.get("x-admin-token"))
+    return ENABLED and random.random() < SAMPLE_RATE
+
+
+def wrap(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """``fn`` run under cProfile when the calling request is being profiled."""
+    session = _current.get()
+    if session is None:
+        return fn
+
+    @wraps(fn)
+    def profiled(*args, **kwargs):
+        ident = threading.get_ident()
+        session.add_thread(ident, "worker")
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler already owns this thread; keep the stack samples only.
+            profile = None
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            if profile is not None:
+                profile.disable()
+                session.add_profile(profile)
+            session.remove_thread(ident)
+
+    return profiled
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles sampled or explicitly requested requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(SKIP_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+        if not ENABLED and ADMIN_TOKEN is None:
+            await self.app(scope, receive, send)
+            return
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        if not should_profile(headers):
+            await self.app(scope, receive, send)
+            return
+
+        session = ProfileSession(scope["method"], scope["path"])
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", session.id.encode())]
+            await send(message)
+
+        token = _current.set(session)
+        _start_tracing()
+        _SAMPLER.add(session)
+        t0 = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = perf_counter() - t0
+            _SAMPLER.remove(session)
+            memory = _stop_tracing()
+            _current.reset(token)
+            pstats_data = session.pstats_bytes()
+            STORE.add({
+                "id": session.id,
+                "method": session.method,
+                "path": session.path,
+                "status": status,
+                "started": session.started.isoformat(),
+                "duration_ms": duration * 1e3,
+                "samples": session.samples,
+                "memory": memory,
+                "top_functions": top_functions(pstats_data),
+                "pstats": pstats_data,
+                "collapsed": "".join(f"{stack} {count}\n" for stack, count in session.stacks.most_common()),
+            })
+
+
+def stats() -> dict:
+    return {
+        "enabled": ENABLED,
+        "sample_rate": SAMPLE_RATE,
+        "admin_token_configured": ADMIN_TOKEN is not None,
+        "buffer_size": STORE.size,
+        "stored": len(STORE.list()),
+    }
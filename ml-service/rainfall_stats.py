@@ -0,0 +1,95 @@
+"""Single-pass, chunked monthly rainfall statistics.
+
+``stream_monthly_moments`` reads a wide rainfall CSV (one row per year or
+station-year, one column per month, the layout ``k_means_v3.load_and_clean``
+expects) in fixed-size chunks and keeps a running count, mean and sum of
+squared deviations per month. Chunks are merged with the parallel form of
+Welford's update (Chan et al.), so memory is bounded by the chunk size
+however long the file is.
+
+The means match ``rainfall_statistics(load_and_clean(path))`` to within
+floating-point rounding: imputing NaNs with the column mean, as
+``load_and_clean`` does, leaves the mean unchanged. Variances are over
+observed values only (imputation would shrink them).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class RunningMoments:
+    """Per-column count, mean and M2 (sum of squared deviations), NaN-aware."""
+
+    count: np.ndarray
+    mean: np.ndarray
+    m2: np.ndarray
+
+    @classmethod
+    def zeros(cls, n: int) -> "RunningMoments":
+        return cls(np.zeros(n, dtype=np.int64), np.zeros(n), np.zeros(n))
+
+    def update(self, block: np.ndarray) -> None:
+        """Fold a 2-D block (rows x columns, NaN = missing) into the running moments."""
+        observed = ~np.isnan(block)
+        n_b = observed.sum(axis=0)
+        if not n_b.any():
+            return
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_b = np.where(observed, block, 0.0).sum(axis=0) / n_b
+            m2_b = np.where(observed, (block - mean_b) ** 2, 0.0).sum(axis=0)
+        n = self.count + n_b
+        has_b = n_b > 0
+        delta = np.where(has_b, mean_b - self.mean, 0.0)
+        ratio = np.divide(n_b, n, out=np.zeros(len(n)), where=n > 0)
+        self.mean = self.mean + delta * ratio
+        self.m2 = self.m2 + np.where(has_b, m2_b, 0.0) + delta ** 2 * self.count * ratio
+        self.count = n
+
+    @property
+    def means(self) -> np.ndarray:
+        return np.where(self.count > 0, self.mean, np.nan)
+
+    def variances(self, ddof: int = 1) -> np.ndarray:
+        dof = self.count - ddof
+        return np.divide(self.m2, dof, out=np.full(len(dof), np.nan), where=dof > 0)
+
+
+def _layout(path: Path, month_order: Sequence[str]):
+    header = pd.read_csv(path, nrows=0).columns
+    kept = [c for c in header if not (c.strip() == '' or c.lower().startswith('unnamed'))]
+    if not kept:
+        raise ValueError(f"{path} has no usable columns")
+    year_col = kept[0]
+    month_cols = [c for c in month_order if c in kept and c != year_col]
+    return year_col, month_cols
+
+
+def iter_month_blocks(path: Path, month_order: Sequence[str], chunksize: int = 100_000) -> Iterator[np.ndarray]:
+    """Yield ``(rows, months)`` float blocks of at most ``chunksize`` rows, NaN = missing.
+
+    Rows whose first (year) column is not numeric are skipped, as in
+    ``load_and_clean``; non-numeric month values count as missing.
+    """
+    year_col, month_cols = _layout(path, month_order)
+    reader = pd.read_csv(path, usecols=[year_col] + month_cols, chunksize=chunksize)
+    for chunk in reader:
+        valid = pd.to_numeric(chunk[year_col], errors='coerce').notna().to_numpy()
+        yield chunk[month_cols].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)[valid]
+
+
+def stream_monthly_moments(path: Path, month_order: Sequence[str], chunksize: int = 100_000):
+    """Return ``(month_cols, RunningMoments, rows)`` for the CSV at ``path``."""
+    _, month_cols = _layout(path, month_order)
+    moments = RunningMoments.zeros(len(month_cols))
+    rows = 0
+    for block in iter_month_blocks(path, month_order, chunksize):
+        moments.update(block)
+        rows += len(block)
+    return month_cols, moments, rows
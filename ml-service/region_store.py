@@ -0,0 +1,168 @@
+"""Indexed multi-region rainfall store (IMD subdivision data, 1901-2017).
+
+The CSV is parsed once (and again if the file changes) into a dense ``(region, year, column)`` float array
+with NaN for missing values, so a ``(SUBDIVISION, YEAR)`` record is two
+dictionary/offset lookups. Per-region monthly means, annual means and
+annual percentiles are precomputed into contiguous arrays indexed by the
+same region code. Like ``serving``, this module needs only NumPy and the
+standard library.
+"""
+
+from __future__ import annotations
+
+import csv
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+REGION_DATA_PATH = Path(os.environ.get("REGION_DATA_PATH") or Path(__file__).parent / "RainWater_Sub_Division_IMD_2017.csv")
+
+MONTH_COLUMNS = ("JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC")
+SEASON_COLUMNS = ("JF", "MAM", "JJAS", "OND")
+VALUE_COLUMNS = MONTH_COLUMNS + ("ANNUAL",) + SEASON_COLUMNS
+ANNUAL_COLUMN = VALUE_COLUMNS.index("ANNUAL")
+PERCENTILES = (10, 25, 50, 75, 90)
+
+
+class UnknownRegion(ValueError):
+    pass
+
+
+def _parse_value(text: Optional[str]) -> float:
+    text = (text or "").strip()
+    return np.nan if text.upper() in ("", "NA", "NAN") else float(text)
+
+
+def normalize_region(name) -> str:
+    return " ".join(str(name).split()).casefold()
+
+
+@dataclass(frozen=True)
+class RegionStore:
+    regions: Tuple[str, ...]
+    first_year: int
+    values: np.ndarray             # (regions, years, VALUE_COLUMNS), NaN where missing
+    monthly_means: np.ndarray      # (regions, 12)
+    annual_means: np.ndarray       # (regions,)
+    annual_percentiles: np.ndarray  # (regions, len(PERCENTILES))
+    year_counts: np.ndarray        # (regions,) years with an ANNUAL value
+
+    @property
+    def last_year(self) -> int:
+        return self.first_year + self.values.shape[1] - 1
+
+    @classmethod
+    def from_csv(cls, path: Path) -> "RegionStore":
+        rows: Dict[Tuple[str, int], list] = {}
+        with open(path, newline="", encoding="utf-8-sig") as fh:
+            reader = csv.DictReader(fh)
+            missing = [c for c in ("SUBDIVISION", "YEAR") + VALUE_COLUMNS if c not in (reader.fieldnames or ())]
+            if missing:
+                raise ValueError(f"{path} is missing columns: {', '.join(missing)}")
+            for record in reader:
+                region = " ".join(record["SUBDIVISION"].split())
+                year = int(float(record["YEAR"]))
+                rows[(region, year)] = [_parse_value(record[c]) for c in VALUE_COLUMNS]
+        if not rows:
+            raise ValueError(f"{path} has no rows")
+
+        regions = tuple(sorted({region for region, _ in rows}))
+        region_codes = {region: code for code, region in enumerate(regions)}
+        years = [year for _, year in rows]
+        first_year = min(years)
+        values = np.full((len(regions), max(years) - first_year + 1, len(VALUE_COLUMNS)), np.nan)
+        for (region, year), record in rows.items():
+            values[region_codes[region], year - first_year] = record
+        return cls.from_values(regions, first_year, values)
+
+    @classmethod
+    def from_values(cls, regions: Tuple[str, ...], first_year: int, values: np.ndarray) -> "RegionStore":
+        annual = values[:, :, ANNUAL_COLUMN]
+        year_counts = (~np.isnan(annual)).sum(axis=1)
+        # Every region has data in this dataset; guard anyway so nanmean stays quiet.
+        has_data = year_counts > 0
+        monthly_means = np.full((len(regions), len(MONTH_COLUMNS)), np.nan)
+        annual_means = np.full(len(regions), np.nan)
+        annual_percentiles = np.full((len(regions), len(PERCENTILES)), np.nan)
+        monthly_means[has_data] = np.nanmean(values[has_data, :, :len(MONTH_COLUMNS)], axis=1)
+        annual_means[has_data] = np.nanmean(annual[has_data], axis=1)
+        annual_percentiles[has_data] = np.nanpercentile(annual[has_data], PERCENTILES, axis=1).T
+        return cls(
+            regions=tuple(regions),
+            first_year=first_year,
+            values=np.ascontiguousarray(values),
+            monthly_means=np.ascontiguousarray(monthly_means),
+            annual_means=annual_means,
+            annual_percentiles=np.ascontiguousarray(annual_percentiles),
+            year_counts=year_counts,
+        )
+
+    def __post_init__(self):
+        object.__setattr__(self, "_codes", {normalize_region(r): i for i, r in enumerate(self.regions)})
+
+    def code(self, region) -> int:
+        try:
+            return self._codes[normalize_region(region)]
+        except KeyError:
+            raise UnknownRegion(f"Unknown region {region!r}; see /regions for the list") from None
+
+    def encode(self, regions) -> np.ndarray:
+        """Region codes for a sequence of names; None/empty entries map to -1."""
+        values = np.asarray(regions, dtype=object).reshape(-1)
+        seen: dict = {}
+        codes = np.empty(len(values), dtype=np.intp)
+        for i, value in enumerate(values):
+            code = seen.get(value)
+            if code is None:
+                code = seen[value] = -1 if value is None or not str(value).strip() else self.code(value)
+            codes[i] = code
+        return codes
+
+    def annual_mean(self, region) -> float:
+        return float(self.annual_means[self.code(region)])
+
+    def record(self, region, year: int) -> Optional[dict]:
+        offset = int(year) - self.first_year
+        if not 0 <= offset < self.values.shape[1]:
+            return None
+        row = self.values[self.code(region), offset]
+        if np.isnan(row).all():
+            return None
+        return {c: (None if np.isnan(v) else float(v)) for c, v in zip(VALUE_COLUMNS, row.tolist())}
+
+    def summary(self, region) -> dict:
+        code = self.code(region)
+        return {
+            "region": self.regions[code],
+            "years": int(self.year_counts[code]),
+            "annual_mean": float(self.annual_means[code]),
+            "annual_percentiles": {f"p{p}": float(v) for p, v in zip(PERCENTILES, self.annual_percentiles[code])},
+            "monthly_means": dict(zip(MONTH_COLUMNS, self.monthly_means[code].tolist())),
+        }
+
+
+# The store and the (mtime, size) of the file it was parsed from, swapped together.
+_loaded: Optional[Tuple[tuple, RegionStore]] = None
+_store_lock = threading.Lock()
+
+
+def _stat_key(path: Path) -> tuple:
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def get_store() -> RegionStore:
+    """The process-wide store, parsed from REGION_DATA_PATH on first use and again whenever the file changes."""
+    global _loaded
+    stat_key = _stat_key(REGION_DATA_PATH)
+    loaded = _loaded
+    if loaded is None or loaded[0] != stat_key:
+        with _store_lock:
+            loaded = _loaded
+            if loaded is None or loaded[0] != stat_key:
+                loaded = _loaded = (stat_key, RegionStore.from_csv(REGION_DATA_PATH))
+    return loaded[1]
@@ -0,0 +1,163 @@
+"""Seeded Monte Carlo rainfall scenarios for probabilistic harvest estimates.
+
+Each scenario is a ``horizon_years`` run of monthly rainfall stitched
+together from the historical record with a circular moving-block bootstrap.
+Blocks of ``block_years`` consecutive years are drawn at random start years,
+which keeps wet and dry spells that last several years. Every scenario is
+then pushed through ``water_balance.simulate_storage`` for every site.
+
+All scenario year indices are drawn up front from ``seed`` (a scenarios x
+horizon integer matrix, which is small). The results are therefore the same
+whatever ``chunk_scenarios`` is. Scenarios are simulated in chunks so that
+the (sites x scenarios) rainfall block stays under ``max_chunk_bytes``.
+Only per-scenario summary numbers are kept, (sites x scenarios) per metric.
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Sequence
+
+import numpy as np
+
+import water_balance
+
+DEFAULT_SCENARIOS = 1000
+DEFAULT_HORIZON_YEARS = 10
+DEFAULT_BLOCK_YEARS = 3
+DEFAULT_PERCENTILES = (10, 50, 90)
+# Upper bound on the per-chunk (site, scenario, month) rainfall block.
+DEFAULT_MAX_CHUNK_BYTES = 64 * 1024 * 1024
+TANK_METRICS = ("reliability", "volumetric_reliability", "supplied_l", "overflow_l", "deficit_l")
+
+
+def block_bootstrap_years(
+    n_record_years: int,
+    n_scenarios: int,
+    horizon_years: int,
+    block_years: int = DEFAULT_BLOCK_YEARS,
+    seed: Optional[int] = 0,
+) -> np.ndarray:
+    """``(n_scenarios, horizon_years)`` indices into the record's years.
+
+    Circular moving-block bootstrap: each scenario is a run of blocks of
+    ``block_years`` consecutive years (wrapping at the end of the record),
+    each starting at a uniformly drawn year. ``block_years=1`` is the plain
+    year bootstrap.
+    """
+    if n_record_years < 1:
+        raise ValueError("The rainfall record is empty")
+    if n_scenarios < 1 or horizon_years < 1:
+        raise ValueError("n_scenarios and horizon_years must be positive")
+    block_years = max(1, min(int(block_years), n_record_years))
+    n_blocks = -(-horizon_years // block_years)
+    rng = np.random.default_rng(seed)
+    starts = rng.integers(0, n_record_years, size=(n_scenarios, n_blocks))
+    offsets = np.arange(block_years)
+    years = (starts[:, :, None] + offsets) % n_record_years
+    return years.reshape(n_scenarios, -1)[:, :horizon_years]
+
+
+def _summarize(values: np.ndarray, percentiles: Sequence[float]) -> dict:
+    """``{"p10": (S,), ...}`` for a ``(sites, scenarios)`` matrix."""
+    points = np.percentile(values, percentiles, axis=1)
+    return {f"p{p:g}": points[i] for i, p in enumerate(percentiles)}
+
+
+def simulate_scenarios(
+    roof_area,
+    efficiency,
+    daily_demand,
+    tank_volume,
+    monthly_rainfall,
+    n_scenarios: int = DEFAULT_SCENARIOS,
+    horizon_years: int = DEFAULT_HORIZON_YEARS,
+    block_years: int = DEFAULT_BLOCK_YEARS,
+    seed: Optional[int] = 0,
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    initial_fill: float = 0.0,
+    rule: str = "ybs",
+    chunk_scenarios: Optional[int] = None,
+    max_chunk_bytes: int = DEFAULT_MAX_CHUNK_BYTES,
+) -> dict:
+    """Percentiles of harvest and tank outcomes for each site over bootstrapped scenarios.
+
+    ``roof_area``, ``efficiency``, ``daily_demand`` and ``tank_volume``
+    (litres) are per site or scalars. ``monthly_rainfall`` is the
+    ``(years, 12)`` record. Returns ``{"annual_rainfall", "potential_harvest",
+    "reliability", "volumetric_reliability", "supplied_l", "overflow_l",
+    "deficit_l"}``, each a dict from ``"p10"`` etc. to a ``(S,)`` array.
+    Rainfall and harvest are means per year over the horizon. Harvest is
+    what the roof collects; supplied is what the tank delivers.
+    """
+    roof_area, efficiency, daily_demand = water_balance.site_arrays(roof_area, efficiency, daily_demand)
+    n_sites = len(roof_area)
+    tank_volume = np.broadcast_to(np.asarray(tank_volume, dtype=float), (n_sites,))
+    record = np.asarray(monthly_rainfall, dtype=float).reshape(-1, 12)
+    years = block_bootstrap_years(len(record), n_scenarios, horizon_years, block_years, seed)
+
+    # Harvest is linear in rainfall, so its percentiles follow from the rainfall ones.
+    annual = record.sum(axis=1)[years].mean(axis=1)
+    rain_points = np.percentile(annual, percentiles)
+    catchment = roof_area * efficiency
+    out = {
+        "annual_rainfall": {f"p{p:g}": np.full(n_sites, rain_points[i]) for i, p in enumerate(percentiles)},
+        "potential_harvest": {f"p{p:g}": catchment * rain_points[i] for i, p in enumerate(percentiles)},
+    }
+
+    if chunk_scenarios is None:
+        per_scenario = n_sites * horizon_years * 12 * 8
+        chunk_scenarios = max(1, max_chunk_bytes // max(per_scenario, 1))
+    chunk_scenarios = int(min(max(chunk_scenarios, 1), n_scenarios))
+
+    metrics = {name: np.empty((n_sites, n_scenarios)) for name in TANK_METRICS}
+    for start in range(0, n_scenarios, chunk_scenarios):
+        stop = min(start + chunk_scenarios, n_scenarios)
+        chunk = stop - start
+        # Row (site i, scenario c) of the flattened batch is i * chunk + c.
+        rain = np.broadcast_to(record[years[start:stop]], (n_sites, chunk, horizon_years, 12))
+        result = water_balance.simulate_storage(
+            np.repeat(roof_area, chunk),
+            np.repeat(efficiency, chunk),
+            np.repeat(daily_demand, chunk),
+            np.repeat(tank_volume, chunk)[:, None],
+            rain.reshape(n_sites * chunk, horizon_years, 12),
+            initial_fill,
+            rule,
+        )
+        for name in TANK_METRICS:
+            metrics[name][:, start:stop] = result[name][:, 0].reshape(n_sites, chunk)
+
+    for name in TANK_METRICS:
+        out[name] = _summarize(metrics[name], percentiles)
+    out["chunk_scenarios"] = chunk_scenarios
+    return out
+
+
+def simulate_scenario_sites(
+    roof_area,
+    efficiency,
+    daily_demand,
+    tank_volume,
+    regions=None,
+    **options,
+) -> dict:
+    """simulate_scenarios for sites that may sit in different regions.
+
+    Every region draws its scenarios from the same seed, so sites that share
+    a record also share scenarios.
+    """
+    roof_area, efficiency, daily_demand = water_balance.site_arrays(roof_area, efficiency, daily_demand)
+    n_sites = len(roof_area)
+    tank_volume = np.broadcast_to(np.asarray(tank_volume, dtype=float), (n_sites,))
+    percentiles = options.get("percentiles", DEFAULT_PERCENTILES)
+    out: dict = {
+        name: {f"p{p:g}": np.empty(n_sites) for p in percentiles}
+        for name in ("annual_rainfall", "potential_harvest") + TANK_METRICS
+    }
+    for idx, rain in water_balance.region_groups(regions, n_sites, out):
+        result = simulate_scenarios(roof_area[idx], efficiency[idx], daily_demand[idx], tank_volume[idx], rain, **options)
+        for name, points in result.items():
+            if isinstance(points, dict):
+                for label, values in points.items():
+                    out[name][label][idx] = values
+    return out
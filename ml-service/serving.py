@@ -0,0 +1,370 @@
+"""Lean inference path for the ml-service.
+
+Importing this module pulls in NumPy and the standard library only. It holds
+the harvest arithmetic and a plain-array view of the fitted clustering
+pipeline (imputer statistics, scaler mean/scale, cluster centers), which is
+persisted next to the service as a model_artifact file and memory-mapped
+back on startup. Training code in
+``k_means_v3`` (pandas, scikit-learn, matplotlib) is imported lazily, only
+when the persisted model is missing or was fitted on different data.
+"""
+
+from __future__ import annotations
+
+import os
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+import metrics
+import model_artifact
+import region_store
+from model_registry import ModelRegistry
+
+DATA_PATH = Path(__file__).parent / "Bengaluru Rainfall Data.csv"
+# Committed artifact for the bundled dataset; refit and rewritten when the data changes.
+# Regenerate (byte-for-byte reproducible) from ml-service/ with:
+#   rm models/rainfall_model.npz && python -c "import serving; serving.MODEL_REGISTRY.warm()"
+MODEL_PATH = Path(os.environ.get("MODEL_ARTIFACT_PATH") or Path(__file__).parent / "models" / "rainfall_model.npz")
+DEFAULT_CLUSTERS = 3
+
+# Runoff coefficient per (normalized) roof type
+ROOF_COEFFICIENTS = {
+    'rcc': 0.85,
+    'concrete': 0.85,
+    'tile': 0.75,
+    'corrugated': 0.70,
+    'sheet': 0.70,
+    'asbestos': 0.65,
+    'poor': 0.65,
+    'thatch': 0.60,
+    'metal': 0.80,
+}
+DEFAULT_ROOF_COEFFICIENT = 0.70
+
+# Categorical roof-type codes: index into ROOF_TYPE_COEFFS. The last code is
+# reserved for unrecognized roof types and maps to the default coefficient.
+ROOF_TYPES = tuple(ROOF_COEFFICIENTS)
+ROOF_TYPE_CODES = {name: code for code, name in enumerate(ROOF_TYPES)}
+UNKNOWN_ROOF_CODE = len(ROOF_TYPES)
+ROOF_TYPE_COEFFS = np.array([ROOF_COEFFICIENTS[t] for t in ROOF_TYPES] + [DEFAULT_ROOF_COEFFICIENT])
+
+
+def _roof_code(roof_type) -> int:
+    return ROOF_TYPE_CODES.get(str(roof_type).strip().lower(), UNKNOWN_ROOF_CODE)
+
+
+def encode_roof_types(roof_types) -> np.ndarray:
+    """Map roof type strings to categorical codes (normalizing each distinct value once)."""
+    values = np.asarray(roof_types, dtype=object).reshape(-1)
+    seen: dict = {}
+    codes = np.empty(len(values), dtype=np.intp)
+    for i, value in enumerate(values):
+        code = seen.get(value)
+        if code is None:
+            code = seen[value] = _roof_code(value)
+        codes[i] = code
+    return codes
+
+
+def predict_harvest_array(
+    roof_area,
+    roof_type_codes,
+    rainfall,
+    roof_slope=5.0,
+    catchment_eff=None
+) -> dict:
+    """
+    Array form of the harvest arithmetic; all arguments broadcast together.
+
+    ``roof_type_codes`` come from encode_roof_types. ``catchment_eff`` may be
+    None, or an array where NaN means "derive from roof type and slope".
+    Returns arrays for potential harvest (litres/year), recommended tank
+    volume (litres) and efficiency (%).
+    """
+    roof_area = np.asarray(roof_area, dtype=float)
+    rainfall = np.asarray(rainfall, dtype=float)
+    roof_slope = np.asarray(roof_slope, dtype=float)
+
+    coeff = ROOF_TYPE_COEFFS[np.asarray(roof_type_codes, dtype=np.intp)]
+    # Adjust for slope: mild bonus up to +5% if slope between 5 and 25 degrees
+    coeff = np.where((roof_slope >= 5) & (roof_slope <= 25), coeff * 1.03, coeff)
+    coeff = np.minimum(coeff, 0.9)
+
+    if catchment_eff is None:
+        eff = coeff
+    else:
+        override = np.asarray(catchment_eff, dtype=float)
+        eff = np.where(np.isnan(override), coeff, np.clip(override, 0.0, 1.0))
+
+    potential_water_save_l_per_year = rainfall * roof_area * eff
+    # Recommended tank volume: 1.5 months of average collection
+    tank_volume_l = potential_water_save_l_per_year / 12.0 * 1.5
+
+    return {
+        "potential_harvest": potential_water_save_l_per_year,
+        "tank_volume": tank_volume_l,
+        "efficiency": eff * 100,
+    }
+
+
+@dataclass(frozen=True)
+class ClusterModel:
+    """Fitted impute -> scale -> nearest-center pipeline as plain arrays."""
+
+    month_features: Tuple[str, ...]
+    imputer_statistics: np.ndarray
+    scaler_mean: np.ndarray
+    scaler_scale: np.ndarray
+    cluster_centers: np.ndarray
+    inertia: float
+    data_hash: str = ""
+    # Running per-month statistics of the training data (observed counts and
+    # sums of squared deviations, rows seen); only needed by incremental.py.
+    feature_counts: Optional[np.ndarray] = None
+    feature_m2: Optional[np.ndarray] = None
+    n_samples: int = 0
+
+    @property
+    def n_clusters(self) -> int:
+        return self.cluster_centers.shape[0]
+
+    @classmethod
+    def from_pipeline(cls, pipeline, month_features: Sequence[str], inertia: float, data_hash: str = "") -> "ClusterModel":
+        """Extract the learned parameters from a fitted sklearn imputer/scaler/kmeans Pipeline."""
+        steps = pipeline.named_steps
+        return cls(
+            month_features=tuple(month_features),
+            imputer_statistics=np.asarray(steps["imputer"].statistics_, dtype=float),
+            scaler_mean=np.asarray(steps["scaler"].mean_, dtype=float),
+            scaler_scale=np.asarray(steps["scaler"].scale_, dtype=float),
+            cluster_centers=np.asarray(steps["kmeans"].cluster_centers_, dtype=float),
+            inertia=float(inertia),
+            data_hash=data_hash,
+        )
+
+    def preprocess(self, X_raw) -> np.ndarray:
+        X_raw = np.asarray(X_raw, dtype=float)
+        if X_raw.ndim == 1:
+            X_raw = X_raw.reshape(1, -1)
+        if X_raw.shape[1] != len(self.month_features):
+            raise ValueError(f"Expected {len(self.month_features)} features, got {X_raw.shape[1]}")
+        X_imp = np.where(np.isnan(X_raw), self.imputer_statistics, X_raw)
+        return (X_imp - self.scaler_mean) / self.scaler_scale
+
+    def distances(self, X_raw) -> np.ndarray:
+        Xs = self.preprocess(X_raw)
+        return ((Xs[:, None, :] - self.cluster_centers) ** 2).sum(axis=2) ** 0.5
+
+    def predict(self, X_raw) -> np.ndarray:
+        return self.distances(X_raw).argmin(axis=1)
+
+    def save(self, target) -> None:
+        """Write a model artifact (see model_artifact) to a path or binary file object."""
+        arrays = {
+            "imputer_statistics": self.imputer_statistics,
+            "scaler_mean": self.scaler_mean,
+            "scaler_scale": self.scaler_scale,
+            "cluster_centers": self.cluster_centers,
+        }
+        header = {
+            "month_features": list(self.month_features),
+            "k": self.n_clusters,
+            "inertia": self.inertia,
+            "data_hash": self.data_hash,
+        }
+        if self.feature_counts is not None and self.feature_m2 is not None:
+            arrays["feature_counts"] = self.feature_counts
+            arrays["feature_m2"] = self.feature_m2
+            header["n_samples"] = self.n_samples
+        model_artifact.save_artifact(target, arrays, header)
+
+    @classmethod
+    def load(cls, source, mmap: bool = True) -> "ClusterModel":
+        header, arrays = model_artifact.load_artifact(source, mmap=mmap)
+        model = cls(
+            month_features=tuple(header["month_features"]),
+            imputer_statistics=arrays["imputer_statistics"],
+            scaler_mean=arrays["scaler_mean"],
+            scaler_scale=arrays["scaler_scale"],
+            cluster_centers=arrays["cluster_centers"],
+            inertia=float(header["inertia"]),
+            data_hash=header.get("data_hash", ""),
+            feature_counts=arrays.get("feature_counts"),
+            feature_m2=arrays.get("feature_m2"),
+            n_samples=int(header.get("n_samples", 0)),
+        )
+        if model.n_clusters != header["k"]:
+            raise model_artifact.ArtifactError(f"Header says k={header['k']} but {model.n_clusters} centers are stored")
+        return model
+
+
+def _load_persisted(data_hash: str) -> Optional[ClusterModel]:
+    if not MODEL_PATH.exists():
+        return None
+    try:
+        model = ClusterModel.load(MODEL_PATH)
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile) as exc:
+        print(f"[Model] Ignoring unreadable model at {MODEL_PATH}: {exc}")
+        return None
+    if model.data_hash != data_hash or model.n_clusters != DEFAULT_CLUSTERS:
+        return None
+    return model
+
+
+def load_or_fit(path: Path, data_hash: str) -> Tuple[ClusterModel, str]:
+    """Load the persisted model for ``data_hash`` or fit (and persist) a new one."""
+    is_service_data = Path(path).resolve() == DATA_PATH.resolve()
+    if is_service_data:
+        model = _load_persisted(data_hash)
+        if model is not None:
+            return model, "artifact"
+
+    import k_means_v3  # training stack: pandas, scikit-learn
+
+    pipeline, labels, inertia, elapsed = k_means_v3.fit_rainfall_model(path, k=DEFAULT_CLUSTERS)
+    model = ClusterModel.from_pipeline(pipeline, k_means_v3.MONTH_ORDER, inertia, data_hash)
+    if is_service_data:
+        try:
+            model.save(MODEL_PATH)
+        except OSError as exc:
+            print(f"[Model] Could not persist model to {MODEL_PATH}: {exc}")
+    return model, "fit"
+
+
+# Loaded (or fitted) once per process; refit only when the dataset content changes.
+MODEL_REGISTRY = ModelRegistry(DATA_PATH, load_or_fit)
+
+
+def resolve_rainfall(rainfall=None, region=None) -> Tuple[float, Optional[str]]:
+    """Return ``(annual rainfall, canonical region)``; an explicit rainfall wins over the region mean."""
+    if rainfall is not None:
+        return rainfall, None
+    if region is None:
+        raise ValueError("Either annual rainfall or a region is required")
+    with metrics.stage("region_lookup"):
+        store = region_store.get_store()
+        code = store.code(region)
+        return float(store.annual_means[code]), store.regions[code]
+
+
+def resolve_rainfall_batch(rainfalls, regions=None) -> np.ndarray:
+    """Vectorized resolve_rainfall: None/NaN rainfalls take their region's annual mean."""
+    rainfalls = np.array(
+        [np.nan if r is None else r for r in np.atleast_1d(np.asarray(rainfalls, dtype=object))],
+        dtype=float,
+    )
+    missing = np.isnan(rainfalls)
+    if not missing.any():
+        return rainfalls
+    if regions is None:
+        raise ValueError("Either annual rainfall or a region is required")
+    with metrics.stage("region_lookup"):
+        store = region_store.get_store()
+        codes = store.encode(np.broadcast_to(np.asarray(regions, dtype=object), rainfalls.shape)[missing])
+        if (codes < 0).any():
+            raise ValueError("Either annual rainfall or a region is required")
+        rainfalls[missing] = store.annual_means[codes]
+    return rainfalls
+
+
+def predict_harvest(
+    roof_area,
+    roof_type,
+    soil_type,
+    rainfall=None,
+    roof_slope=5.0,
+    catchment_eff=None,
+    region=None
+):
+    """
+    Calculate potential harvestable water (litres/year) and recommended tank volume (litres).
+
+    When ``rainfall`` is omitted, the annual mean of ``region`` (an IMD
+    subdivision, see region_store) is used and reported back in the result.
+    """
+    rainfall, resolved_region = resolve_rainfall(rainfall, region)
+    with metrics.stage("harvest"):
+        result = predict_harvest_array(
+            roof_area,
+            _roof_code(roof_type),
+            rainfall,
+            roof_slope,
+            np.nan if catchment_eff is None else catchment_eff,
+        )
+
+    # --- Get inertia from the warm model ---
+    with metrics.stage("model_lookup"):
+        model = MODEL_REGISTRY.get()
+
+    output = {
+        "potential_harvest": float(result["potential_harvest"]),
+        "tank_volume": float(result["tank_volume"]),
+        "efficiency": float(result["efficiency"]),
+        "inertia": model.inertia
+    }
+    if resolved_region is not None:
+        output["region"] = resolved_region
+        output["annual_rainfall"] = rainfall
+    return output
+
+
+def predict_harvest_batch(
+    roof_areas,
+    roof_types,
+    rainfalls,
+    roof_slopes=5.0,
+    catchment_effs=None,
+    regions=None
+):
+    """
+    Vectorized predict_harvest for many sites at once.
+
+    ``roof_types`` is a sequence of strings; the numeric arguments may be
+    sequences or scalars. ``catchment_effs`` entries may be None/NaN to
+    derive the efficiency from roof type and slope, as predict_harvest does.
+    ``rainfalls`` entries may be None/NaN where ``regions`` names a region.
+    Returns a dict of arrays plus the (shared) model inertia.
+    """
+    if regions is not None:
+        rainfalls = resolve_rainfall_batch(rainfalls, regions)
+    if catchment_effs is not None:
+        catchment_effs = np.array(
+            [np.nan if e is None else e for e in np.atleast_1d(np.asarray(catchment_effs, dtype=object))],
+            dtype=float,
+        )
+    with metrics.stage("harvest_batch"):
+        result = predict_harvest_array(
+            roof_areas,
+            encode_roof_types(roof_types),
+            rainfalls,
+            roof_slopes,
+            catchment_effs,
+        )
+    result["rainfall"] = np.broadcast_to(np.asarray(rainfalls, dtype=float), result["potential_harvest"].shape)
+    with metrics.stage("model_lookup"):
+        result["inertia"] = MODEL_REGISTRY.get().inertia
+    return result
+
+
+def assign_clusters(profiles) -> dict:
+    """Impute, scale and assign monthly rainfall profiles (rows of 12 values, None/NaN allowed)."""
+    fitted = MODEL_REGISTRY.get()
+    model: ClusterModel = fitted.model
+    X = np.array(
+        [[np.nan if v is None else v for v in row] for row in profiles],
+        dtype=float,
+    ).reshape(len(profiles), len(model.month_features))
+    with metrics.stage("cluster_assign"):
+        distances = model.distances(X)
+        labels = distances.argmin(axis=1)
+    return {
+        "clusters": labels.tolist(),
+        "distances": distances.tolist(),
+        "k": model.n_clusters,
+        "month_features": list(model.month_features),
+        "data_hash": fitted.data_hash,
+    }
@@ -0,0 +1,22 @@
+"""Shared fixtures; run from the ml-service directory with ``python -m pytest -q``."""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SERVICE_DIR))
+# Read at import: keep the background plot render off the test run.
+os.environ.setdefault("CLUSTER_PLOT_PRERENDER", "0")
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    import app
+
+    with TestClient(app.app) as test_client:
+        yield test_client
@@ -0,0 +1,77 @@
+import importlib.util
+import json
+from argparse import Namespace
+from pathlib import Path
+
+import pytest
+
+import k_means_v3
+
+SUITE_PATH = Path(__file__).resolve().parent.parent / "benchmarks" / "suite.py"
+spec = importlib.util.spec_from_file_location("bench_suite", SUITE_PATH)
+suite = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(suite)
+
+
+def write_results(path, seconds):
+    results = {name: {"seconds": value, "median_seconds": value, "rows": 1} for name, value in seconds.items()}
+    path.write_text(json.dumps({"format": suite.FORMAT_VERSION, "results": results}))
+    return path
+
+
+def compare(tmp_path, before, after, threshold=0.25, min_seconds=0.0005):
+    args = Namespace(baseline=write_results(tmp_path / "baseline.json", before),
+                     current=write_results(tmp_path / "current.json", after),
+                     threshold=threshold, min_seconds=min_seconds)
+    return suite.compare(args)
+
+
+def test_compare_fails_on_a_regression(tmp_path, capsys):
+    assert compare(tmp_path, {"fit": 0.010, "load": 0.020}, {"fit": 0.0130, "load": 0.020}) == 1
+    out = capsys.readouterr().out
+    assert "fit" in out.splitlines()[-1] and "REGRESSED" in out
+
+
+def test_compare_passes_within_threshold_and_on_speedups(tmp_path):
+    assert compare(tmp_path, {"fit": 0.010, "load": 0.020}, {"fit": 0.0124, "load": 0.005}) == 0
+
+
+def test_compare_ignores_sub_noise_slowdowns(tmp_path):
+    # +100% but only 0.2 ms slower: under --min-seconds.
+    assert compare(tmp_path, {"predict": 0.0002}, {"predict": 0.0004}) == 0
+    assert compare(tmp_path, {"predict": 0.0002}, {"predict": 0.0004}, min_seconds=0.0001) == 1
+
+
+def test_compare_lists_metrics_only_in_one_file(tmp_path, capsys):
+    assert compare(tmp_path, {"old": 0.01, "both": 0.01}, {"new": 5.0, "both": 0.01}) == 0
+    out = capsys.readouterr().out
+    assert any(line.startswith("old") and "only in baseline" in line for line in out.splitlines())
+    assert any(line.startswith("new") and "only in current" in line for line in out.splitlines())
+
+
+def test_synthetic_table_loads_in_the_bengaluru_layout(tmp_path):
+    path = tmp_path / "rain.csv"
+    suite.write_rainfall_csv(path, rows=50, seed=1)
+    frame = k_means_v3.load_and_clean(path, use_cache=False)
+    assert len(frame) == 50
+    assert not frame[k_means_v3.MONTH_ORDER].isna().any().any()
+
+
+def test_run_writes_results_that_compare_accepts(tmp_path):
+    output = tmp_path / "bench.json"
+    args = Namespace(sizes="5", ks="2", repeat=1, calls=2, legacy_max_rows=0, kmeans_max_rows=0,
+                     only=["harvest"], output=output)
+    assert suite.run(args) == 0
+    report = json.loads(output.read_text())
+    assert report["format"] == suite.FORMAT_VERSION and report["environment"]["numpy"]
+    assert set(report["results"]) == {"predict_harvest", "predict_harvest_batch/5"}
+    assert all(r["seconds"] <= r["median_seconds"] for r in report["results"].values())
+    assert suite.compare(Namespace(baseline=output, current=output, threshold=0.25, min_seconds=0.0)) == 0
+
+
+@pytest.mark.parametrize("calls", [1, 3])
+def test_measure_reports_per_call_seconds(calls):
+    seen = []
+    result = suite.measure(lambda: seen.append(1), repeat=2, calls=calls)
+    assert len(seen) == 2 * calls and result["repeat"] == 2 and result["calls"] == calls
+    assert 0 <= result["seconds"] <= result["median_seconds"]
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+CSV = "text/csv"
+HEADER = "roof_area,roof_type,soil_type,annual_rainfall\n"
+
+
+def stream(client, body, content_type=CSV):
+    response = client.post("/predict/stream", content=body, headers={"content-type": content_type})
+    assert response.status_code == 200
+    # Every line must be strict JSON: NaN/Infinity would break standard NDJSON clients.
+    return [json.loads(line, parse_constant=pytest.fail) for line in response.text.splitlines()]
+
+
+@pytest.mark.parametrize("value", ["nan", "inf", "-inf", "1e400"])
+def test_non_finite_numbers_are_row_errors(client, value):
+    rows = stream(client, HEADER + f"100,RCC,loam,{value}\n")
+    assert rows[0] == {"row": 0, "ok": False, "error": "annual_rainfall must be a finite number"}
+    assert rows[-1]["done"] and rows[-1]["failed"] == 1
+
+
+def test_row_errors_do_not_stop_the_stream(client):
+    rows = stream(client, HEADER + "abc,RCC,loam,900\n100,,loam,900\n100,RCC,loam,900\n")
+    assert [r.get("ok") for r in rows[:3]] == [False, False, True]
+    assert rows[-1] == {"done": True, "rows": 3, "failed": 2, "inertia": rows[-1]["inertia"]}
+
+
+def test_ndjson_rows_match_predict(client):
+    item = {"roof_area": 100, "roof_type": "RCC", "soil_type": "loam", "annual_rainfall": 900}
+    rows = stream(client, json.dumps({"id": "a", **item}) + "\n", "application/x-ndjson")
+    expected = client.post("/predict", json=item).json()
+    assert rows[0]["id"] == "a" and rows[0]["potential_harvest"] == pytest.approx(expected["potential_harvest"])
+
+
+def test_non_finite_ndjson_id_is_a_row_error(client):
+    line = '{"id": NaN, "roof_area": 100, "roof_type": "RCC", "soil_type": "loam", "annual_rainfall": 900}\n'
+    rows = stream(client, line, "application/x-ndjson")
+    assert rows[0]["ok"] is False
+
+
+def test_missing_header_column_is_reported_in_band(client):
+    rows = stream(client, "roof_area,roof_type\n100,RCC\n")
+    assert rows == [{"done": False, "error": rows[0]["error"], "rows": 0}]
+
+
+def test_unknown_content_type_is_rejected(client):
+    assert client.post("/predict/stream", content="x", headers={"content-type": "text/plain"}).status_code == 415
@@ -0,0 +1,23 @@
+import serving
+
+
+def test_empty_profiles_are_rejected(client):
+    assert client.post("/cluster", json={"profiles": []}).status_code == 422
+
+
+def test_profiles_need_twelve_months(client):
+    assert client.post("/cluster", json={"profiles": [[1.0] * 11]}).status_code == 422
+
+
+def test_profiles_are_assigned_like_the_model(client):
+    profiles = [[10.0] * 12, [None] * 12, [0, 5, 10, 40, 110, 80, 110, 140, 190, 160, 60, 15]]
+    body = client.post("/cluster", json={"profiles": profiles}).json()
+    model = serving.MODEL_REGISTRY.get().model
+    assert body["k"] == model.n_clusters
+    assert body["clusters"] == serving.assign_clusters(profiles)["clusters"]
+    assert all(min(row) == row[label] for row, label in zip(body["distances"], body["clusters"]))
+
+
+def test_assign_clusters_accepts_no_profiles():
+    result = serving.assign_clusters([])
+    assert result["clusters"] == [] and result["distances"] == []
@@ -0,0 +1,86 @@
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import cluster_plots
+import plot_render
+from cluster_plots import PlotCache, PlotTarget
+
+
+def make_target(name):
+    return PlotTarget(cluster_plots.plot_key(name, 2, np.array([0, 1])), np.zeros((2, 12)), np.array([0, 1]), 2, name)
+
+
+@pytest.fixture
+def gated_render(monkeypatch):
+    gate = threading.Event()
+    calls = []
+
+    def render(X, labels):
+        calls.append(len(labels))
+        gate.wait(5)
+        return b"png-%d" % len(calls)
+
+    monkeypatch.setattr(plot_render, "render_cluster_png", render)
+    return gate, calls
+
+
+def test_cluster_plot_etag_round_trip(client):
+    first = client.get("/clusters/plot.png")
+    assert first.status_code == 200 and first.headers["content-type"] == "image/png"
+    etag = first.headers["etag"]
+    assert client.get("/clusters/plot.png").headers["etag"] == etag
+    for header in (etag, "W/" + etag, f'"other", {etag}', "*"):
+        again = client.get("/clusters/plot.png", headers={"If-None-Match": header})
+        assert again.status_code == 304 and not again.content and again.headers["etag"] == etag
+    stale = client.get("/clusters/plot.png", headers={"If-None-Match": '"stale"'})
+    assert stale.status_code == 200 and stale.content == first.content
+
+
+def test_plot_key_depends_on_data_k_and_labels():
+    labels = np.array([0, 1, 1])
+    key = cluster_plots.plot_key("abc", 2, labels)
+    assert cluster_plots.plot_key("abc", 2, labels.astype(np.int32)) == key
+    assert key not in {cluster_plots.plot_key("abd", 2, labels), cluster_plots.plot_key("abc", 3, labels),
+                       cluster_plots.plot_key("abc", 2, np.array([0, 1, 0]))}
+
+
+def test_concurrent_submits_share_one_render(gated_render):
+    gate, calls = gated_render
+    cache = PlotCache(maxsize=2)
+    target = make_target("a")
+    first, second = cache.submit(target), cache.submit(target)
+    assert first is second and cache.stats()["rendering"] == 1
+    gate.set()
+    assert first.result(5) == b"png-1" and calls == [2]
+    assert cache.submit(target).result(0) == b"png-1" and cache.get(target.key) == b"png-1"
+    assert cache.stats()["renders"] == 1 and cache.stats()["rendering"] == 0
+
+
+def test_plot_cache_evicts_least_recently_used(gated_render):
+    gated_render[0].set()
+    cache = PlotCache(maxsize=2)
+    a, b, c = (make_target(name) for name in "abc")
+    cache.submit(a).result(5)
+    cache.submit(b).result(5)
+    cache.get(a.key)
+    cache.submit(c).result(5)
+    assert cache.get(a.key) is not None and cache.get(c.key) is not None
+    assert cache.get(b.key) is None
+
+
+def test_listen_registers_one_listener(monkeypatch):
+    listeners = []
+    monkeypatch.setattr(cluster_plots.serving, "MODEL_REGISTRY", SimpleNamespace(add_refit_listener=listeners.append))
+    monkeypatch.setattr(cluster_plots, "_listening", False)
+    cluster_plots.listen()
+    cluster_plots.listen()
+    assert listeners == [cluster_plots.prerender]
+
+
+def test_prerender_is_skipped_when_disabled(monkeypatch):
+    monkeypatch.setattr(cluster_plots, "PRERENDER", False)
+    monkeypatch.setattr(cluster_plots, "target_for", lambda fitted: pytest.fail("target built"))
+    cluster_plots.prerender(object())
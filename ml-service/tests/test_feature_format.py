@@ -0,0 +1,74 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from feature_format import featureFormat, featureFormatFrame
+
+FLAGS = [
+    dict(remove_NaN=nan, remove_all_zeroes=all_zero, remove_any_zeroes=any_zero, sort_keys=sort)
+    for nan, all_zero, any_zero, sort in itertools.product((True, False), repeat=4)
+]
+# Unsorted keys, 'NaN' strings, all-zero and some-zero rows, and a 'poi' label that is zero or one.
+ROWS = {
+    "lay": {"poi": 1, "salary": 200.0, "bonus": "NaN"},
+    "allen": {"poi": 0, "salary": 0.0, "bonus": 0.0},
+    "skilling": {"poi": 1, "salary": 0.0, "bonus": 50.0},
+    "fastow": {"poi": 0, "salary": "NaN", "bonus": "NaN"},
+    "baxter": {"poi": 0, "salary": 12.5, "bonus": 3.0},
+}
+
+
+def assert_identical(actual, expected):
+    assert actual.dtype == expected.dtype and actual.shape == expected.shape
+    np.testing.assert_array_equal(actual, expected)
+
+
+@pytest.mark.parametrize("flags", FLAGS)
+@pytest.mark.parametrize("features", [["poi", "salary", "bonus"], ["salary", "bonus"]])
+def test_dataframe_matches_dictionary_version(flags, features):
+    frame = pd.DataFrame.from_dict(ROWS, orient="index")
+    assert_identical(featureFormatFrame(frame, features, **flags), featureFormat(ROWS, features, **flags))
+
+
+@pytest.mark.parametrize("flags", FLAGS)
+def test_numeric_dataframe_with_nan_matches(flags):
+    rng = np.random.default_rng(1)
+    values = rng.choice([0.0, 0.0, 1.5, 7.0, np.nan], size=(40, 3))
+    keys = [f"k{i:02d}" for i in rng.permutation(40)]
+    features = ["a", "b", "c"]
+    frame = pd.DataFrame(values, index=keys, columns=features)
+    data = {key: dict(zip(features, row)) for key, row in zip(keys, values.tolist())}
+    assert_identical(featureFormatFrame(frame, features, **flags), featureFormat(data, features, **flags))
+
+
+@pytest.mark.parametrize("flags", FLAGS)
+@pytest.mark.parametrize("dtype", [float, object])
+def test_ndarray_matches_dictionary_keyed_by_row(flags, dtype):
+    features = ["poi", "salary", "bonus"]
+    rows = list(ROWS.values())
+    if dtype is float:
+        rows = [{f: (0.0 if v == "NaN" else v) for f, v in row.items()} for row in rows]
+    array = np.array([[row[f] for f in features] for row in rows], dtype=dtype)
+    data = dict(enumerate(rows))
+    assert_identical(featureFormatFrame(array, features, **flags), featureFormat(data, features, **flags))
+
+
+def test_empty_input_matches():
+    features = ["salary", "bonus"]
+    expected = featureFormat({}, features)
+    assert_identical(featureFormatFrame(pd.DataFrame(columns=features), features), expected)
+    assert_identical(featureFormatFrame(np.empty((0, 2)), features), expected)
+
+
+def test_every_row_filtered_matches():
+    data = {"a": {"x": 0.0}, "b": {"x": 0.0}}
+    frame = pd.DataFrame.from_dict(data, orient="index")
+    assert_identical(featureFormatFrame(frame, ["x"]), featureFormat(data, ["x"]))
+
+
+def test_missing_feature_returns_none_like_dictionary_version():
+    frame = pd.DataFrame.from_dict(ROWS, orient="index")
+    assert featureFormatFrame(frame, ["salary", "stock"]) is None
+    assert featureFormat(ROWS, ["salary", "stock"]) is None
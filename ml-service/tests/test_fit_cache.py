@@ -0,0 +1,97 @@
+import os
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import fit_cache
+from fit_cache import FitCache, fit_key
+
+X = np.arange(12, dtype=float).reshape(4, 3)
+PAYLOAD = np.zeros(1024)  # ~8 KB per entry once pickled
+
+
+def age(cache, key, seconds):
+    path = cache._path(key)
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns - seconds * 10**9))
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    cache = FitCache(tmp_path, max_bytes=20_000)
+    cache.put("a", PAYLOAD)
+    age(cache, "a", 20)
+    cache.put("b", PAYLOAD)
+    age(cache, "b", 10)
+    assert cache.get("a") is not None  # the hit makes "a" the most recent
+    cache.put("c", PAYLOAD)
+    assert cache.evictions == 1
+    assert cache._path("a").exists() and cache._path("c").exists()
+    assert not cache._path("b").exists()
+
+
+def test_newest_entry_survives_a_tiny_budget(tmp_path):
+    cache = FitCache(tmp_path, max_bytes=1)
+    cache.put("a", PAYLOAD)
+    age(cache, "a", 10)
+    cache.put("b", PAYLOAD)
+    assert not cache._path("a").exists() and cache.get("b") is not None
+
+
+@pytest.mark.parametrize("damage", ["garbage", "truncated"])
+def test_unreadable_entry_falls_back_to_refit(tmp_path, damage):
+    cache = FitCache(tmp_path, max_bytes=10**6)
+    params = {"k": 3}
+    path = cache._path(fit_key(X, **params))
+    if damage == "garbage":
+        path.write_bytes(b"not a joblib file")
+    else:
+        cache.put(fit_key(X, **params), {"labels": np.arange(1000)})
+        path.write_bytes(path.read_bytes()[: path.stat().st_size // 2])
+
+    calls = []
+    value, hit = cache.get_or_fit(X, params, lambda: calls.append(1) or {"labels": [0, 1, 0, 1]})
+    assert not hit and calls == [1] and value == {"labels": [0, 1, 0, 1]}
+    assert cache.get_or_fit(X, params, lambda: pytest.fail("refit after repair")) == (value, True)
+
+
+def test_key_changes_with_inputs_params_and_sklearn_version(monkeypatch):
+    base = fit_key(X, k=3, random_state=42)
+    assert fit_key(X.copy(), random_state=42, k=3) == base
+    changed = X.copy()
+    changed[0, 0] += 1e-9
+    assert fit_key(changed, k=3, random_state=42) != base
+    assert fit_key(X.reshape(3, 4), k=3, random_state=42) != base
+    assert fit_key(X, k=4, random_state=42) != base
+    monkeypatch.setattr(fit_cache, "sklearn", SimpleNamespace(__version__="0.0.0"))
+    assert fit_key(X, k=3, random_state=42) != base
+
+
+def test_writers_are_serialized_by_the_lock(tmp_path):
+    cache = FitCache(tmp_path, max_bytes=10**6)
+    done = threading.Event()
+    with cache._locked():
+        writer = threading.Thread(target=lambda: (cache.put("a", PAYLOAD), done.set()))
+        writer.start()
+        assert not done.wait(0.3)
+    writer.join(5)
+    assert done.is_set() and cache.get("a") is not None
+
+
+def test_concurrent_writers_leave_a_consistent_directory(tmp_path):
+    cache = FitCache(tmp_path, max_bytes=50_000)
+    keys = [f"k{i}" for i in range(16)]
+    threads = [threading.Thread(target=cache.put, args=(key, PAYLOAD + i)) for i, key in enumerate(keys)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not list(tmp_path.glob("*.tmp"))
+    stats = cache.stats()
+    assert 1 <= stats["entries"] and stats["bytes"] <= cache.max_bytes
+    assert stats["entries"] + cache.evictions == len(keys)
+    for path in tmp_path.glob(f"*{fit_cache.SUFFIX}"):
+        i = keys.index(path.name[: -len(fit_cache.SUFFIX)])
+        np.testing.assert_array_equal(cache.get(keys[i]), PAYLOAD + i)
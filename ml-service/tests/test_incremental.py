@@ -0,0 +1,63 @@
+import shutil
+
+import numpy as np
+import pytest
+
+import incremental
+import k_means_v3
+import serving
+from model_registry import ModelRegistry, file_sha256
+from serving import ClusterModel
+
+NEW_YEARS = [
+    {"Year": 2011, **{m: 40.0 + 10 * i for i, m in enumerate(k_means_v3.MONTH_ORDER)}},
+    # A missing month is imputed with the running mean, like load_and_clean does.
+    {"Year": 2012, **{m: 25.0 + 12 * i for i, m in enumerate(k_means_v3.MONTH_ORDER)}, "July": None},
+]
+DROUGHT_YEARS = [{"Year": year, **{m: 0.0 for m in k_means_v3.MONTH_ORDER}} for year in range(2011, 2031)]
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    path = tmp_path / "rain.csv"
+    shutil.copy(serving.DATA_PATH, path)
+    return path
+
+
+def test_append_matches_full_refit_statistics(dataset, tmp_path):
+    model_path = tmp_path / "model.npz"
+    result = incremental.append_years(NEW_YEARS, path=dataset, model_path=model_path)
+    model = result["model"]
+
+    pipeline, labels, _inertia, _ = k_means_v3.fit_rainfall_model(dataset)
+    np.testing.assert_allclose(model.imputer_statistics, pipeline.named_steps["imputer"].statistics_, rtol=1e-10)
+    np.testing.assert_allclose(model.scaler_mean, pipeline.named_steps["scaler"].mean_, rtol=1e-10)
+    np.testing.assert_allclose(model.scaler_scale, pipeline.named_steps["scaler"].scale_, rtol=1e-10)
+    assert model.n_samples == len(labels) == len(result["labels"])
+    assert model.data_hash == file_sha256(dataset)
+
+    saved = ClusterModel.load(model_path, mmap=False)
+    np.testing.assert_array_equal(saved.cluster_centers, model.cluster_centers)
+
+
+def test_append_refuses_existing_years(dataset, tmp_path):
+    before = dataset.read_bytes()
+    with pytest.raises(ValueError, match="already in the dataset"):
+        incremental.append_years([{"Year": 1901, "Jan": 1.0}], path=dataset, model_path=tmp_path / "model.npz")
+    assert dataset.read_bytes() == before
+
+
+def test_tank_simulation_reflects_appended_years(client, dataset, tmp_path, monkeypatch):
+    model_path = tmp_path / "model.npz"
+    monkeypatch.setattr(serving, "DATA_PATH", dataset)
+    monkeypatch.setattr(serving, "MODEL_PATH", model_path)
+    monkeypatch.setattr(serving, "MODEL_REGISTRY", ModelRegistry(dataset, serving.load_or_fit))
+    request = {"sites": [{"roof_area": 100, "roof_type": "RCC", "dwellers": 4}], "tank_volumes": [5000]}
+
+    before = client.post("/tank/simulate", json=request).json()["results"][0]
+    incremental.append_years(DROUGHT_YEARS, path=dataset, model_path=model_path)
+    after = client.post("/tank/simulate", json=request).json()["results"][0]
+
+    assert (before["first_year"], before["last_year"]) == (1901, 2010)
+    assert (after["first_year"], after["last_year"]) == (1901, 2030)
+    assert after["reliability"][0] < before["reliability"][0]
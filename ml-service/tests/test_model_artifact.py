@@ -0,0 +1,44 @@
+import io
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import model_artifact
+import serving
+from serving import ClusterModel
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+
+# Modules copied verbatim into the standalone "ML Model" scripts.
+SHARED_MODULES = ("model_artifact.py", "fit_cache.py", "k_sweep.py", "plot_render.py", "rainfall_cache.py")
+
+
+def test_artifact_round_trip_and_bytes_are_reproducible():
+    model = ClusterModel.load(serving.MODEL_PATH, mmap=False)
+    first, second = io.BytesIO(), io.BytesIO()
+    model.save(first)
+    model.save(second)
+    assert first.getvalue() == second.getvalue()
+    first.seek(0)
+    loaded = ClusterModel.load(first, mmap=False)
+    np.testing.assert_array_equal(loaded.cluster_centers, model.cluster_centers)
+    assert loaded.data_hash == model.data_hash
+
+
+def test_committed_artifact_is_in_canonical_form():
+    model = ClusterModel.load(serving.MODEL_PATH, mmap=False)
+    buffer = io.BytesIO()
+    model.save(buffer)
+    assert buffer.getvalue() == serving.MODEL_PATH.read_bytes()
+
+
+def test_object_arrays_are_refused():
+    with pytest.raises(model_artifact.ArtifactError):
+        model_artifact.save_artifact(io.BytesIO(), {"x": np.array([object()])}, {})
+
+
+@pytest.mark.parametrize("name", SHARED_MODULES)
+def test_ml_model_copies_stay_in_sync(name):
+    copy = SERVICE_DIR.parent / "ML Model" / "Rain Water Prediction" / name
+    assert copy.read_bytes() == (SERVICE_DIR / name).read_bytes()
@@ -0,0 +1,63 @@
+import os
+from types import SimpleNamespace
+
+from model_registry import ModelRegistry, file_sha256
+
+
+def make_registry(path):
+    calls = []
+
+    def fit(fit_path, data_hash):
+        calls.append(data_hash)
+        return SimpleNamespace(inertia=float(len(calls))), "fit"
+
+    return ModelRegistry(path, fit), calls
+
+
+def test_fit_fn_receives_content_hash(tmp_path):
+    data = tmp_path / "rain.csv"
+    data.write_text("a,b\n1,2\n")
+    registry, calls = make_registry(data)
+    model = registry.warm()
+    assert calls == [file_sha256(data)]
+    assert model.data_hash == calls[0] and model.version == 1
+    assert registry.get() is model and registry.is_current()
+
+
+def test_touch_does_not_refit(tmp_path):
+    data = tmp_path / "rain.csv"
+    data.write_text("a,b\n1,2\n")
+    registry, calls = make_registry(data)
+    model = registry.warm()
+    st = os.stat(data)
+    os.utime(data, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert not registry.is_current()
+    assert registry.get() is model
+    assert len(calls) == 1 and registry.is_current()
+
+
+def test_content_change_refits_and_notifies(tmp_path):
+    data = tmp_path / "rain.csv"
+    data.write_text("a,b\n1,2\n")
+    registry, calls = make_registry(data)
+    seen = []
+    registry.add_refit_listener(seen.append)
+    first = registry.warm()
+    data.write_text("a,b\n1,2\n3,4\n")
+    second = registry.get()
+    assert second is not first and second.version == 2
+    assert second.data_hash == file_sha256(data) != first.data_hash
+    assert seen == [first, second]
+
+
+def test_data_hash_tracks_content_without_fitting(tmp_path):
+    data = tmp_path / "rain.csv"
+    data.write_text("a,b\n1,2\n")
+    registry, calls = make_registry(data)
+    assert registry.known_data_hash() is None
+    assert registry.current_data_hash() == file_sha256(data)
+    data.write_text("a,b\n1,2\n5,6\n")
+    assert registry.known_data_hash() is None
+    assert registry.current_data_hash() == file_sha256(data)
+    assert registry.known_data_hash() == file_sha256(data)
+    assert calls == []
@@ -0,0 +1,46 @@
+import pstats
+
+import profiling
+
+SITE = {"roof_area": 100, "roof_type": "RCC", "dwellers": 4}
+# Enough simulated cells that the worker thread is sampled several times.
+SIMULATION = {"sites": [SITE] * 200, "tank_volumes": [1000.0 * (i + 1) for i in range(64)]}
+
+
+def test_admin_endpoints_need_a_configured_token(client, monkeypatch):
+    monkeypatch.setattr(profiling, "ENABLED", True)
+    monkeypatch.setattr(profiling, "ADMIN_TOKEN", None)
+    assert client.get("/admin/profiles").status_code == 404
+    response = client.get("/health", headers={"X-Profile": "1"})
+    assert "x-profile-id" not in response.headers
+
+
+def test_admin_endpoints_check_the_token(client, monkeypatch):
+    monkeypatch.setattr(profiling, "ADMIN_TOKEN", "s3cret")
+    assert client.get("/admin/profiles").status_code == 401
+    assert client.get("/admin/profiles", headers={"X-Admin-Token": "wrong"}).status_code == 401
+    assert "x-profile-id" not in client.get("/health", headers={"X-Profile": "1", "X-Admin-Token": "wrong"}).headers
+    profiled = client.get("/health", headers={"X-Profile": "1", "X-Admin-Token": "s3cret"})
+    profile_id = profiled.headers["x-profile-id"]
+    listing = client.get("/admin/profiles", headers={"Authorization": "Bearer s3cret"}).json()
+    assert profile_id in [p["id"] for p in listing["profiles"]]
+
+
+def test_profile_samples_only_the_request_worker(client, monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "ADMIN_TOKEN", "s3cret")
+    monkeypatch.setattr(profiling, "SAMPLE_INTERVAL", 0.001)
+    admin = {"X-Admin-Token": "s3cret"}
+    response = client.post("/tank/simulate", json=SIMULATION, headers={"X-Profile": "1", **admin})
+    profile_id = response.headers["x-profile-id"]
+
+    collapsed = client.get(f"/admin/profiles/{profile_id}.collapsed", headers=admin).text
+    stacks = collapsed.splitlines()
+    assert stacks and all(stack.startswith("worker;") for stack in stacks)
+    assert any("simulate_storage" in stack for stack in stacks)
+    # Nothing from the event loop, which other requests share.
+    assert "base_events.py" not in collapsed and "event-loop" not in collapsed
+
+    path = tmp_path / "profile.pstats"
+    path.write_bytes(client.get(f"/admin/profiles/{profile_id}.pstats", headers=admin).content)
+    functions = {func for _file, _line, func in pstats.Stats(str(path)).stats}
+    assert "simulate_storage" in functions
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import k_means_v3
+from rainfall_stats import RunningMoments
+
+MONTHS = k_means_v3.MONTH_ORDER
+
+
+@pytest.fixture(scope="module")
+def rainfall_csv(tmp_path_factory):
+    """Bengaluru layout with missing cells, a non-numeric year row and a month with one observation."""
+    rng = np.random.default_rng(3)
+    values = rng.gamma(2.0, 40.0, (57, len(MONTHS))).round(1)
+    values[rng.random(values.shape) < 0.1] = np.nan
+    values[1:, 0] = np.nan
+    path = tmp_path_factory.mktemp("stats") / "rain.csv"
+    lines = [",".join(f'"{c}"' for c in ["Month /Year"] + MONTHS + [""])]
+    for i, row in enumerate(values):
+        cells = ["" if np.isnan(v) else str(v) for v in row]
+        lines.append(",".join(f'"{c}"' for c in [str(1900 + i)] + cells + [""]))
+        if i == 20:
+            lines.append(",".join(f'"{c}"' for c in ["Total"] + ["999"] * len(MONTHS) + [""]))
+    path.write_text("\n".join(lines) + "\n")
+    return path, pd.DataFrame(values, columns=MONTHS)
+
+
+@pytest.mark.parametrize("chunksize", [1, 7, 56, 57, 1000])
+def test_streamed_statistics_match_in_memory(rainfall_csv, chunksize):
+    path, observed = rainfall_csv
+    expected = k_means_v3.rainfall_statistics(k_means_v3.load_and_clean(path, use_cache=False))
+    streamed = k_means_v3.stream_rainfall_statistics(path, chunksize=chunksize)
+
+    pd.testing.assert_series_equal(streamed["monthly_means"], expected["monthly_means"], check_names=False, rtol=1e-12)
+    assert streamed["total_predicted_mm"] == pytest.approx(expected["total_predicted_mm"], rel=1e-12)
+    assert streamed["rows"] == len(observed)
+    assert streamed["monthly_counts"].tolist() == observed.notna().sum().tolist()
+    # Variances are over observed values only; a single observation has none (ddof=1).
+    np.testing.assert_allclose(streamed["monthly_std"].to_numpy(), observed.std().to_numpy(), rtol=1e-10)
+    assert np.isnan(streamed["monthly_std"]["Jan"])
+
+
+def test_running_moments_merge_is_order_independent():
+    rng = np.random.default_rng(0)
+    data = rng.normal(50, 10, (200, 3))
+    data[rng.random(data.shape) < 0.2] = np.nan
+    whole = RunningMoments.zeros(3)
+    whole.update(data)
+    pieces = RunningMoments.zeros(3)
+    for start in (150, 0, 37, 120):
+        pieces.update(data[start:start + 30])
+    pieces.update(data[30:37])
+    pieces.update(data[67:120])
+    pieces.update(data[180:])
+    np.testing.assert_array_equal(pieces.count, whole.count)
+    np.testing.assert_allclose(pieces.means, np.nanmean(data, axis=0), rtol=1e-12)
+    np.testing.assert_allclose(pieces.variances(), np.nanvar(data, axis=0, ddof=1), rtol=1e-10)
+
+
+def test_all_missing_block_changes_nothing():
+    moments = RunningMoments.zeros(2)
+    moments.update(np.array([[1.0, np.nan], [3.0, np.nan]]))
+    moments.update(np.full((4, 2), np.nan))
+    assert moments.count.tolist() == [2, 0]
+    assert moments.means[0] == 2.0 and np.isnan(moments.means[1])
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+import region_store
+
+PREDICT = {"roof_area": 100, "roof_type": "RCC", "soil_type": "loam"}
+
+
+@pytest.fixture(scope="module")
+def region():
+    return region_store.get_store().regions[0]
+
+
+def test_region_lookup_is_case_insensitive(client, region):
+    listing = client.get("/regions").json()
+    assert region in listing["regions"]
+    summary = client.get(f"/regions/{region.upper()}").json()
+    assert summary["region"] == region and summary["years"] > 0
+
+
+def test_unknown_region_is_404_and_422(client):
+    assert client.get("/regions/Atlantis").status_code == 404
+    assert client.post("/predict", json={**PREDICT, "region": "Atlantis"}).status_code == 422
+
+
+def test_predict_uses_the_region_mean(client, region):
+    body = client.post("/predict", json={**PREDICT, "region": region.lower()}).json()
+    assert body["region"] == region
+    assert body["annual_rainfall"] == pytest.approx(client.get(f"/regions/{region}").json()["annual_mean"])
+
+
+def test_explicit_rainfall_wins_over_region(client, region):
+    body = client.post("/predict", json={**PREDICT, "region": region, "annual_rainfall": 900}).json()
+    assert "region" not in body
+
+
+def test_stream_echoes_resolved_region_like_batch(client, region):
+    batch = client.post("/predict/batch", json={"items": [{**PREDICT, "region": region.lower()}]}).json()["results"][0]
+    response = client.post(
+        "/predict/stream",
+        content=f"roof_area,roof_type,soil_type,region\n100,RCC,loam,{region.lower()}\n",
+        headers={"content-type": "text/csv"},
+    )
+    streamed = json.loads(response.text.splitlines()[0])
+    assert streamed["region"] == batch["region"] == region
+    assert streamed["annual_rainfall"] == pytest.approx(batch["annual_rainfall"])
+    assert streamed["potential_harvest"] == pytest.approx(batch["potential_harvest"])
@@ -0,0 +1,78 @@
+from response_cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    clock = Clock()
+    cache = TTLCache(maxsize=4, ttl=10, clock=clock)
+    cache.put("a", 1)
+    clock.now = 9.9
+    assert cache.get("a") == 1
+    clock.now = 10.0
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"], stats["size"]) == (1, 1, 1, 0)
+
+
+def test_put_refreshes_expiry():
+    clock = Clock()
+    cache = TTLCache(maxsize=4, ttl=10, clock=clock)
+    cache.put("a", 1)
+    clock.now = 8
+    cache.put("a", 2)
+    clock.now = 15
+    assert cache.get("a") == 2
+
+
+def test_least_recently_used_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_zero_size_disables_and_clear_invalidates():
+    disabled = TTLCache(maxsize=0)
+    disabled.put("a", 1)
+    assert disabled.get("a") is None
+    cache = TTLCache(maxsize=2)
+    cache.put("a", 1)
+    cache.clear()
+    assert cache.get("a") is None and cache.stats()["invalidations"] == 1
+
+
+PREDICT = {"roof_area": 123.0, "roof_type": "Tile", "soil_type": "clay", "annual_rainfall": 812.5}
+
+
+def test_predict_results_are_cached_per_data_hash(client):
+    import app
+
+    app.RESULT_CACHE.clear()
+    first = client.post("/predict", json=PREDICT).json()
+    hits = app.RESULT_CACHE.hits
+    assert client.post("/predict", json=PREDICT).json() == first
+    assert app.RESULT_CACHE.hits == hits + 1
+    data_hash = app.serving.MODEL_REGISTRY.get().data_hash
+    assert app.RESULT_CACHE.get((data_hash,) + app._cache_key(app.AssessmentInput(**PREDICT))) == first
+
+
+def test_results_from_another_dataset_are_not_cached(client, monkeypatch):
+    import app
+
+    # As if a process worker had refit on data the parent has not seen yet.
+    monkeypatch.setattr(app, "_run_prediction", lambda data: ("other-data", {"potential_harvest": 1.0}))
+    app.RESULT_CACHE.clear()
+    body = {**PREDICT, "roof_area": 321.0}
+    assert client.post("/predict", json=body).json() == {"potential_harvest": 1.0}
+    assert app.RESULT_CACHE.stats()["size"] == 0
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+import scenarios
+import water_balance
+
+SITE = {"roof_area": 100, "roof_type": "RCC", "dwellers": 4}
+SITES = dict(roof_area=[100.0, 60.0], efficiency=[0.8, 0.7], daily_demand=[540.0, 200.0], tank_volume=[5000.0, 2000.0])
+
+
+@pytest.fixture(scope="module")
+def record():
+    return water_balance.monthly_series()[1]
+
+
+def test_blocks_are_consecutive_years_wrapping_at_the_end():
+    years = scenarios.block_bootstrap_years(10, n_scenarios=50, horizon_years=7, block_years=3, seed=1)
+    assert years.shape == (50, 7) and years.min() >= 0 and years.max() < 10
+    for block_start in (0, 3):
+        np.testing.assert_array_equal(years[:, block_start + 1], (years[:, block_start] + 1) % 10)
+        np.testing.assert_array_equal(years[:, block_start + 2], (years[:, block_start] + 2) % 10)
+
+
+def test_results_do_not_depend_on_chunk_size(record):
+    runs = [scenarios.simulate_scenarios(**SITES, monthly_rainfall=record, n_scenarios=40, horizon_years=5,
+                                         seed=11, chunk_scenarios=chunk) for chunk in (1, 7, None)]
+    assert [run.pop("chunk_scenarios") for run in runs] == [1, 7, 40]
+    for run in runs[1:]:
+        for name, points in runs[0].items():
+            for label, values in points.items():
+                np.testing.assert_array_equal(run[name][label], values, err_msg=f"{name} {label}")
+
+
+def test_percentiles_match_per_scenario_simulation(record):
+    n_scenarios, horizon = 9, 4
+    result = scenarios.simulate_scenarios(**SITES, monthly_rainfall=record, n_scenarios=n_scenarios,
+                                          horizon_years=horizon, seed=5)
+    years = scenarios.block_bootstrap_years(len(record), n_scenarios, horizon, seed=5)
+    for s in range(2):
+        per_scenario = [water_balance.simulate_storage(
+            SITES["roof_area"][s], SITES["efficiency"][s], SITES["daily_demand"][s],
+            [SITES["tank_volume"][s]], record[idx])["reliability"][0, 0] for idx in years]
+        assert result["reliability"]["p50"][s] == pytest.approx(np.percentile(per_scenario, 50))
+    annual = record.sum(axis=1)[years].mean(axis=1)
+    assert result["annual_rainfall"]["p90"][0] == pytest.approx(np.percentile(annual, 90))
+    assert result["potential_harvest"]["p10"][1] == pytest.approx(60.0 * 0.7 * np.percentile(annual, 10))
+
+
+def test_scenarios_reject_negative_seed(client):
+    assert client.post("/scenarios", json={"sites": [SITE], "seed": -1, "n_scenarios": 5}).status_code == 422
+
+
+def test_scenarios_are_seeded(client):
+    payload = {"sites": [SITE], "seed": 7, "n_scenarios": 20}
+    first = client.post("/scenarios", json=payload).json()
+    assert client.post("/scenarios", json=payload).json() == first
+    assert set(first["results"][0]["reliability"]) == {"p10", "p50", "p90"}
+    other = client.post("/scenarios", json={**payload, "seed": 8}).json()
+    assert other["results"][0]["annual_rainfall"] != first["results"][0]["annual_rainfall"]
@@ -0,0 +1,145 @@
+import numpy as np
+import pytest
+
+import water_balance
+from water_balance import DAYS_IN_MONTH, DEFICIT_TOLERANCE_L, simulate_storage
+
+SITE = {"roof_area": 100, "roof_type": "RCC", "dwellers": 4}
+
+
+def reference(roof_area, efficiency, daily_demand, volume, rain, initial_fill=0.0, rule="ybs"):
+    """One site, one tank, month by month in plain Python."""
+    months = [float(r) for r in np.asarray(rain).reshape(-1)]
+    storage = volume * initial_fill
+    supplied = overflow = 0.0
+    met = 0
+    for t, mm in enumerate(months):
+        demand = daily_demand * DAYS_IN_MONTH[t % 12]
+        storage += roof_area * efficiency * mm
+        if rule == "yas" and storage > volume:
+            overflow += storage - volume
+            storage = volume
+        draw = min(storage, demand)
+        storage -= draw
+        supplied += draw
+        if rule == "ybs" and storage > volume:
+            overflow += storage - volume
+            storage = volume
+        met += demand - draw <= DEFICIT_TOLERANCE_L
+    years = len(months) / 12
+    total_demand = daily_demand * DAYS_IN_MONTH.sum() * years
+    return {
+        "reliability": met / len(months),
+        "volumetric_reliability": supplied / total_demand if total_demand > 0 else 1.0,
+        "supplied_l": supplied / years,
+        "overflow_l": overflow / years,
+        "deficit_l": (total_demand - supplied) / years,
+    }
+
+
+@pytest.fixture
+def grid():
+    rng = np.random.default_rng(3)
+    rain = rng.gamma(0.8, 90.0, size=(6, 12))
+    rain[:, [0, 1, 11]] = 0.0  # dry winters force deficits
+    return {
+        "roof_area": np.array([40.0, 100.0, 250.0]),
+        "efficiency": np.array([0.8, 0.85, 0.6]),
+        "daily_demand": np.array([300.0, 540.0, 0.0]),
+        "tank_volumes": np.array([500.0, 4000.0, 20000.0, 150000.0]),
+        "rain": rain,
+    }
+
+
+def assert_matches_reference(result, grid, rains, initial_fill, rule):
+    for s in range(len(grid["roof_area"])):
+        for v, volume in enumerate(grid["tank_volumes"]):
+            expected = reference(grid["roof_area"][s], grid["efficiency"][s], grid["daily_demand"][s],
+                                 volume, rains[s], initial_fill, rule)
+            for name, value in expected.items():
+                assert result[name][s, v] == pytest.approx(value, rel=1e-9, abs=1e-6), (name, s, v)
+
+
+@pytest.mark.parametrize("rule", water_balance.OPERATING_RULES)
+@pytest.mark.parametrize("initial_fill", [0.0, 0.5])
+def test_simulate_storage_matches_scalar_loop(grid, rule, initial_fill):
+    result = simulate_storage(grid["roof_area"], grid["efficiency"], grid["daily_demand"],
+                              grid["tank_volumes"], grid["rain"], initial_fill, rule)
+    assert_matches_reference(result, grid, [grid["rain"]] * 3, initial_fill, rule)
+    # The grid exercises spills, shortfalls and both reliability extremes.
+    assert (result["overflow_l"] > 0).any() and (result["deficit_l"] > 0).any()
+    assert (result["reliability"] < 1).any() and (result["reliability"][2] == 1).all()
+
+
+def test_simulate_storage_per_site_rainfall(grid):
+    rains = np.stack([grid["rain"], grid["rain"] * 0.5, grid["rain"][::-1]])
+    result = simulate_storage(grid["roof_area"], grid["efficiency"], grid["daily_demand"],
+                              grid["tank_volumes"], rains, rule="yas")
+    assert_matches_reference(result, grid, rains, 0.0, "yas")
+
+
+def test_simulate_storage_rejects_partial_years(grid):
+    with pytest.raises(ValueError, match="whole years"):
+        simulate_storage(100, 0.8, 500, [1000], grid["rain"].reshape(-1)[:18])
+
+
+def test_tank_simulate_endpoint_matches_scalar_loop(client):
+    volumes = [2000.0, 10000.0]
+    body = client.post("/tank/simulate", json={"sites": [SITE], "tank_volumes": volumes, "rule": "yas"}).json()
+    site = body["results"][0]
+    years, rain = water_balance.monthly_series()
+    assert (site["first_year"], site["last_year"]) == (int(years[0]), int(years[-1]))
+    for v, volume in enumerate(volumes):
+        expected = reference(SITE["roof_area"], site["efficiency"] / 100, site["daily_demand_l"], volume, rain, rule="yas")
+        for name, value in expected.items():
+            assert site[name][v] == pytest.approx(value, rel=1e-9), name
+
+
+def test_tank_simulate_rejects_missing_sites(client):
+    assert client.post("/tank/simulate", json={"sites": [], "tank_volumes": [1000]}).status_code == 422
+
+
+def metric_at(grid, volumes, metric, rule="ybs"):
+    return simulate_storage(grid["roof_area"], grid["efficiency"], grid["daily_demand"],
+                            np.asarray(volumes)[:, None], grid["rain"], rule=rule)[metric][:, 0]
+
+
+@pytest.mark.parametrize("metric", water_balance.TARGET_METRICS)
+@pytest.mark.parametrize("rule", water_balance.OPERATING_RULES)
+def test_optimizer_returns_the_smallest_volume_meeting_the_target(grid, metric, rule):
+    grid["roof_area"] = np.array([150.0, 200.0, 250.0])
+    grid["daily_demand"] = np.array([150.0, 200.0, 300.0])
+    tolerance = 25.0
+    target = np.array([0.8, 0.85, 0.7])
+    result = water_balance.optimize_tank_volume(grid["roof_area"], grid["efficiency"], grid["daily_demand"],
+                                                grid["rain"], target, metric, rule=rule, tolerance_l=tolerance)
+    volume = result["tank_volume"]
+    assert result["feasible"].all() and (volume > 0).all()
+    np.testing.assert_allclose(volume % tolerance, 0.0)
+    at_volume = metric_at(grid, volume, metric, rule)
+    np.testing.assert_allclose(result["achieved"], at_volume)
+    assert (at_volume >= target).all()
+    assert (metric_at(grid, volume - tolerance, metric, rule) < target).all()
+
+
+def test_optimizer_reports_unreachable_targets(grid):
+    # A tiny roof cannot collect a year's demand however large the tank.
+    roof_area, efficiency, demand = np.array([5.0, 100.0]), np.array([0.8, 0.8]), np.array([2000.0, 150.0])
+    result = water_balance.optimize_tank_volume(roof_area, efficiency, demand, grid["rain"], target=0.7)
+    assert result["feasible"].tolist() == [False, True]
+    assert np.isnan(result["tank_volume"][0]) and result["tank_volume"][1] > 0
+    huge = simulate_storage(roof_area, efficiency, demand, [1e9], grid["rain"])["reliability"][:, 0]
+    assert huge[0] < 0.7 and result["achieved"][0] == pytest.approx(huge[0])
+
+
+def test_optimizer_needs_no_tank_when_the_target_is_met_empty(grid):
+    result = water_balance.optimize_tank_volume(100.0, 0.8, 0.0, grid["rain"], target=1.0)
+    assert result["feasible"].all() and result["tank_volume"].tolist() == [0.0]
+
+
+def test_tank_optimize_endpoint_reports_infeasible_sites(client):
+    sites = [{**SITE, "dwellers": 1}, {**SITE, "roof_area": 1, "dwellers": 50}]
+    body = client.post("/tank/optimize", json={"sites": sites, "target": 0.8}).json()
+    reachable, unreachable = body["results"]
+    assert reachable["tank_volume"] > 0 and reachable["achieved"] >= 0.8
+    assert unreachable["tank_volume"] is None and unreachable["achieved"] < 0.8
@@ -0,0 +1,374 @@
+"""Monthly rainwater tank water-balance simulation over the historical record.
+
+Each month a tank of volume ``V`` receives ``rain_mm x roof_area x efficiency``
+litres (1 mm on 1 m^2 is 1 litre) and supplies the month's demand. With the
+default yield-before-spillage rule (``"ybs"``) demand is drawn from storage
+plus inflow before anything above ``V`` spills, which suits a monthly step
+where water is used while it rains; ``"yas"`` (spill first, then draw) is
+the conservative alternative. Months are stepped in order because storage
+carries over, but every step is vectorized over sites x tank sizes, so
+memory is ``O(sites x tanks)`` whatever the length of the record.
+
+Like ``serving``, this module needs only NumPy and the standard library; the
+Bengaluru series is read with ``csv`` and missing months are imputed with
+the month's mean, as ``k_means_v3.load_and_clean`` does.
+"""
+
+from __future__ import annotations
+
+import csv
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+import region_store
+import serving
+
+MONTH_COLUMNS = ("Jan", "Feb", "March", "April", "May", "June", "July", "Aug", "Sept", "Oct", "Nov", "Dec")
+DAYS_IN_MONTH = np.array([31, 28.25, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+DEFAULT_PER_CAPITA_LPD = 135.0  # litres per person per day (CPHEEO urban norm)
+# A month counts as "met" when the shortfall is below this many litres (rounding noise).
+DEFICIT_TOLERANCE_L = 1e-6
+OPERATING_RULES = ("ybs", "yas")
+TARGET_METRICS = ("reliability", "volumetric_reliability")
+DEFAULT_TARGET_RELIABILITY = 0.9
+# Tank sizes are searched (and reported) to this many litres.
+DEFAULT_VOLUME_TOLERANCE_L = 10.0
+
+
+def _parse(text: str) -> float:
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _impute_monthly(matrix: np.ndarray) -> np.ndarray:
+    """Fill NaN months with that month's mean over the other years."""
+    matrix = matrix.copy()
+    missing = np.isnan(matrix)
+    if missing.any():
+        with np.errstate(invalid="ignore"):
+            counts = (~missing).sum(axis=0)
+            means = np.where(counts > 0, np.nansum(matrix, axis=0) / np.maximum(counts, 1), 0.0)
+        matrix[missing] = np.broadcast_to(means, matrix.shape)[missing]
+    return matrix
+
+
+def load_monthly_rainfall(path: Path) -> Tuple[np.ndarray, np.ndarray]:
+    """Return ``(years, rainfall)`` with rainfall as a ``(years, 12)`` mm matrix."""
+    with open(path, newline="", encoding="utf-8-sig") as fh:
+        reader = csv.reader(fh)
+        header = next(reader)
+        kept = [i for i, name in enumerate(header) if name.strip() and not name.lower().startswith("unnamed")]
+        year_index = kept[0]
+        month_index = [header.index(m) for m in MONTH_COLUMNS]
+        years, rows = [], []
+        for record in reader:
+            if len(record) <= max(month_index + [year_index]):
+                continue
+            year = _parse(record[year_index])
+            if np.isnan(year):
+                continue
+            years.append(int(year))
+            rows.append([_parse(record[i]) for i in month_index])
+    return np.array(years), _impute_monthly(np.array(rows, dtype=float).reshape(-1, 12))
+
+
+def region_monthly_rainfall(region: str) -> Tuple[np.ndarray, np.ndarray]:
+    """``(years, rainfall)`` for an IMD subdivision from region_store."""
+    store = region_store.get_store()
+    monthly = store.values[store.code(region), :, :12]
+    present = ~np.isnan(monthly).all(axis=1)
+    years = np.arange(store.first_year, store.first_year + monthly.shape[0])[present]
+    return years, _impute_monthly(monthly[present])
+
+
+# region -> (source, (years, rainfall)); the source is the Bengaluru file's content
+# hash or the RegionStore the series came from, so appended years or a
+# reloaded IMD file are picked up on the next lookup.
+_series: Dict[Optional[str], Tuple[object, Tuple[np.ndarray, np.ndarray]]] = {}
+_series_lock = threading.Lock()
+
+
+def _series_source(key: Optional[str]) -> object:
+    return serving.MODEL_REGISTRY.current_data_hash() if key is None else region_store.get_store()
+
+
+def _is_fresh(entry, source) -> bool:
+    return entry is not None and (entry[0] is source or isinstance(source, str) and entry[0] == source)
+
+
+def monthly_series(region: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Cached ``(years, rainfall)``: the Bengaluru record, or ``region``'s IMD record."""
+    key = None if region is None else region_store.normalize_region(region)
+    source = _series_source(key)
+    entry = _series.get(key)
+    if not _is_fresh(entry, source):
+        with _series_lock:
+            entry = _series.get(key)
+            if not _is_fresh(entry, source):
+                series = load_monthly_rainfall(serving.DATA_PATH) if key is None else region_monthly_rainfall(region)
+                series[1].setflags(write=False)
+                entry = _series[key] = (source, series)
+    return entry[1]
+
+
+def record_mean_annual(region: Optional[str] = None) -> float:
+    """Mean annual rainfall (mm) of the record monthly_series(region) returns."""
+    _, rain = monthly_series(region)
+    return float(rain.sum() / len(rain))
+
+
+def _spill(storage: np.ndarray, volumes: np.ndarray, excess: np.ndarray, overflow: np.ndarray) -> None:
+    np.subtract(storage, volumes, out=excess)
+    np.maximum(excess, 0.0, out=excess)
+    storage -= excess
+    overflow += excess
+
+
+def simulate_storage(
+    roof_area,
+    efficiency,
+    daily_demand,
+    tank_volumes,
+    monthly_rainfall,
+    initial_fill: float = 0.0,
+    rule: str = "ybs",
+) -> dict:
+    """Simulate every (site, tank size) pair over the rainfall record.
+
+    ``roof_area`` (m^2), ``efficiency`` (0-1) and ``daily_demand`` (litres/day)
+    are per site (shape ``(S,)`` or scalars). ``tank_volumes`` (litres) is
+    ``(T,)``, shared by all sites, or ``(S, T)``. ``monthly_rainfall`` (mm) is
+    a ``(years, 12)`` matrix shared by all sites, or ``(S, years, 12)``.
+    Storage starts ``initial_fill`` x full; ``rule`` is "ybs" or "yas".
+
+    Returns ``(S, T)`` arrays: ``reliability`` (fraction of months with
+    demand fully met), ``volumetric_reliability`` (share of demand supplied),
+    and per-year averages ``supplied_l``, ``overflow_l`` and ``deficit_l``.
+    """
+    roof_area = np.atleast_1d(np.asarray(roof_area, dtype=float))
+    efficiency = np.atleast_1d(np.asarray(efficiency, dtype=float))
+    daily_demand = np.atleast_1d(np.asarray(daily_demand, dtype=float))
+    n_sites = max(len(roof_area), len(efficiency), len(daily_demand))
+    catchment = np.broadcast_to(roof_area * efficiency, (n_sites,))[:, None]   # litres per mm
+    demand_per_day = np.broadcast_to(daily_demand, (n_sites,))[:, None]
+
+    volumes = np.asarray(tank_volumes, dtype=float)
+    volumes = np.broadcast_to(volumes if volumes.ndim == 2 else volumes[None, :], (n_sites, volumes.shape[-1]))
+
+    if rule not in OPERATING_RULES:
+        raise ValueError(f"Unknown operating rule {rule!r}; expected one of {OPERATING_RULES}")
+    spill_first = rule == "yas"
+    rain = np.asarray(monthly_rainfall, dtype=float)
+    per_site_rain = rain.ndim == 3
+    rain = rain.reshape(n_sites, -1) if per_site_rain else rain.reshape(-1)
+    n_months = rain.shape[-1]
+    if n_months % 12:
+        raise ValueError("monthly_rainfall must cover whole years (a multiple of 12 months)")
+
+    shape = volumes.shape
+    storage = volumes * float(initial_fill)
+    overflow = np.zeros(shape)
+    supplied = np.zeros(shape)
+    met_months = np.zeros(shape, dtype=np.int32)
+    # Scratch buffers, reused every month to keep the loop allocation-free.
+    excess = np.empty(shape)
+    draw = np.empty(shape)
+    short = np.empty(shape)
+    met = np.empty(shape, dtype=bool)
+    inflow = np.empty((n_sites, 1))
+    demand = np.empty((n_sites, 1))
+    for t in range(n_months):
+        np.multiply(catchment, rain[:, t:t + 1] if per_site_rain else rain[t], out=inflow)
+        np.multiply(demand_per_day, DAYS_IN_MONTH[t % 12], out=demand)
+        storage += inflow
+        if spill_first:
+            _spill(storage, volumes, excess, overflow)
+        np.minimum(storage, demand, out=draw)
+        storage -= draw
+        supplied += draw
+        if not spill_first:
+            _spill(storage, volumes, excess, overflow)
+        np.subtract(demand, draw, out=short)
+        np.less_equal(short, DEFICIT_TOLERANCE_L, out=met)
+        met_months += met
+
+    years = n_months / 12
+    total_demand = demand_per_day * DAYS_IN_MONTH.sum() * years
+    deficit = total_demand - supplied
+    with np.errstate(invalid="ignore", divide="ignore"):
+        volumetric = np.where(total_demand > 0, supplied / total_demand, 1.0)
+    return {
+        "reliability": met_months / n_months,
+        "volumetric_reliability": volumetric,
+        "supplied_l": supplied / years,
+        "overflow_l": overflow / years,
+        "deficit_l": deficit / years,
+    }
+
+
+def site_efficiency(roof_types, roof_slopes=5.0, catchment_effs=None) -> np.ndarray:
+    """Runoff efficiency (0-1) per site, derived exactly as predict_harvest does."""
+    if catchment_effs is not None:
+        catchment_effs = np.array([np.nan if e is None else e for e in catchment_effs], dtype=float)
+    result = serving.predict_harvest_array(1.0, serving.encode_roof_types(roof_types), 0.0, roof_slopes, catchment_effs)
+    return np.broadcast_to(result["efficiency"] / 100.0, (len(roof_types),))
+
+
+def simulate_sites(
+    roof_area,
+    efficiency,
+    daily_demand,
+    tank_volumes,
+    regions=None,
+    initial_fill: float = 0.0,
+    rule: str = "ybs",
+) -> dict:
+    """simulate_storage for sites that may sit in different regions.
+
+    ``regions`` holds one IMD subdivision (or None for the Bengaluru record)
+    per site. Sites are grouped by region so each group runs against its own
+    record; results come back in input order, plus each site's record span.
+    """
+    roof_area, efficiency, daily_demand = site_arrays(roof_area, efficiency, daily_demand)
+    n_sites = len(roof_area)
+    volumes = np.asarray(tank_volumes, dtype=float)
+    out = {name: np.empty((n_sites, volumes.shape[-1])) for name in
+           ("reliability", "volumetric_reliability", "supplied_l", "overflow_l", "deficit_l")}
+    for idx, rain in region_groups(regions, n_sites, out):
+        result = simulate_storage(
+            roof_area[idx], efficiency[idx], daily_demand[idx],
+            volumes[idx] if volumes.ndim == 2 else volumes, rain, initial_fill, rule,
+        )
+        for name, values in result.items():
+            out[name][idx] = values
+    return out
+
+
+def site_arrays(roof_area, efficiency, daily_demand):
+    roof_area = np.atleast_1d(np.asarray(roof_area, dtype=float))
+    n_sites = len(roof_area)
+    efficiency = np.broadcast_to(np.asarray(efficiency, dtype=float), (n_sites,))
+    daily_demand = np.broadcast_to(np.asarray(daily_demand, dtype=float), (n_sites,))
+    return roof_area, efficiency, daily_demand
+
+
+def region_groups(regions, n_sites: int, out: dict):
+    """Yield ``(site indices, rainfall)`` per distinct region; fills ``out``'s record span."""
+    if regions is None:
+        regions = [None] * n_sites
+    keys = [None if r is None else region_store.normalize_region(r) for r in regions]
+    out["first_year"] = np.empty(n_sites, dtype=int)
+    out["last_year"] = np.empty(n_sites, dtype=int)
+    for key in dict.fromkeys(keys):
+        idx = np.array([i for i, k in enumerate(keys) if k == key])
+        years, rain = monthly_series(None if key is None else regions[idx[0]])
+        out["first_year"][idx] = years[0]
+        out["last_year"][idx] = years[-1]
+        yield idx, rain
+
+
+def optimize_tank_volume(
+    roof_area,
+    efficiency,
+    daily_demand,
+    monthly_rainfall,
+    target=DEFAULT_TARGET_RELIABILITY,
+    metric: str = "reliability",
+    initial_fill: float = 0.0,
+    rule: str = "ybs",
+    tolerance_l: float = DEFAULT_VOLUME_TOLERANCE_L,
+) -> dict:
+    """Smallest tank per site whose simulated ``metric`` reaches ``target``.
+
+    ``target`` (0-1) is a scalar or one value per site.
+
+    ``metric`` is "reliability" (share of months with demand met) or
+    "volumetric_reliability". Both only grow with tank volume, so all sites
+    are bisected together: each round simulates one candidate volume per
+    site as an ``(S, 1)`` grid and halves every site's bracket, stopping
+    once all brackets are narrower than ``tolerance_l`` litres.
+
+    The search starts from ``[0, record inflow + record demand]``; a tank of
+    the record's whole inflow never spills, so sites that miss the target
+    there cannot reach it and get NaN. Returns ``tank_volume`` (litres,
+    rounded up to ``tolerance_l``), the ``achieved`` metric at that volume,
+    ``feasible`` and the number of simulation ``rounds``.
+    """
+    if metric not in TARGET_METRICS:
+        raise ValueError(f"Unknown metric {metric!r}; expected one of {TARGET_METRICS}")
+    roof_area, efficiency, daily_demand = site_arrays(roof_area, efficiency, daily_demand)
+    target = np.broadcast_to(np.asarray(target, dtype=float), roof_area.shape)
+    if ((target < 0.0) | (target > 1.0)).any():
+        raise ValueError("target must be between 0 and 1")
+    rain = np.asarray(monthly_rainfall, dtype=float)
+    years = rain.size / 12
+
+    def score(volumes: np.ndarray) -> np.ndarray:
+        return simulate_storage(roof_area, efficiency, daily_demand, volumes[:, None], rain, initial_fill, rule)[metric][:, 0]
+
+    lo = np.zeros(len(roof_area))
+    hi = roof_area * efficiency * rain.sum() + daily_demand * DAYS_IN_MONTH.sum() * years
+    hi = np.maximum(np.ceil(hi / tolerance_l) * tolerance_l, tolerance_l)
+    rounds = 2
+    at_zero = score(lo) >= target
+    at_hi = score(hi)
+    feasible = at_hi >= target
+    # Invariant: hi meets the target, lo does not (sites already met at 0 are done).
+    hi = np.where(at_zero, 0.0, hi)
+    searching = feasible & ~at_zero
+    while searching.any():
+        width = np.where(searching, hi - lo, 0.0)
+        if width.max() <= tolerance_l:
+            break
+        mid = np.where(searching, np.ceil((lo + hi) / 2 / tolerance_l) * tolerance_l, hi)
+        ok = score(mid) >= target
+        rounds += 1
+        hi = np.where(searching & ok, mid, hi)
+        lo = np.where(searching & ~ok, mid, lo)
+        searching &= (hi - lo) > tolerance_l
+
+    volume = np.where(feasible, hi, np.nan)
+    achieved = score(np.where(feasible, hi, 0.0))
+    return {
+        "tank_volume": volume,
+        "achieved": np.where(feasible, achieved, at_hi),
+        "feasible": feasible,
+        "rounds": rounds + 1,
+    }
+
+
+def optimize_sites(
+    roof_area,
+    efficiency,
+    daily_demand,
+    regions=None,
+    target=DEFAULT_TARGET_RELIABILITY,
+    metric: str = "reliability",
+    initial_fill: float = 0.0,
+    rule: str = "ybs",
+    tolerance_l: float = DEFAULT_VOLUME_TOLERANCE_L,
+) -> dict:
+    """optimize_tank_volume for sites that may sit in different regions (see simulate_sites)."""
+    roof_area, efficiency, daily_demand = site_arrays(roof_area, efficiency, daily_demand)
+    n_sites = len(roof_area)
+    target = np.broadcast_to(np.asarray(target, dtype=float), (n_sites,))
+    out = {
+        "tank_volume": np.empty(n_sites),
+        "achieved": np.empty(n_sites),
+        "feasible": np.empty(n_sites, dtype=bool),
+        "rounds": 0,
+    }
+    for idx, rain in region_groups(regions, n_sites, out):
+        result = optimize_tank_volume(
+            roof_area[idx], efficiency[idx], daily_demand[idx], rain,
+            target[idx], metric, initial_fill, rule, tolerance_l,
+        )
+        for name in ("tank_volume", "achieved", "feasible"):
+            out[name][idx] = result[name]
+        out["rounds"] += result["rounds"]
+    return out